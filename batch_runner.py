@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+ファイル入力の一括処理モジュール
+CSV / JSON Lines から URL・メーカー名・クリエーター名を1行ずつ読み込み、スクレイピングとレポート生成を行って
+結果をJSON Linesに1行ずつ追記する（Google Sheetsは使わない）。
+入力・出力とも全件をメモリに保持せず、同時に処理中の行数は BATCH_CONCURRENCY で制限する
+"""
+
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from processing_ledger import input_hash
+from project_record import STATUS_BLOCKED
+
+# 同時にレポートを生成する行数（スクレイピングはブラウザ1つで順に行う）
+DEFAULT_CONCURRENCY = 4
+
+# 入力の列名（シートの見出しと英語名のどちらでも可）
+_COLUMN_ALIASES = {
+    'url': ('url', 'URL', 'kickstarter_url', 'Kickstarter URL'),
+    'product_name': ('product_name', 'product', '商品名'),
+    'maker_name': ('maker_name', 'maker', 'メーカー名'),
+    'creator_name': ('creator_name', 'creator', 'クリエーター名'),
+}
+
+# 見出しの無いCSVの列順
+_POSITIONAL_COLUMNS = ('url', 'maker_name', 'creator_name', 'product_name')
+
+
+def _normalize_row(values):
+    """列名の揺れを吸収して入力1行分のdictを作成"""
+    row = {}
+    for field, aliases in _COLUMN_ALIASES.items():
+        value = next((values[a] for a in aliases if values.get(a)), '')
+        row[field] = str(value).strip()
+    return row
+
+
+def iter_batch_inputs(path):
+    """
+    入力ファイルを1行ずつ読み込み（.csv はCSV、それ以外はJSON Lines）
+
+    CSVは見出し（url / maker_name / creator_name / product_name、またはシートと同じ日本語の見出し）付き、
+    または見出し無しの url, maker_name, creator_name の順。JSON Linesは同じキーを持つオブジェクトかURLの文字列
+
+    Args:
+        path (str): 入力ファイルのパス
+
+    Yields:
+        dict: 'line', 'url', 'product_name', 'maker_name', 'creator_name'
+            （解析できない行は 'error' を含む）
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            if header and header[0].strip().lower().startswith('http'):
+                columns, first = _POSITIONAL_COLUMNS, [(1, header)]
+            else:
+                columns, first = [h.strip() for h in header], []
+            for line, cells in first + [(i, c) for i, c in enumerate(reader, start=2)]:
+                if not any(cell.strip() for cell in cells):
+                    continue
+                yield dict(_normalize_row(dict(zip(columns, cells))), line=line)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line, text in enumerate(f, start=1):
+            text = text.strip()
+            if not text:
+                continue
+            try:
+                values = json.loads(text)
+            except json.JSONDecodeError as e:
+                yield {'line': line, 'url': '', 'error': f'Invalid JSON: {e}'}
+                continue
+            if isinstance(values, str):
+                values = {'url': values}
+            if not isinstance(values, dict):
+                yield {'line': line, 'url': '', 'error': 'Expected a JSON object or URL string'}
+                continue
+            yield dict(_normalize_row(values), line=line)
+
+
+def load_completed(output_path):
+    """
+    出力済みのJSON Linesから成功した行の入力ハッシュを読み込み（同じ出力ファイルで再実行すると続きから処理する）
+
+    Returns:
+        set: 入力ハッシュ
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for text in f:
+            try:
+                result = json.loads(text)
+            except json.JSONDecodeError:
+                # 書き込み途中で中断された末尾行
+                continue
+            if result.get('status') == 'ok':
+                completed.add(result['input_hash'])
+    return completed
+
+
+class BatchRunner:
+    """ファイル入力をスクレイピング・レポート生成し、結果をJSON Linesに追記する"""
+
+    def __init__(self, ctx, concurrency=DEFAULT_CONCURRENCY):
+        """
+        Args:
+            ctx (AnalyzerContext): 設定・スクレイパー・レポート生成クライアント・キャッシュ
+                （check_kickstarter と同じものを使う。スクレイパー等は最初に使う時点で作成される）
+            concurrency (int): 同時にレポートを生成する行数
+        """
+        self.ctx = ctx
+        self.concurrency = max(1, concurrency)
+        self.counts = {'total': 0, 'success': 0, 'errors': 0, 'skipped': 0, 'blocked': 0, 'cached_fallback': 0,
+                       'openai_calls': 0}
+
+    def run(self, input_path, output_path):
+        """
+        入力ファイルを処理（中断した場合も、処理中の行を書き込んでから戻る）
+
+        Args:
+            input_path (str): CSV / JSON Lines の入力ファイル
+            output_path (str): 結果を追記するJSON Linesファイル
+
+        Returns:
+            dict: 件数（total / success / errors / skipped / blocked / cached_fallback / openai_calls）
+        """
+        completed = load_completed(output_path)
+        if completed:
+            print(f"⏯️  {len(completed):,} rows already completed in {output_path} - skipping them\n")
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+        pending = deque()
+        with open(output_path, 'a', encoding='utf-8') as output, \
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='batch') as pool:
+            try:
+                for item in iter_batch_inputs(input_path):
+                    self.counts['total'] += 1
+                    if 'error' in item:
+                        self._write(output, self._result(item, None, error=item['error']))
+                        continue
+                    if not item['url']:
+                        self.counts['skipped'] += 1
+                        continue
+                    item['input_hash'] = input_hash(item['url'], item['product_name'],
+                                                    item['maker_name'], item['creator_name'])
+                    if item['input_hash'] in completed:
+                        self.counts['skipped'] += 1
+                        continue
+
+                    print(f"[line {item['line']}] {item['url']}")
+                    record = self.ctx.scraper.fetch_project_data(item['url'])
+                    from_cache = False
+                    if record.status == STATUS_BLOCKED:
+                        # Bot検出中はキャッシュ済みの情報で生成する（BLOCKED_FALLBACK=cache の場合）
+                        cached = self._cached_record(item['url'])
+                        if cached is None:
+                            self.counts['blocked'] += 1
+                        else:
+                            print(f"  🚧 {record.error} - using cached project data")
+                            self.counts['cached_fallback'] += 1
+                            record, from_cache = cached, True
+                    if not record.ok:
+                        # スクレイピングに失敗した行はレポートを生成しない（再実行時に再処理する）
+                        self._write(output, self._result(item, record, error=record.error))
+                        continue
+                    # キャッシュ・支援額の推移・類似キャンペーン検索インデックスへの追加と、推移・カテゴリの分布の
+                    # 取得は、ストアを共有しないよう、ここで行う
+                    if not from_cache:
+                        self.ctx.store_project(record)
+                    market_data = {}
+                    if self.ctx.snapshot_store is not None:
+                        market_data['history'] = self.ctx.snapshot_store.momentum(record.url)
+                    if self.ctx.category_analytics is not None:
+                        market_data['category_stats'] = self.ctx.category_analytics.context(record)
+
+                    # レポート生成クライアントはスレッドプールで共有するため、ここで作成しておく
+                    generator = self.ctx.generator
+                    pending.append(pool.submit(self._generate, generator, item, record, market_data))
+                    # 処理中の行数を制限（入力を先読みしすぎない）
+                    while len(pending) >= self.concurrency:
+                        self._drain(output, pending, FIRST_COMPLETED)
+            finally:
+                if pending:
+                    self._drain(output, pending)
+        return self.counts
+
+    def _cached_record(self, url):
+        """スクレイピングがブロックされた行の代替データ（キャッシュに無い・BLOCKED_FALLBACK=skip の場合はNone）"""
+        if self.ctx.settings['blocked_fallback'] != 'cache' or self.ctx.project_cache is None:
+            return None
+        return self.ctx.project_cache.get(url)
+
+    def _drain(self, output, pending, return_when=ALL_COMPLETED):
+        """完了した行の結果を書き込み"""
+        done, _ = wait(pending, return_when=return_when)
+        for future in list(pending):
+            if future in done:
+                pending.remove(future)
+                self._write(output, future.result())
+
+    def _generate(self, generator, item, record, market_data=None):
+        """1行分のレポートを生成（スレッドプールで実行、例外はエラーの結果として返す）"""
+        try:
+            return self._generate_reports(generator, item, record, market_data or {})
+        except Exception as e:
+            return self._result(item, record, error=str(e)[:500])
+
+    def _generate_reports(self, generator, item, record, market_data):
+        settings = self.ctx.settings
+        comparables = []
+        if self.ctx.comparables_index is not None:
+            comparables = self.ctx.comparables_index.query(record, k=settings['comparables_top_k'])
+
+        maker_name = item['maker_name'] or 'メーカー名不明'
+        creator_name = item['creator_name'] or 'クリエーター名不明'
+        japanese_report = generator.generate_japanese_report(
+            record, maker_name, creator_name, settings['business_context'], comparables, **market_data)
+        calls = 1
+        if japanese_report.startswith('エラー'):
+            return self._result(item, record, japanese_report=japanese_report, error=japanese_report, calls=calls)
+
+        english_report = None
+        if not settings['debug_mode']:
+            english_report = generator.generate_english_report(
+                record, item['maker_name'] or 'Unknown Maker', item['creator_name'] or 'Unknown Creator',
+                comparables, **market_data)
+            calls += 1
+            if english_report.startswith('Error'):
+                return self._result(item, record, japanese_report, english_report, error=english_report,
+                                    calls=calls)
+        return self._result(item, record, japanese_report, english_report, calls=calls)
+
+    def _result(self, item, record, japanese_report=None, english_report=None, error=None, calls=0):
+        # テンプレートの選択はプロセス内で固定のため、どのスレッドから参照しても同じ
+        template_ids = dict(self.ctx.generator.last_template_ids) if japanese_report else {}
+        return {
+            'line': item['line'],
+            'url': item['url'],
+            'input_hash': item.get('input_hash'),
+            'maker_name': item.get('maker_name', ''),
+            'creator_name': item.get('creator_name', ''),
+            'status': 'error' if error else 'ok',
+            'error': error,
+            'project': record.to_dict() if record is not None else None,
+            'japanese_report': japanese_report,
+            'english_report': english_report,
+            'template_ids': template_ids,
+            'openai_calls': calls,
+            'at': datetime.now().isoformat(),
+        }
+
+    def _write(self, output, result):
+        """結果を1行追記（行ごとにフラッシュし、中断しても書き込み済みの行は残す）"""
+        output.write(json.dumps(result, ensure_ascii=False) + '\n')
+        output.flush()
+        self.counts['openai_calls'] += result['openai_calls']
+        if result['status'] == 'ok':
+            self.counts['success'] += 1
+            print(f"  ✓ line {result['line']} done")
+        else:
+            self.counts['errors'] += 1
+            print(f"  ❌ line {result['line']}: {(result['error'] or '')[:200]}")
+
+
+def default_output_path(input_path):
+    """入力ファイルと同じディレクトリの <名前>.results.jsonl"""
+    return os.path.splitext(input_path)[0] + '.results.jsonl'
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+カテゴリ別実績分布モジュール
+スクレイピング済みプロジェクトを列ごとのNumPy配列に読み込み、カテゴリ単位の分布
+（総支援額のパーセンタイル・ゴール達成率・支援者1人あたりの支援額・リワード価格帯）をまとめて計算する。
+結果はカテゴリごとに保持し、そのカテゴリのレコードがキャッシュに追加された場合のみ再計算する
+"""
+
+import argparse
+import time
+from itertools import chain
+
+import numpy as np
+
+from profiling import profiled_run
+
+# 分布を計算する最小のプロジェクト数（これより少ないカテゴリはプロンプトに追加しない）
+MIN_CATEGORY_PROJECTS = 10
+
+# 総支援額のパーセンタイル
+FUNDING_PERCENTILES = (25, 50, 75, 90)
+
+# リワード価格帯の境界（USD）
+REWARD_PRICE_BANDS = (0, 50, 100, 250, 500, np.inf)
+
+
+def build_columns(records):
+    """
+    レコードを列ごとの配列に変換（金額はUSD換算）
+
+    Args:
+        records (list): ProjectRecord のリスト
+
+    Returns:
+        tuple: (列名 → 配列のdict, カテゴリ名のリスト)。'category' 列はカテゴリ名のリストの添字
+    """
+    n = len(records)
+    categories = {}
+    codes = np.fromiter((categories.setdefault(r.category, len(categories)) for r in records), np.int32, n)
+    usd_rate = np.fromiter((r.usd_rate for r in records), np.float64, n)
+    tier_counts = np.fromiter((len(r.reward_tiers) for r in records), np.int64, n)
+    tiers = np.fromiter(chain.from_iterable(r.reward_tiers for r in records), np.float64, int(tier_counts.sum()))
+    columns = {
+        'category': codes,
+        'funding': np.fromiter((r.funding_total for r in records), np.float64, n) * usd_rate,
+        'goal': np.fromiter((r.goal_amount for r in records), np.float64, n) * usd_rate,
+        'backers': np.fromiter((r.backers for r in records), np.float64, n),
+        'tier_counts': tier_counts,
+        'tiers': tiers * np.repeat(usd_rate, tier_counts),
+    }
+    return columns, list(categories)
+
+
+def _split_by(values, codes, size):
+    """配列をカテゴリの添字ごとに分割"""
+    order = np.argsort(codes, kind='stable')
+    bounds = np.cumsum(np.bincount(codes, minlength=size))[:-1]
+    return np.split(values[order], bounds)
+
+
+def summarize_columns(columns, names):
+    """
+    全カテゴリの分布をまとめて計算
+
+    Returns:
+        dict: カテゴリ名 → (分布のdict, 昇順の総支援額の配列)。プロジェクト数が少ないカテゴリは含まない
+    """
+    codes = columns['category']
+    size = len(names)
+    tier_counts = columns['tier_counts']
+    tier_codes = np.repeat(codes, tier_counts)
+    # リワードは昇順のため、各プロジェクトの先頭が最低価格
+    has_tiers = tier_counts > 0
+    entry_index = (np.cumsum(tier_counts) - tier_counts)[has_tiers]
+
+    groups = zip(
+        _split_by(columns['funding'], codes, size),
+        _split_by(columns['goal'], codes, size),
+        _split_by(columns['backers'], codes, size),
+        _split_by(columns['tiers'], tier_codes, size),
+        _split_by(columns['tiers'][entry_index], codes[has_tiers], size),
+    )
+    summaries = {}
+    for name, (funding, goal, backers, tiers, entry) in zip(names, groups):
+        if len(funding) < MIN_CATEGORY_PROJECTS:
+            continue
+        summaries[name] = _summarize(name, funding, goal, backers, tiers, entry)
+    return summaries
+
+
+def _summarize(name, funding, goal, backers, tiers, entry):
+    """1カテゴリ分の分布"""
+    funding_sorted = np.sort(funding)
+    stats = {'category': name, 'projects': int(len(funding))}
+    for p, value in zip(FUNDING_PERCENTILES, np.percentile(funding_sorted, FUNDING_PERCENTILES)):
+        stats[f'funding_p{p}'] = round(float(value), 2)
+
+    has_goal = goal > 0
+    if has_goal.any():
+        attainment = funding[has_goal] / goal[has_goal]
+        stats['attainment_p50'], stats['attainment_p75'] = (
+            round(float(v), 3) for v in np.percentile(attainment, (50, 75)))
+        stats['success_rate'] = round(float(np.mean(attainment >= 1)), 3)
+
+    pledged = (backers > 0) & (funding > 0)
+    if pledged.any():
+        stats['pledge_per_backer_p50'] = round(float(np.median(funding[pledged] / backers[pledged])), 2)
+        stats['backers_per_1k_usd_p50'] = round(float(np.median(backers[pledged] / funding[pledged] * 1000)), 2)
+
+    if len(tiers):
+        stats['entry_price_p50'] = round(float(np.median(entry)), 2)
+        stats['reward_price_p25'], stats['reward_price_p50'], stats['reward_price_p75'] = (
+            round(float(v), 2) for v in np.percentile(tiers, (25, 50, 75)))
+        shares = np.histogram(tiers, bins=REWARD_PRICE_BANDS)[0] / len(tiers)
+        stats['price_bands'] = [
+            (float(low), float(high) if np.isfinite(high) else None, round(float(share), 3))
+            for low, high, share in zip(REWARD_PRICE_BANDS[:-1], REWARD_PRICE_BANDS[1:], shares)
+        ]
+    return stats, funding_sorted
+
+
+class CategoryAnalytics:
+    """プロジェクトキャッシュのカテゴリ別分布（カテゴリごとに保持し、新しいデータが追加されたカテゴリのみ再計算）"""
+
+    def __init__(self, project_cache):
+        """
+        Args:
+            project_cache (ProjectCache): プロジェクトキャッシュ（put されたレコードは次の参照時に反映）
+        """
+        self.project_cache = project_cache
+        # カテゴリ名 → (カテゴリの版, 分布のdict または None, 昇順の総支援額の配列)
+        self._entries = {}
+        self._loaded = False
+
+    def refresh(self):
+        """全カテゴリの分布をまとめて再計算"""
+        columns, names = build_columns(self.project_cache.records())
+        summaries = summarize_columns(columns, names)
+        self._entries = {
+            name: (self.project_cache.category_version(name),) + summaries.get(name, (None, None))
+            for name in names
+        }
+        self._loaded = True
+
+    def _entry(self, category):
+        version = self.project_cache.category_version(category)
+        if not self._loaded:
+            self.refresh()
+        entry = self._entries.get(category)
+        if entry is None or entry[0] != version:
+            # このカテゴリのレコードのみで再計算
+            records = [r for r in self.project_cache.records() if r.category == category]
+            summary = summarize_columns(*build_columns(records)).get(category, (None, None)) if records \
+                else (None, None)
+            entry = self._entries[category] = (version,) + summary
+        return entry
+
+    def stats(self, category):
+        """
+        カテゴリの分布
+
+        Returns:
+            dict or None: 分布（プロジェクト数が MIN_CATEGORY_PROJECTS 未満の場合はNone）
+        """
+        return self._entry(category)[1]
+
+    def context(self, record):
+        """
+        プロンプトに渡すカテゴリの分布（当該プロジェクトの総支援額の順位を含む）
+
+        Args:
+            record (ProjectRecord): 対象のプロジェクト
+
+        Returns:
+            dict or None: stats の値と 'funding_top_share'（総支援額が上位何割か）
+        """
+        _, stats, funding_sorted = self._entry(record.category)
+        if stats is None:
+            return None
+        above = len(funding_sorted) - np.searchsorted(funding_sorted, record.funding_total_usd, side='right')
+        return dict(stats, funding_top_share=round(float((above + 1) / len(funding_sorted)), 3))
+
+
+def benchmark(n=100000):
+    """
+    合成データでの計算時間を計測（全カテゴリの計算と、1件追加後の再計算）
+
+    Args:
+        n (int): プロジェクト数
+    """
+    import os
+    import random
+    import shutil
+    import tempfile
+
+    from project_cache import ProjectCache
+    from project_record import ProjectRecord
+
+    random.seed(0)
+    categories = [f'Category {i}' for i in range(150)]
+    records = []
+    for i in range(n):
+        currency, usd_rate = random.choice([('USD', 1.0)] * 4 + [('EUR', 1.08), ('JPY', 0.0067)])
+        scale = 150 if currency == 'JPY' else 1
+        records.append(ProjectRecord(
+            url=f'https://www.kickstarter.com/projects/creator{i}/project{i}',
+            category=random.choice(categories),
+            currency=currency,
+            usd_rate=usd_rate,
+            reward_tiers=tuple(sorted(random.sample(range(5, 500), random.randint(0, 8)))) if scale == 1
+            else tuple(sorted(random.sample(range(1000, 80000, 500), random.randint(0, 8)))),
+            funding_total=float(random.lognormvariate(9, 2)) * scale,
+            goal_amount=float(random.randint(1000, 100000)) * scale,
+            backers=random.randint(0, 20000),
+        ))
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'projects.jsonl')
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(record.to_json() + '\n')
+    cache = ProjectCache(path)
+    analytics = CategoryAnalytics(cache)
+
+    print("=" * 60)
+    print(f"Category Stats Benchmark ({n:,} projects, {len(categories)} categories)")
+    print("=" * 60)
+
+    started = time.perf_counter()
+    columns, names = build_columns(records)
+    columns_s = time.perf_counter() - started
+    started = time.perf_counter()
+    summarize_columns(columns, names)
+    summarize_s = time.perf_counter() - started
+    print(f"  {'build columns':<36}{columns_s * 1000:>9.1f}ms")
+    print(f"  {'summarize all categories':<36}{summarize_s * 1000:>9.1f}ms")
+
+    started = time.perf_counter()
+    analytics.refresh()
+    print(f"  {'refresh (columns + summaries)':<36}{(time.perf_counter() - started) * 1000:>9.1f}ms")
+
+    started = time.perf_counter()
+    for record in records[:1000]:
+        analytics.context(record)
+    print(f"  {'context (cached), per project':<36}{(time.perf_counter() - started) / 1000 * 1000:>9.3f}ms")
+
+    added = ProjectRecord(url='https://www.kickstarter.com/projects/creator/new', category=categories[0],
+                          funding_total=1000.0, goal_amount=500.0, backers=20)
+    cache.put(added)
+    shutil.rmtree(directory)
+    # 追加したカテゴリのプロジェクトで計測（他のカテゴリはキャッシュ済みのまま）
+    started = time.perf_counter()
+    analytics.context(added)
+    print(f"  {'recompute 1 category after put':<36}{(time.perf_counter() - started) * 1000:>9.1f}ms")
+
+    print("\nSample (" + records[0].category + "):")
+    for key, value in analytics.context(records[0]).items():
+        print(f"  {key}: {value}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-category analytics over synthetic projects')
+    parser.add_argument('--records', type=int, default=100000, help='Number of synthetic projects')
+    args = parser.parse_args()
+    benchmark(args.records)
+
+
+if __name__ == '__main__':
+    # PROFILE_MODE=cprofile / sample でプロファイル（logs/profile-*）
+    with profiled_run('category_stats'):
+        main()
@@ -3,193 +3,1282 @@
 Kickstarter Market Analyzer - メインスクリプト
 Kickstarterから製品情報を取得し、ChatGPTで市場分析レポートを生成して
 Google Sheetsに書き込む
+
+サブコマンド（各コマンドは必要なモジュール・クライアントのみを読み込む）:
+    scan    未処理の行を一覧表示（Sheetsのみ）
+    scrape  未処理の行をスクレイピングして実行ジャーナルに保存（ブラウザのみ）
+    report  保存済みのスクレイピング結果からレポートを生成（OpenAIのみ）
+    write   生成済みのレポートをシートに書き込み（Sheetsのみ）
+    run     スクレイピングから書き込みまでを一括実行（デフォルト）
+    batch   CSV / JSON Lines のURLを処理して結果をJSON Linesに書き込み（Sheetsを使わない）
 """
 
+import argparse
 import os
+import signal
 import sys
+import threading
 import time
 from datetime import datetime
 from dotenv import load_dotenv
 
-from kickstarter_scraper_selenium import KickstarterScraperSelenium
-from openai_client_improved import ImprovedMarketReportGenerator as MarketReportGenerator
+from comparables_index import add_record as add_comparable
+from comparables_index import load_or_build as load_comparables_index
+from comparables_index import save_index as save_comparables_index
+from dedup import DuplicateIndex, refresh_report, row_key
+from priority_scheduler import TimeBudget, prioritize
+from profiling import create_profiler
+from processing_ledger import ProcessingLedger, record_hash
+from project_cache import ProjectCache
+from project_record import STATUS_BLOCKED, STATUS_NOT_FOUND, ProjectRecord
+from prompt_templates import format_amount
+from run_journal import RunJournal
+from sharding import create_lease_store, parse_shard, shard_of
 from sheets_client import GoogleSheetsClient
+from snapshot_store import SnapshotStore
+from targets import dedup_index_path, load_targets
+from tracing import get_tracer
 
+COMMANDS = ('scan', 'scrape', 'report', 'write', 'run', 'batch', 'export')
 
-def main():
-    """メイン処理"""
-    print("=" * 60)
-    print("Kickstarter Market Analyzer")
-    print("=" * 60)
-    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
 
-    # 環境変数読み込み
+def create_scraper():
+    """Kickstarterスクレイパーを作成（Selenium は使用する時点で読み込む）"""
+    from kickstarter_scraper_selenium import KickstarterScraperSelenium
+
+    print("  - Initializing Kickstarter scraper (Selenium headless mode)...")
+    scraper = KickstarterScraperSelenium(headless=True)
+    print("  ✓ Kickstarter scraper initialized")
+    return scraper
+
+
+def create_generator(settings):
+    """レポート生成クライアントを作成（OpenAI SDK は使用する時点で読み込む）"""
+    from openai_client_improved import ImprovedMarketReportGenerator as MarketReportGenerator
+
+    print(f"  - Initializing OpenAI client (model: {settings['openai_model']})...")
+    generator = MarketReportGenerator(api_key=settings['openai_api_key'], model=settings['openai_model'])
+    print("  ✓ OpenAI client initialized")
+    return generator
+
+
+def create_sheets_client(spreadsheet_id, sheet_name):
+    """Google Sheetsクライアントを作成"""
+    return GoogleSheetsClient(spreadsheet_id, sheet_name)
+
+
+def _reuse_report(ctx, state, row_data, duplicate, command='run'):
+    """
+    重複と判定された行に既存レポートを再利用（URLのみ差し替え）
+
+    run では直接書き込み、report では実行ジャーナルに保存して write で書き込む
+    （scrape では何もしない。スクレイピングも不要）
+    """
+    counts = state.counts
+    counts['reused'] += 1
+    counts['success'] += 1
+    if command == 'scrape':
+        return
+
+    url = row_data['url']
+    source_url = duplicate.get('source_url', duplicate['url'])
+    japanese_report = refresh_report(duplicate['japanese_report'], source_url, url)
+    english_report = refresh_report(duplicate.get('english_report'), source_url, url)
+    template_ids = duplicate.get('template_ids') or {}
+
+    if command == 'report':
+        state.journal.record(row_data, 'jp_generated',
+                             {'report': japanese_report, 'template_id': template_ids.get('ja'), 'reused': True})
+        state.journal.record(row_data, 'en_generated',
+                             {'report': english_report, 'template_id': template_ids.get('en'), 'reused': True})
+        _record_stage(ctx.ledger, state.sheets_client, row_data, 'en_generated')
+        return
+
+    state.sheets_client.write_report(row_data['row_number'], japanese_report, english_report)
+    _record_stage(ctx.ledger, state.sheets_client, row_data, 'written', 'written', template_ids=template_ids)
+
+
+def _write_saved_reports(ctx, state, row_data):
+    """write コマンド：実行ジャーナルに保存済みのレポートをシートに書き込み"""
+    journal, counts = state.journal, state.counts
+    saved_ja = journal.get(row_data, 'jp_generated')
+    saved_en = journal.get(row_data, 'en_generated')
+    if not saved_ja or (not saved_en and not ctx.settings['debug_mode']):
+        print("  ⏭️  No generated report in the run journal - run the report command first\n")
+        counts['skipped'] += 1
+        return
+
+    english_report = saved_en['report'] if saved_en else None
+    template_ids = {'ja': saved_ja['template_id']}
+    if saved_en:
+        template_ids['en'] = saved_en['template_id']
+    print(f"  Queueing row {row_data['row_number']} for batch write")
+    state.sheets_client.write_report(row_data['row_number'], saved_ja['report'], english_report)
+    _record_stage(ctx.ledger, state.sheets_client, row_data, 'written', 'written', template_ids=template_ids)
+    journal.record(row_data, 'written')
+
+    scraped = journal.get(row_data, 'scraped')
+    if state.dedup_index and scraped and not saved_ja.get('reused'):
+        state.dedup_index.add(
+            row_data['url'],
+            scraped['product_name'],
+            scraped['description'],
+            saved_ja['report'],
+            english_report,
+            template_ids,
+            source_row=_row_key(state, row_data)
+        )
+        state.dedup_index.save_if_due()
+    counts['success'] += 1
+
+
+def _row_key(state, row_data):
+    """重複検出インデックスに記録する行のキー"""
+    return row_key(state.sheets_client.spreadsheet_id, state.sheets_client.sheet_name, row_data['row_number'])
+
+
+def _record_stage(ledger, sheets_client, row_data, stage, status='in_progress', **fields):
+    """処理台帳に段階を記録（台帳が無効の場合は何もしない）"""
+    if ledger:
+        ledger.record_stage(sheets_client.spreadsheet_id, sheets_client.sheet_name,
+                            row_data, stage, status, **fields)
+
+
+class TargetState:
+    """処理対象のシート1つ分のクライアント・ジャーナル・リース・集計"""
+
+    def __init__(self, target, sheets_client):
+        """
+        Args:
+            target (AnalysisTarget): 処理対象の定義
+            sheets_client (GoogleSheetsClient): このシートのSheetsクライアント
+        """
+        self.target = target
+        self.name = target.name
+        self.business_context = target.business_context
+        self.sheets_client = sheets_client
+        self.journal = None
+        self.lease_store = None
+        self.claimed_leases = []
+        self.dedup_index = None
+        self.counts = _new_counts()
+
+
+class AnalyzerContext:
+    """
+    実行中に共有する設定・クライアント・ストア一式（watchモードではサイクル間で再利用）
+
+    ブラウザ（スクレイパー）・OpenAIクライアント・Sheets APIのクォータ・台帳・キャッシュは
+    すべての処理対象で共有し、Sheetsクライアントとジャーナルはシートごとに持つ
+    """
+
+    def __init__(self, settings, targets, scraper=None, generator=None):
+        self.settings = settings
+        self.targets = targets
+        self._scraper = scraper
+        self._generator = generator
+        self.ledger = ProcessingLedger() if settings['ledger_enabled'] else None
+        self.time_budget = None
+        self.shard = (0, 1)
+        self._stores_loaded = False
+        self.project_cache = None
+        self.comparables_index = None
+        self.snapshot_store = None
+        self.category_analytics = None
+
+    @property
+    def scraper(self):
+        """スクレイパー（最初にスクレイピングする行で作成）"""
+        if self._scraper is None:
+            self._scraper = create_scraper()
+        return self._scraper
+
+    @property
+    def generator(self):
+        """レポート生成クライアント（最初にレポートを生成する行で作成）"""
+        if self._generator is None:
+            self._generator = create_generator(self.settings)
+        return self._generator
+
+    def load_stores(self, command='run'):
+        """重複検出・類似キャンペーン検索のストアを読み込み（処理対象がある場合のみ）"""
+        if not self._stores_loaded:
+            # 重複検出インデックス（過去の実行分を含む）。レポートはビジネスコンテキストに依存するため
+            # 同じコンテキストのシート同士でのみ共有する
+            if self.settings['dedup_enabled']:
+                indexes = {}
+                for state in self.targets:
+                    path = dedup_index_path(state.business_context, self.settings['business_context'])
+                    if path not in indexes:
+                        indexes[path] = DuplicateIndex(path)
+                    state.dedup_index = indexes[path]
+            self.project_cache = ProjectCache()
+            # 支援額の推移（初回はキャッシュに残っている1つ前と最新の記録から取り込む）
+            if self.settings['snapshots_enabled']:
+                self.snapshot_store = SnapshotStore()
+                backfilled = self.snapshot_store.backfill(self.project_cache)
+                if backfilled:
+                    print(f"📈 Snapshot store: backfilled {backfilled:,} snapshots from the project cache\n")
+            self._stores_loaded = True
+
+        # 類似キャンペーン検索インデックス（プロセスごとに1回読み込み、以降にスクレイピングした分は
+        # store_project で追加する。レポートを生成しないコマンドでは不要）
+        if self.settings['comparables_top_k'] > 0 and command in ('report', 'run', 'batch') \
+                and self.comparables_index is None:
+            self.comparables_index = load_comparables_index(self.project_cache)
+            print(f"📚 Comparables index: {len(self.comparables_index.docs):,} projects\n")
+        if self.settings['category_stats_enabled'] and command in ('report', 'run', 'batch') \
+                and self.category_analytics is None:
+            # NumPyはレポートを生成するコマンドでのみ読み込む
+            from category_stats import CategoryAnalytics
+            self.category_analytics = CategoryAnalytics(self.project_cache)
+
+    def store_project(self, record):
+        """スクレイピングしたプロジェクトをキャッシュ・スナップショット・類似キャンペーン検索インデックスに追加"""
+        self.project_cache.put(record)
+        if self.snapshot_store is not None:
+            self.snapshot_store.record(record)
+        if self.comparables_index is not None:
+            self.comparables_index = add_comparable(self.comparables_index, self.project_cache, record)
+
+    def close(self):
+        """Seleniumドライバー・台帳・リースをクリーンアップ"""
+        if self.comparables_index is not None:
+            save_comparables_index(self.comparables_index, self.project_cache)
+        for dedup_index in {id(s.dedup_index): s.dedup_index for s in self.targets if s.dedup_index}.values():
+            dedup_index.save()
+        if self._scraper is not None:
+            self._scraper.close()
+        if self.ledger:
+            self.ledger.close()
+        if self.snapshot_store is not None:
+            self.snapshot_store.close()
+        for lease_store in {id(s.lease_store): s.lease_store for s in self.targets if s.lease_store}.values():
+            lease_store.close()
+
+
+def _load_settings(targets_file=None, command='run'):
+    """
+    環境変数から設定を読み込み（必須項目が無い場合は終了）
+
+    Args:
+        targets_file (str, optional): 処理対象リストのJSONファイル（Noneの場合はSHEETS_TARGETS）
+        command (str): サブコマンド（OPENAI_API_KEY は report / run / batch でのみ必須、
+            batch ではスプレッドシートの指定は不要）
+    """
     load_dotenv()
 
+    settings = {
+        'debug_mode': os.getenv('DEBUG_MODE', 'false').lower() == 'true',
+        'spreadsheet_id': os.getenv('SPREADSHEET_ID'),
+        'sheet_name': os.getenv('SHEET_NAME', 'kickstarter'),
+        'openai_api_key': os.getenv('OPENAI_API_KEY'),
+        'openai_model': os.getenv('OPENAI_MODEL', 'gpt-4o-mini'),
+        'business_context': os.getenv('BUSINESS_CONTEXT', ''),
+        'dedup_enabled': os.getenv('DEDUP_MODE', 'reuse').lower() != 'off',
+        'comparables_top_k': int(os.getenv('COMPARABLES_TOP_K', '5')),
+        'snapshots_enabled': os.getenv('SNAPSHOT_MODE', 'on').lower() != 'off',
+        'category_stats_enabled': os.getenv('CATEGORY_STATS_MODE', 'on').lower() != 'off',
+        # Bot検出でスクレイピングできない行：cache（キャッシュ済みの情報で生成）/ skip（生成せず次回に回す）
+        'blocked_fallback': os.getenv('BLOCKED_FALLBACK', 'cache').lower(),
+        'ledger_enabled': os.getenv('LEDGER_MODE', 'on').lower() != 'off',
+        'schedule_order': os.getenv('SCHEDULE_ORDER', 'priority').lower(),
+        'shard_steal': os.getenv('SHARD_STEAL', 'on').lower() != 'off',
+    }
+
     # デバッグモード確認
-    debug_mode = os.getenv('DEBUG_MODE', 'false').lower() == 'true'
-    if debug_mode:
+    if settings['debug_mode']:
         print("⚠️  DEBUG MODE: ON\n")
 
-    # 設定確認
-    spreadsheet_id = os.getenv('SPREADSHEET_ID')
-    sheet_name = os.getenv('SHEET_NAME', 'kickstarter')
-    openai_api_key = os.getenv('OPENAI_API_KEY')
-    openai_model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
-    business_context = os.getenv('BUSINESS_CONTEXT', '')
+    if command == 'batch':
+        # 行の処理状況は出力ファイルで管理する（シートの行に対応する処理台帳は使わない）
+        settings['targets'] = []
+        settings['ledger_enabled'] = False
+        if not settings['openai_api_key']:
+            print("❌ Error: OPENAI_API_KEY not set in .env")
+            sys.exit(1)
+        return settings
+
+    try:
+        settings['targets'] = load_targets(targets_file, settings['spreadsheet_id'], settings['sheet_name'],
+                                           settings['business_context'])
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: could not load targets: {e}")
+        sys.exit(1)
 
-    if not spreadsheet_id:
-        print("❌ Error: SPREADSHEET_ID not set in .env")
+    if not settings['targets']:
+        print("❌ Error: SPREADSHEET_ID (or SHEETS_TARGETS) not set in .env")
         sys.exit(1)
 
-    if not openai_api_key:
+    if not settings['openai_api_key'] and command in ('report', 'run'):
         print("❌ Error: OPENAI_API_KEY not set in .env")
         sys.exit(1)
 
-    # クライアント初期化
-    print("Initializing clients...")
-    try:
-        print("  - Initializing Kickstarter scraper (Selenium headless mode)...")
-        scraper = KickstarterScraperSelenium(headless=True)
-        print("  ✓ Kickstarter scraper initialized")
+    return settings
+
 
-        print(f"  - Initializing OpenAI client (model: {openai_model})...")
-        generator = MarketReportGenerator(api_key=openai_api_key, model=openai_model)
-        print("  ✓ OpenAI client initialized")
+def _init_context(settings):
+    """
+    Sheetsクライアントを初期化（失敗した場合は終了）
 
-        print(f"  - Initializing Google Sheets client...")
-        print(f"    Spreadsheet ID: {spreadsheet_id}")
-        print(f"    Sheet Name: {sheet_name}")
-        sheets_client = GoogleSheetsClient(spreadsheet_id, sheet_name)
-        print("  ✓ Google Sheets client initialized")
+    スクレイパー・OpenAIクライアントは処理する行が見つかった時点で作成するため、
+    未処理の行が無い実行ではブラウザ・OpenAI SDKを読み込まない
+    """
+    print("Initializing clients...")
+    try:
+        # シートごとにクライアントを作成（認証情報・Sheets APIのクォータはプロセス内で共有）
+        targets = []
+        for target in settings['targets']:
+            print(f"  - Initializing Google Sheets client...")
+            print(f"    Spreadsheet ID: {target.spreadsheet_id}")
+            print(f"    Sheet Name: {target.sheet_name}")
+            sheets_client = create_sheets_client(target.spreadsheet_id, target.sheet_name)
+            print("  ✓ Google Sheets client initialized")
+            targets.append(TargetState(target, sheets_client))
 
         print("✓ All clients initialized successfully\n")
 
-        if business_context:
-            print(f"📝 Business Context loaded ({len(business_context)} characters)")
-            print(f"   {business_context[:100]}...\n")
+        for state in targets:
+            business_context = state.business_context
+            if business_context:
+                label = f" for {state.name}" if len(targets) > 1 else ''
+                print(f"📝 Business Context loaded{label} ({len(business_context)} characters)")
+                print(f"   {business_context[:100]}...\n")
     except Exception as e:
         print(f"❌ Error initializing clients: {e}")
         import traceback
         traceback.print_exc()
         sys.exit(1)
 
+    return AnalyzerContext(settings, targets)
+
+
+def _new_counts():
+    return {'rows': 0, 'success': 0, 'errors': 0, 'reused': 0, 'resumed_stages': 0, 'leased_elsewhere': 0,
+            'skipped': 0, 'deferred': 0, 'cached_fallback': 0, 'openai_calls': 0, 'seconds': 0.0}
+
+
+def _claim_row(state, row_data):
+    """
+    行のリースを取得し、スキャン後に他のワーカーが書き込んでいないか確認
+
+    Returns:
+        bool: この行を処理してよい場合True
+    """
+    sheets_client = state.sheets_client
+    key = f"{sheets_client.spreadsheet_id}/{sheets_client.sheet_name}/{row_data['input_hash']}"
+    if not state.lease_store.claim(key, row_data['row_number']):
+        print(f"  🔒 Row {row_data['row_number']} is leased by another worker - skipping\n")
+        return False
+    if sheets_client.read_k_length(row_data['row_number']) != row_data['k_length']:
+        # 別のワーカーが処理・書き込み済み（リース解放後にこちらが取得した場合）
+        print(f"  🔒 Row {row_data['row_number']} was written by another worker - skipping\n")
+        state.lease_store.release(key, row_data['row_number'])
+        return False
+    state.claimed_leases.append((key, row_data['row_number']))
+    return True
+
+
+def _blocked_fallback(ctx, state, row_data, blocked):
+    """
+    Bot検出でスクレイピングできなかった行の代替データ
+
+    BLOCKED_FALLBACK=cache の場合はプロジェクトキャッシュの最新の情報を返す。キャッシュに無い場合
+    （または BLOCKED_FALLBACK=skip）はレポートを生成せず、台帳をエラーにして次回の実行で再処理する
+
+    Returns:
+        ProjectRecord or None: キャッシュ済みのプロジェクト情報（行を後回しにする場合はNone）
+    """
+    cached = None
+    if ctx.settings['blocked_fallback'] == 'cache' and ctx.project_cache is not None:
+        cached = ctx.project_cache.get(row_data['url'])
+    if cached is None:
+        print(f"  🚧 {blocked.error} - deferring row {row_data['row_number']} (no LLM calls)\n")
+        state.counts['deferred'] += 1
+        _record_stage(ctx.ledger, state.sheets_client, row_data, None, 'error', error=blocked.error)
+        return None
+    age_hours = (time.time() - cached.fetched_at) / 3600
+    print(f"  🚧 {blocked.error} - using cached project data ({age_hours:.1f}h old)")
+    print(f"    Product: {cached.product_name}")
+    state.counts['cached_fallback'] += 1
+    return cached
+
+
+def _process_row(ctx, state, row_data, command='run'):
+    """
+    1行分の処理（スクレイピング → 日本語・英語レポート生成 → 書き込み）
+
+    command が 'scrape' / 'report' / 'write' の場合はその段階のみを実行し、
+    成果物は実行ジャーナルで次のコマンドに引き継ぐ
+    """
+    settings = ctx.settings
+    sheets_client, ledger, journal = state.sheets_client, ctx.ledger, state.journal
+    dedup_index, counts = state.dedup_index, state.counts
+    business_context = state.business_context
+
+    row_number = row_data['row_number']
+    url = row_data['url']
+    product_name = row_data['product_name']
+    maker_name = row_data['maker_name']
+    creator_name = row_data['creator_name']
+
+    try:
+        if command == 'write':
+            _write_saved_reports(ctx, state, row_data)
+            return
+
+        # 同一URL（クエリ違い等）のレポートが既にあれば再利用
+        # （K列を消した・入力を変えた等で再処理する行は再生成し、同じ行で生成したレポートは使わない）
+        duplicate = None
+        if dedup_index and not row_data.get('requeued'):
+            duplicate = dedup_index.find_by_url(url, exclude_row=_row_key(state, row_data))
+        if duplicate:
+            print(f"  ♻️  Duplicate of {duplicate['url']} - reusing existing report")
+            _reuse_report(ctx, state, row_data, duplicate, command)
+            return
+
+        # Step 1: Kickstarterからデータ取得
+        print("  [1/4] Scraping Kickstarter...")
+        print(f"    URL: {url}")
+        from_cache = False
+        scraped = journal.get(row_data, 'scraped')
+        if scraped:
+            kickstarter_data = ProjectRecord.from_dict(scraped)
+            print("    ⏯️  Using scraped data saved in the run journal")
+            counts['resumed_stages'] += 1
+        elif command == 'report':
+            print("    ⏭️  Not scraped yet - run the scrape command first\n")
+            counts['skipped'] += 1
+            return
+        else:
+            kickstarter_data = ctx.scraper.fetch_project_data(url)
+            if kickstarter_data.status == STATUS_BLOCKED:
+                # Bot検出中：キャッシュ済みの情報で続行し、無ければレポートを生成せず次回の実行に回す
+                kickstarter_data = _blocked_fallback(ctx, state, row_data, kickstarter_data)
+                if kickstarter_data is None:
+                    return
+                from_cache = True
+            elif kickstarter_data.status == STATUS_NOT_FOUND:
+                # 存在しないプロジェクトはレポートを生成しない
+                print(f"  ❌ {kickstarter_data.error} - skipping report generation\n")
+                counts['errors'] += 1
+                _record_stage(ledger, sheets_client, row_data, None, 'error', error=kickstarter_data.error)
+                if command != 'scrape':
+                    sheets_client.write_report(row_number, f"エラー: {kickstarter_data.error}")
+                return
+            if kickstarter_data.ok:
+                journal.record(row_data, 'scraped', kickstarter_data.to_dict())
+
+        if not kickstarter_data.ok:
+            print(f"  ⚠️  Warning: {kickstarter_data.error}")
+            # エラーでも続行（取得できたデータで生成）
+        elif not from_cache:
+            print(f"    ✓ Successfully scraped project data")
+            print(f"    Product: {kickstarter_data.product_name}")
+            print(f"    Pledged: {format_amount(kickstarter_data.funding_total, kickstarter_data.currency)}")
+            print(f"    Backers: {kickstarter_data.backers:,}")
+            ctx.store_project(kickstarter_data)
+        _record_stage(ledger, sheets_client, row_data, 'scraped',
+                      scrape_hash=record_hash(kickstarter_data))
+        if command == 'scrape':
+            counts['success' if kickstarter_data.ok else 'errors'] += 1
+            print(f"  ✓ Row {row_number} scraped\n")
+            return
+
+        # 商品名が空の場合、スクレイピング結果を使用
+        if not product_name:
+            product_name = kickstarter_data.product_name
+
+        # 内容がほぼ同一の製品（再ローンチ等）のレポートがあれば再利用
+        if dedup_index and kickstarter_data.ok and not row_data.get('requeued'):
+            duplicate, similarity = dedup_index.find_similar(
+                kickstarter_data.product_name,
+                kickstarter_data.description,
+                exclude_row=_row_key(state, row_data)
+            )
+            if duplicate:
+                print(f"  ♻️  Near-duplicate of {duplicate['url']} "
+                      f"(similarity {similarity:.2f}) - reusing existing report")
+                _reuse_report(ctx, state, row_data, duplicate, command)
+                return
+
+        # 類似キャンペーンの実績（②③の根拠としてプロンプトに追加）
+        comparables = []
+        if ctx.comparables_index and kickstarter_data.ok:
+            comparables = ctx.comparables_index.query(kickstarter_data, k=settings['comparables_top_k'])
+            print(f"    Comparables: {len(comparables)} similar campaigns")
+
+        # 支援額の推移（2回以上取得して値が変化したプロジェクトのみ）
+        history = None
+        if ctx.snapshot_store is not None and kickstarter_data.ok:
+            history = ctx.snapshot_store.momentum(url)
+            if history:
+                print(f"    History: {history['snapshots']} snapshots")
+
+        # カテゴリ内での位置づけ（スクレイピング済みプロジェクトの分布）
+        category_stats = None
+        if ctx.category_analytics is not None and kickstarter_data.ok:
+            category_stats = ctx.category_analytics.context(kickstarter_data)
+            if category_stats:
+                print(f"    Category stats: {category_stats['projects']:,} projects in {kickstarter_data.category}")
+
+        time.sleep(2)  # レート制限対策
+
+        # Step 2: ChatGPTでレポート生成（日本語）
+        print("  [2/4] Generating Japanese report with ChatGPT...")
+        template_ids = {}
+        saved = journal.get(row_data, 'jp_generated')
+        if saved:
+            japanese_report = saved['report']
+            template_ids['ja'] = saved['template_id']
+            counts['resumed_stages'] += 1
+            print(f"    ⏯️  Using Japanese report saved in the run journal ({len(japanese_report)} characters)")
+        else:
+            print(f"    Model: {settings['openai_model']}")
+            print(f"    Maker: {maker_name or 'メーカー名不明'}")
+            print(f"    Creator: {creator_name or 'クリエーター名不明'}")
+            if business_context:
+                print(f"    Business Context: {len(business_context)} characters")
+            japanese_report = ctx.generator.generate_japanese_report(
+                kickstarter_data,
+                maker_name or 'メーカー名不明',
+                creator_name or 'クリエーター名不明',
+                business_context,
+                comparables,
+                history,
+                category_stats
+            )
+            counts['openai_calls'] += 1
+            template_ids['ja'] = ctx.generator.last_template_ids.get('ja')
+            print(f"    ✓ Japanese report generated ({len(japanese_report)} characters, "
+                  f"template {template_ids['ja']})")
+            if not japanese_report.startswith('エラー'):
+                journal.record(row_data, 'jp_generated',
+                               {'report': japanese_report, 'template_id': template_ids['ja']})
+            time.sleep(2)  # レート制限対策
+        _record_stage(ledger, sheets_client, row_data, 'jp_generated')
+
+        # Step 3: ChatGPTでレポート生成（英語）- オプション
+        english_report = None
+        saved = journal.get(row_data, 'en_generated')
+        if settings['debug_mode']:
+            print("  [3/4] Skipping English report (DEBUG_MODE=true)")
+        elif saved:
+            print("  [3/4] Generating English report with ChatGPT...")
+            english_report = saved['report']
+            template_ids['en'] = saved['template_id']
+            counts['resumed_stages'] += 1
+            print(f"    ⏯️  Using English report saved in the run journal ({len(english_report)} characters)")
+            _record_stage(ledger, sheets_client, row_data, 'en_generated')
+        else:
+            print("  [3/4] Generating English report with ChatGPT...")
+            english_report = ctx.generator.generate_english_report(
+                kickstarter_data,
+                maker_name or 'Unknown Maker',
+                creator_name or 'Unknown Creator',
+                comparables,
+                history,
+                category_stats
+            )
+            counts['openai_calls'] += 1
+            template_ids['en'] = ctx.generator.last_template_ids.get('en')
+            print(f"    ✓ English report generated ({len(english_report)} characters, "
+                  f"template {template_ids['en']})")
+            if not english_report.startswith('Error'):
+                journal.record(row_data, 'en_generated',
+                               {'report': english_report, 'template_id': template_ids['en']})
+            _record_stage(ledger, sheets_client, row_data, 'en_generated')
+            time.sleep(2)
+
+        if command == 'report':
+            # 生成に失敗した行はジャーナルに保存されないため、write では書き込まれない
+            failed = japanese_report.startswith('エラー') or (english_report or '').startswith('Error')
+            counts['errors' if failed else 'success'] += 1
+            print(f"  ✓ Row {row_number} reports saved to the run journal\n" if not failed
+                  else f"  ❌ Report generation failed for row {row_number}\n")
+            return
+
+        # Step 4: Google Sheetsに書き込み
+        print("  [4/4] Writing to spreadsheet...")
+        print(f"    Queueing row {row_number} (K{row_number} and L{row_number}) for batch write")
+        sheets_client.write_report(row_number, japanese_report, english_report)
+        if japanese_report.startswith('エラー'):
+            # 生成に失敗した行は次回の実行で再処理する
+            _record_stage(ledger, sheets_client, row_data, None, 'error', error=japanese_report[:500])
+        else:
+            _record_stage(ledger, sheets_client, row_data, 'written', 'written',
+                          template_ids=template_ids)
+            journal.record(row_data, 'written')
+
+        if dedup_index and kickstarter_data.ok and not japanese_report.startswith('エラー'):
+            dedup_index.add(
+                url,
+                kickstarter_data.product_name,
+                kickstarter_data.description,
+                japanese_report,
+                english_report,
+                template_ids,
+                source_row=_row_key(state, row_data)
+            )
+            dedup_index.save_if_due()
+
+        print(f"  ✓ Row {row_number} completed successfully\n")
+        counts['success'] += 1
+
+    except Exception as e:
+        print(f"  ❌ Error processing row {row_number}: {e}\n")
+        counts['errors'] += 1
+        _record_stage(ledger, sheets_client, row_data, None, 'error', error=str(e)[:500])
+
+        # エラーメッセージをスプレッドシートに書き込み
+        try:
+            error_message = f"エラー: {str(e)}"
+            sheets_client.write_report(row_number, error_message)
+        except:
+            pass
+
+
+def _interleave(queues):
+    """各シートの行を1行ずつ交互に並べる（1つのシートが共有の時間・クォータを占有しないように）"""
+    merged = []
+    for i in range(max((len(rows) for _, rows in queues), default=0)):
+        merged.extend((state, rows[i]) for state, rows in queues if i < len(rows))
+    return merged
+
+
+def _fetch_rows(ctx, state, resume=None):
+    """シートの未処理の行を取得し、行がある場合はジャーナルを開始（または再開）"""
+    label = f" from {state.name}" if len(ctx.targets) > 1 else ''
+    print(f"Fetching unprocessed rows{label} from spreadsheet...")
+    rows = state.sheets_client.get_unprocessed_rows(ctx.ledger)
+    print(f"✓ Found {len(rows)} unprocessed rows\n")
+    if not rows:
+        return rows
+
+    # 実行ジャーナル（中間成果物を行ごとに永続化し、--resume で再利用）
+    sheets_client = state.sheets_client
+    if resume:
+        state.journal = RunJournal.resume(sheets_client.spreadsheet_id, sheets_client.sheet_name, resume)
+        print(f"⏯️  Resuming run {state.journal.run_id} ({len(state.journal.artifacts)} rows with saved artifacts)\n")
+    else:
+        state.journal = RunJournal.start(sheets_client.spreadsheet_id, sheets_client.sheet_name)
+    return rows
+
+
+def _order_rows(ctx, state, rows):
+    """優先度順に並べ替え、シャーディング時は担当分を先にする"""
+    label = f" ({state.name})" if len(ctx.targets) > 1 else ''
+
+    # 終了が近いキャンペーン・伸びている案件・クライアント指定の優先度が高い行から処理
+    if ctx.settings['schedule_order'] == 'priority':
+        rows = prioritize(rows, ctx.project_cache)
+        preview = ', '.join(f"row {r['row_number']} ({r['priority_score']:g})" for r in rows[:5])
+        print(f"📋 Priority order{label}: {preview}{' ...' if len(rows) > 5 else ''}\n")
+
+    # シャーディング：自分の担当分を先に処理し、SHARD_STEAL=on なら他のシャードの残りも処理
+    shard_index, shard_count = ctx.shard
+    if shard_count > 1:
+        own = [r for r in rows if shard_of(r['url'], shard_count) == shard_index]
+        others = [r for r in rows if shard_of(r['url'], shard_count) != shard_index]
+        print(f"🧩 Shard {shard_index}/{shard_count}{label}: {len(own)} own rows"
+              f"{f', then up to {len(others)} rows from other shards' if ctx.settings['shard_steal'] else ''}\n")
+        rows = own + (others if ctx.settings['shard_steal'] else [])
+    return rows
+
+
+def _finish_target(ctx, state, completed):
+    """書き込みをフラッシュし、リースを解放してジャーナルを終了"""
+    sheets_client = state.sheets_client
+    failures_before = len(sheets_client.writer.failures)
+    sheets_client.flush()
+    if ctx.ledger:
+        # 書き込みに失敗した行は台帳上も未完了に戻す
+        for failed_row, error in sheets_client.writer.failures.items():
+            ctx.ledger.mark_write_failed(sheets_client.spreadsheet_id, sheets_client.sheet_name,
+                                         failed_row, str(error)[:500])
+    # 書き込みをフラッシュした後でリースを解放（未反映のまま他のワーカーに渡さない）
+    if state.lease_store:
+        for key, row_number in state.claimed_leases:
+            state.lease_store.release(key, row_number)
+    state.claimed_leases = []
+    # 重複検出インデックスは行ごとではなくサイクルの終わりに保存する（全レポートを含むため）
+    if state.dedup_index:
+        state.dedup_index.save()
+    if completed and len(sheets_client.writer.failures) == failures_before:
+        state.journal.finish()
+    else:
+        # 中断・書き込み失敗時はジャーナルを残し、次回 --resume で再利用する
+        state.journal.close()
+        print(f"⏯️  Run journal kept for resume: {state.journal.path}")
+
+
+def _run_cycle(ctx, resume=None, stop_event=None, states=None, command='run'):
+    """
+    未処理の行を取得して処理（通常実行では1回、watchモードでは変更検出のたびに実行）
+
+    Args:
+        ctx (AnalyzerContext): クライアント・ストア一式
+        resume (str, optional): 再開する実行ID
+        stop_event (threading.Event, optional): セットされたら現在の行の完了後に中断
+        states (list, optional): 処理するシート（Noneの場合はすべての処理対象）
+        command (str): 'run'、または段階ごとのコマンド 'scrape' / 'report' / 'write'
+
+    Returns:
+        int: 処理対象の行数
+    """
+    states = states or ctx.targets
+    if command != 'run':
+        # 段階ごとのコマンドは前のコマンドのジャーナルを引き継ぐ
+        resume = resume or 'latest'
+
     # 未処理の行を取得
-    print("Fetching unprocessed rows from spreadsheet...")
-    unprocessed_rows = sheets_client.get_unprocessed_rows()
-    print(f"✓ Found {len(unprocessed_rows)} unprocessed rows\n")
+    queues = []
+    for state in states:
+        rows = _fetch_rows(ctx, state, resume)
+        if rows:
+            queues.append((state, rows))
 
-    if not unprocessed_rows:
-        print("No unprocessed rows found. Exiting.")
-        return
+    if not queues:
+        return 0
 
-    # 各行を処理
-    success_count = 0
-    error_count = 0
+    ctx.load_stores(command)
+    queues = [(state, _order_rows(ctx, state, rows)) for state, rows in queues]
+    # 複数のシートはラウンドロビンで処理（時間の上限で打ち切られてもすべてのシートが進む）
+    work = _interleave(queues)
 
+    completed = False
+    skipped_before = {state.name: state.counts['skipped'] for state, _ in queues}
     try:
-        for i, row_data in enumerate(unprocessed_rows, 1):
-            row_number = row_data['row_number']
-            url = row_data['url']
-            product_name = row_data['product_name']
-            maker_name = row_data['maker_name']
-            creator_name = row_data['creator_name']
-
-            print(f"[{i}/{len(unprocessed_rows)}] Processing row {row_number}")
-            print(f"  URL: {url}")
-            print(f"  Product: {product_name}")
-            print(f"  Maker: {maker_name}\n")
-
-            try:
-                # Step 1: Kickstarterからデータ取得
-                print("  [1/4] Scraping Kickstarter...")
-                print(f"    URL: {url}")
-                kickstarter_data = scraper.fetch_project_data(url)
-
-                if 'error' in kickstarter_data:
-                    print(f"  ⚠️  Warning: {kickstarter_data['error']}")
-                    # エラーでも続行（取得できたデータで生成）
-                else:
-                    print(f"    ✓ Successfully scraped project data")
-                    print(f"    Product: {kickstarter_data.get('product_name', 'N/A')}")
-                    print(f"    Pledged: {kickstarter_data.get('pledged', 'N/A')}")
-                    print(f"    Backers: {kickstarter_data.get('backers', 'N/A')}")
-
-                # 商品名が空の場合、スクレイピング結果を使用
-                if not product_name:
-                    product_name = kickstarter_data.get('product_name', '不明')
-
-                time.sleep(2)  # レート制限対策
-
-                # Step 2: ChatGPTでレポート生成（日本語）
-                print("  [2/4] Generating Japanese report with ChatGPT...")
-                print(f"    Model: {openai_model}")
-                print(f"    Maker: {maker_name or 'メーカー名不明'}")
-                print(f"    Creator: {creator_name or 'クリエーター名不明'}")
-                if business_context:
-                    print(f"    Business Context: {len(business_context)} characters")
-                japanese_report = generator.generate_japanese_report(
-                    kickstarter_data,
-                    maker_name or 'メーカー名不明',
-                    creator_name or 'クリエーター名不明',
-                    business_context
-                )
-                print(f"    ✓ Japanese report generated ({len(japanese_report)} characters)")
-
-                time.sleep(2)  # レート制限対策
-
-                # Step 3: ChatGPTでレポート生成（英語）- オプション
-                english_report = None
-                if not debug_mode:
-                    print("  [3/4] Generating English report with ChatGPT...")
-                    english_report = generator.generate_english_report(
-                        kickstarter_data,
-                        maker_name or 'Unknown Maker',
-                        creator_name or 'Unknown Creator'
-                    )
-                    print(f"    ✓ English report generated ({len(english_report)} characters)")
-                    time.sleep(2)
-                else:
-                    print("  [3/4] Skipping English report (DEBUG_MODE=true)")
-
-                # Step 4: Google Sheetsに書き込み
-                print("  [4/4] Writing to spreadsheet...")
-                print(f"    Writing to row {row_number} (K{row_number} and L{row_number})")
-                sheets_client.write_report(row_number, japanese_report, english_report)
-
-                print(f"  ✓ Row {row_number} completed successfully\n")
-                success_count += 1
-
-            except Exception as e:
-                print(f"  ❌ Error processing row {row_number}: {e}\n")
-                error_count += 1
-
-                # エラーメッセージをスプレッドシートに書き込み
-                try:
-                    error_message = f"エラー: {str(e)}"
-                    sheets_client.write_report(row_number, error_message)
-                except:
-                    pass
+        for i, (state, row_data) in enumerate(work, 1):
+            if stop_event is not None and stop_event.is_set():
+                print("⏹️  Shutdown requested - stopping before the next row")
+                break
+            if ctx.time_budget and not ctx.time_budget.allows_next_row():
+                print(f"⏱️  Time budget exhausted - {len(work) - i + 1} rows left for the next run")
+                if stop_event is not None:
+                    stop_event.set()
+                break
+            row_started = time.monotonic()
+            if state.lease_store and not _claim_row(state, row_data):
+                state.counts['leased_elsewhere'] += 1
+                continue
+
+            label = f" of {state.name}" if len(ctx.targets) > 1 else ''
+            print(f"[{i}/{len(work)}] Processing row {row_data['row_number']}{label}")
+            print(f"  URL: {row_data['url']}")
+            print(f"  Product: {row_data['product_name']}")
+            print(f"  Maker: {row_data['maker_name']}\n")
 
-            # 次の行の前に少し待機
-            if i < len(unprocessed_rows):
+            # 行ごとの構造化ログ（段階ごとの所要時間）をトレースログに書き込む
+            before = dict(state.counts)
+            with get_tracer().row(target=state.name, row=row_data['row_number'], url=row_data['url']) as record:
+                _process_row(ctx, state, row_data, command)
+                record['status'] = ('error' if state.counts['errors'] > before['errors']
+                                    else 'skipped' if state.counts['skipped'] > before['skipped']
+                                    else 'reused' if state.counts['reused'] > before['reused'] else 'success')
+                record['resumed_stages'] = state.counts['resumed_stages'] - before['resumed_stages']
+            state.counts['rows'] += 1
+
+            # 次の行の前に少し待機（書き込みのみの場合は不要）
+            if i < len(work) and command != 'write':
                 time.sleep(3)
+            # バッファが SHEETS_WRITE_MAX_DELAY を超えたシートは行の合間に書き込む（Sheetsの呼び出しは
+            # 常にこのスレッドから行う）
+            for queued_state, _ in queues:
+                queued_state.sheets_client.flush_if_due()
+            elapsed = time.monotonic() - row_started
+            state.counts['seconds'] += elapsed
+            if ctx.time_budget:
+                ctx.time_budget.record_row(elapsed)
+        else:
+            completed = True
+
+    finally:
+        for state, _ in queues:
+            # scrape / report の後は次のコマンドのためにジャーナルを残す。write で前の段階が済んでいない行を
+            # 飛ばした場合も残す
+            finished = (completed and command in ('run', 'write')
+                        and state.counts['skipped'] == skipped_before[state.name])
+            _finish_target(ctx, state, finished)
+
+    return len(work)
+
+
+def _total_counts(ctx):
+    totals = _new_counts()
+    for state in ctx.targets:
+        for key, value in state.counts.items():
+            totals[key] += value
+    return totals
+
+
+def _breaker_summary(ctx):
+    """サーキットブレーカーが開いた場合の集計行（スクレイピングしていない・開いていない場合はNone）"""
+    if ctx._scraper is None:
+        return None
+    stats = ctx._scraper.breaker.stats()
+    if not stats['trips']:
+        return None
+    retry = f", retry in {stats['retry_in']:.0f}s" if stats['retry_in'] else ''
+    return (f"Scrape circuit breaker: {stats['state']}, opened {stats['trips']} times, "
+            f"{stats['rejected']} pages skipped{retry}")
+
+
+def _print_summary(ctx, pool_stats):
+    counts = _total_counts(ctx)
+    print("=" * 60)
+    print("Summary")
+    print("=" * 60)
+    if len(ctx.targets) > 1:
+        # シートごとの集計（OpenAIはレポート生成の呼び出し回数、Sheetsはリクエスト数）
+        width = max(len(s.name) for s in ctx.targets)
+        print(f"{'Target':<{width}}  {'Rows':>5} {'OK':>5} {'Err':>5} {'Reused':>6} "
+              f"{'OpenAI':>6} {'Reads':>6} {'Writes':>6} {'Time':>8}")
+        for state in ctx.targets:
+            c, client = state.counts, state.sheets_client
+            writes = client.api_requests['write'] + client.writer.requests
+            print(f"{state.name:<{width}}  {c['rows']:>5} {c['success']:>5} {c['errors']:>5} {c['reused']:>6} "
+                  f"{c['openai_calls']:>6} {client.api_requests['read']:>6} {writes:>6} {c['seconds']:>7.1f}s")
+        print("-" * 60)
+    print(f"Total processed: {counts['rows']}")
+    print(f"Successful: {counts['success']}")
+    print(f"Errors: {counts['errors']}")
+    print(f"Reused (duplicates): {counts['reused']}")
+    if counts['skipped']:
+        print(f"Skipped (previous stage not done yet): {counts['skipped']}")
+    if counts['leased_elsewhere']:
+        print(f"Skipped (leased by other workers): {counts['leased_elsewhere']}")
+    if counts['resumed_stages']:
+        print(f"Stages restored from run journal: {counts['resumed_stages']}")
+    if counts['cached_fallback']:
+        print(f"Generated from cached project data (scraping blocked): {counts['cached_fallback']}")
+    if counts['deferred']:
+        print(f"Deferred (scraping blocked, no cached data): {counts['deferred']}")
+    breaker_line = _breaker_summary(ctx)
+    if breaker_line:
+        print(breaker_line)
+    for state in ctx.targets:
+        failures = state.sheets_client.writer.failures
+        if failures:
+            label = f" in {state.name}" if len(ctx.targets) > 1 else ''
+            print(f"Write failures{label}: {len(failures)} rows "
+                  f"({', '.join(str(r) for r in sorted(failures))})")
+    quota_stats = ctx.targets[0].sheets_client.quota.snapshot()
+    print(f"Sheets API: {quota_stats['read_requests']} reads, {quota_stats['write_requests']} writes, "
+          f"throttled {quota_stats['throttled_seconds']}s, {quota_stats['retries']} retries")
+    if pool_stats:
+        print(f"OpenAI HTTP pool: {pool_stats['requests']} requests, "
+              f"{pool_stats['connections_opened']} connections opened, "
+              f"{pool_stats['connections_reused']} reused, "
+              f"{pool_stats['waited']} waited ({pool_stats['wait_seconds']}s)")
+    stage_table = get_tracer().format_summary()
+    if stage_table:
+        print("\nStage timings (ms):")
+        print(stage_table)
+    print(f"\nCompleted at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+
+
+def _retryable_rows(state, before):
+    """サイクル中に後回しにした行（エラー・Bot検出・書き込み失敗）の数"""
+    errors, deferred, write_failures = before
+    return (state.counts['errors'] - errors + state.counts['deferred'] - deferred
+            + len(state.sheets_client.writer.failures) - write_failures)
+
+
+def _watch(ctx, poll_interval, resume=None, retry_interval=600):
+    """
+    watchモード：クライアントとブラウザを起動したまま、B〜E列のハッシュでシートの変更をポーリングし、
+    変更があったシートのみ未処理の行（新規・編集された行）を処理する。後回しにした行が残ったシートは
+    シートが変わらなくても retry_interval 秒後（サーキットブレーカーが開いている場合は閉じた後）に
+    再処理する。SIGINT/SIGTERMで処理中の行を完了してから終了する
+
+    Args:
+        ctx (AnalyzerContext): クライアント・ストア一式
+        poll_interval (float): ポーリング間隔（秒）
+        resume (str, optional): 最初のサイクルで再開する実行ID
+        retry_interval (float): 後回しにした行を再処理するまでの秒数
+    """
+    stop_event = threading.Event()
+
+    def request_shutdown(signum, frame):
+        if stop_event.is_set():
+            raise KeyboardInterrupt
+        print(f"\n⏹️  Received signal {signum} - finishing the current row, then shutting down "
+              f"(send again to abort)")
+        stop_event.set()
+
+    previous_handlers = {sig: signal.signal(sig, request_shutdown) for sig in (signal.SIGINT, signal.SIGTERM)}
+    if not ctx.ledger:
+        print("⚠️  LEDGER_MODE=off: edited rows with an existing report will not be detected\n")
+
+    names = ', '.join(state.sheets_client.sheet_name for state in ctx.targets)
+    print(f"👀 Watching {names} every {poll_interval:g}s (Ctrl+C to stop)\n")
+    fingerprints = {}
+    # 後回しにした行が残ったシート → 再処理する時刻（time.monotonic）
+    retry_at = {}
+    cycles = 0
+    try:
+        while not stop_event.is_set():
+            changed = {}
+            retrying = []
+            for state in ctx.targets:
+                try:
+                    current = state.sheets_client.inputs_fingerprint()
+                except Exception as e:
+                    print(f"⚠️  Failed to poll {state.name}: {e}")
+                    current = None
+                if current is not None and current != fingerprints.get(state.name):
+                    changed[state.name] = (state, current)
+                elif current is not None and time.monotonic() >= retry_at.get(state.name, float('inf')):
+                    changed[state.name] = (state, current)
+                    retrying.append(state.name)
+
+            if changed:
+                cycles += 1
+                reason = "Retrying deferred rows in" if len(retrying) == len(changed) else "Change detected in"
+                print(f"--- {reason} {', '.join(changed)} "
+                      f"(cycle {cycles}, {datetime.now().strftime('%H:%M:%S')}) ---")
+                before = {name: (state.counts['errors'], state.counts['deferred'],
+                                 len(state.sheets_client.writer.failures))
+                          for name, (state, _) in changed.items()}
+                _run_cycle(ctx, resume if cycles == 1 else None, stop_event, [s for s, _ in changed.values()])
+                # サイクル前に読み取った状態を基準にする（サイクル中のB〜E列の編集は次のポーリングで検出する。
+                # ハッシュはK・L列を含まないため、自分の書き込みでは再検出しない）
+                breaker_wait = ctx._scraper.breaker.retry_in() if ctx._scraper is not None else 0.0
+                for name, (state, current) in changed.items():
+                    fingerprints[name] = current
+                    left = _retryable_rows(state, before[name])
+                    if left:
+                        wait = max(retry_interval, breaker_wait)
+                        retry_at[name] = time.monotonic() + wait
+                        print(f"🔁 {left} rows of {name} left for retry - rechecking in {wait:.0f}s\n")
+                    else:
+                        retry_at.pop(name, None)
+
+            stop_event.wait(poll_interval)
+    finally:
+        for sig, handler in previous_handlers.items():
+            signal.signal(sig, handler)
+
+
+def _scan(ctx):
+    """
+    scan コマンド：未処理の行を処理順に一覧表示（スクレイピング・レポート生成は行わない）
+
+    Returns:
+        int: 未処理の行数
+    """
+    project_cache = ProjectCache()
+    total = 0
+    for state in ctx.targets:
+        rows = state.sheets_client.get_unprocessed_rows(ctx.ledger)
+        if ctx.settings['schedule_order'] == 'priority':
+            rows = prioritize(rows, project_cache)
+        shard_index, shard_count = ctx.shard
+        print(f"\n{state.name}: {len(rows)} unprocessed rows")
+        for row in rows:
+            shard = f"  shard {shard_of(row['url'], shard_count)}" if shard_count > 1 else ''
+            score = f"  priority {row['priority_score']:g}" if 'priority_score' in row else ''
+            print(f"  row {row['row_number']:>5}{score}{shard}  {row['url']}")
+        total += len(rows)
+    print()
+    return total
+
+
+def main(resume=None, watch=False, poll_interval=None, time_budget=None, shard=None, targets=None,
+         profile=None, command='run'):
+    """
+    メイン処理
+
+    Args:
+        resume (str, optional): 再開する実行ID（'latest' の場合は中断された最新の実行）。
+            指定した場合、ジャーナルに記録済みの段階（スクレイピング・レポート生成）を省略する
+        watch (bool): Trueの場合は終了せずにシートの変更をポーリングして処理し続ける
+        poll_interval (float, optional): watchモードのポーリング間隔（秒、Noneの場合はWATCH_POLL_INTERVAL）
+        time_budget (float, optional): 実行時間の上限（分、Noneの場合はRUN_TIME_BUDGET_MINUTES）。
+            上限に達する前に優先度の高い行から処理し、残りは次回に回す（watchモードでは終了する）
+        shard (str, optional): 担当シャード 'I/N'（Noneの場合はSHARD、未指定なら分割しない）
+        targets (str, optional): 処理対象リストのJSONファイル（Noneの場合はSHEETS_TARGETS、
+            未指定なら SPREADSHEET_ID / SHEET_NAME の1シート）
+        profile (str, optional): プロファイラー 'cprofile' / 'sample'（Noneの場合はPROFILE_MODE、
+            PROFILE_STAGES で対象の段階を指定）。トレースログと同じディレクトリに出力する
+        command (str): サブコマンド（'scan' / 'scrape' / 'report' / 'write' / 'run'）
+    """
+    print("=" * 60)
+    print("Kickstarter Market Analyzer")
+    print("=" * 60)
+    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    # 環境変数読み込み・設定確認
+    settings = _load_settings(targets, command)
+
+    # 段階ごとの所要時間のトレース（logs/analyzer-<実行ID>.log）
+    tracer = get_tracer()
+    profiler = create_profiler(profile)
+    tracer.start_run(profiler=profiler)
+    if tracer.path:
+        print(f"📈 Trace log: {tracer.path}\n")
+    if profiler:
+        print(f"🔬 Profiling ({profiler.mode}): {', '.join(sorted(profiler.stages)) or 'whole run'}\n")
+
+    # クライアント初期化
+    ctx = _init_context(settings)
+    ctx.shard = parse_shard(shard or os.getenv('SHARD') or '0/1')
+    if command == 'scan':
+        try:
+            _scan(ctx)
+        finally:
+            ctx.close()
+            tracer.finish()
+        return
+
+    lease_kind = os.getenv('LEASE_STORE', 'sqlite' if ctx.shard[1] > 1 else 'off').lower()
+    shared_lease_store = None
+    for state in ctx.targets:
+        # SQLiteのリースはすべてのシートで共有（キーにスプレッドシートID・シート名を含む）
+        if lease_kind == 'sheet' or shared_lease_store is None:
+            shared_lease_store = create_lease_store(lease_kind, state.sheets_client)
+        state.lease_store = shared_lease_store
+    if shared_lease_store:
+        print(f"🔒 Row leases: {lease_kind} (worker {shared_lease_store.worker_id})\n")
+    time_budget = time_budget or float(os.getenv('RUN_TIME_BUDGET_MINUTES', '0'))
+    if time_budget > 0:
+        ctx.time_budget = TimeBudget(time_budget * 60)
+        print(f"⏱️  Time budget: {time_budget:g} minutes\n")
 
+    try:
+        if watch:
+            poll_interval = poll_interval or float(os.getenv('WATCH_POLL_INTERVAL', '60'))
+            _watch(ctx, poll_interval, resume, float(os.getenv('WATCH_RETRY_INTERVAL', '600')))
+        elif not _run_cycle(ctx, resume, command=command):
+            print("No unprocessed rows found. Exiting.")
+            return
     finally:
         # Seleniumドライバーをクリーンアップ
         print("\nCleaning up resources...")
-        scraper.close()
+        ctx.close()
+        pool_stats = None
+        if ctx._generator is not None:
+            # OpenAIクライアントを作成した場合のみ接続プールを閉じる（httpxを読み込まない）
+            from http_pool import close_shared_pool, get_pool_stats
+            pool_stats = get_pool_stats()
+            close_shared_pool()
+        for path in tracer.finish():
+            print(f"🔬 Profile written: {path}")
 
     # サマリー
+    _print_summary(ctx, pool_stats)
+
+
+def run_batch(input_path, output_path=None, concurrency=None, profile=None):
+    """
+    batch コマンド：CSV / JSON Lines の各行をスクレイピング・レポート生成し、結果をJSON Linesに追記
+    （Google Sheetsは使わないため、クォータに関係なく大量のURLを一度に分析できる）
+
+    Args:
+        input_path (str): 入力ファイル（.csv、またはJSON Lines）
+        output_path (str, optional): 出力ファイル（Noneの場合は <入力ファイル名>.results.jsonl）。
+            既存のファイルに追記し、成功済みの行は処理しない
+        concurrency (int, optional): 同時にレポートを生成する行数（Noneの場合はBATCH_CONCURRENCY）
+        profile (str, optional): プロファイラー 'cprofile' / 'sample'（Noneの場合はPROFILE_MODE）
+    """
+    from batch_runner import DEFAULT_CONCURRENCY, BatchRunner, default_output_path
+
+    print("=" * 60)
+    print("Kickstarter Market Analyzer - Batch")
+    print("=" * 60)
+    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    settings = _load_settings(command='batch')
+    output_path = output_path or default_output_path(input_path)
+    concurrency = concurrency or int(os.getenv('BATCH_CONCURRENCY', str(DEFAULT_CONCURRENCY)))
+    print(f"Input: {input_path}")
+    print(f"Output: {output_path}")
+    print(f"Concurrency: {concurrency}\n")
+
+    tracer = get_tracer()
+    tracer.start_run(profiler=create_profiler(profile))
+    if tracer.path:
+        print(f"📈 Trace log: {tracer.path}\n")
+
+    ctx = AnalyzerContext(settings, [])
+    ctx.load_stores('batch')
+    runner = BatchRunner(ctx, concurrency)
+    started = time.time()
+    try:
+        runner.run(input_path, output_path)
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrupted - rows written so far are kept; rerun the same command to continue")
+    finally:
+        print("\nCleaning up resources...")
+        ctx.close()
+        if ctx._generator is not None:
+            from http_pool import close_shared_pool
+            close_shared_pool()
+        for path in tracer.finish():
+            print(f"🔬 Profile written: {path}")
+
+    counts = runner.counts
+    elapsed = time.time() - started
     print("=" * 60)
     print("Summary")
     print("=" * 60)
-    print(f"Total processed: {len(unprocessed_rows)}")
-    print(f"Successful: {success_count}")
-    print(f"Errors: {error_count}")
-    print(f"\nCompleted at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Input rows: {counts['total']}")
+    print(f"Successful: {counts['success']}")
+    print(f"Errors: {counts['errors']}")
+    print(f"Skipped (already done or no URL): {counts['skipped']}")
+    if counts['cached_fallback']:
+        print(f"Generated from cached project data (scraping blocked): {counts['cached_fallback']}")
+    if counts['blocked']:
+        print(f"Blocked without cached data (rerun to retry): {counts['blocked']}")
+    breaker_line = _breaker_summary(ctx)
+    if breaker_line:
+        print(breaker_line)
+    print(f"OpenAI calls: {counts['openai_calls']}")
+    processed = counts['success'] + counts['errors']
+    if processed:
+        print(f"Throughput: {processed / max(elapsed, 1e-9) * 60:.1f} rows/min")
+    stage_table = tracer.format_summary()
+    if stage_table:
+        print("\nStage timings (ms):")
+        print(stage_table)
+    print(f"\nResults: {output_path}")
+    print(f"Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+
+
+def run_export(targets=None, batch_results=None, output_dir=None, workers=None):
+    """
+    export コマンド：シートのK列・L列（または batch の結果ファイル）のレポートをDOCX / Markdownに出力
+    （変更の無い行は出力しない）
+
+    Args:
+        targets (str, optional): 処理対象リストのJSONファイル（Noneの場合はSHEETS_TARGETS）
+        batch_results (str, optional): batch の結果ファイル（指定した場合はシートを読まない）
+        output_dir (str, optional): 出力先ディレクトリ（Noneの場合はEXPORT_DIR、未指定なら exports）。
+            シート・結果ファイルごとのサブディレクトリに出力する
+        workers (int, optional): レンダリングのプロセス数（Noneの場合はEXPORT_WORKERS、未指定ならCPU数）
+    """
+    from report_export import (DEFAULT_EXPORT_DIR, ReportExporter, export_directory_name, reports_from_batch,
+                               reports_from_rows)
+
     print("=" * 60)
+    print("Kickstarter Market Analyzer - Export")
+    print("=" * 60)
+    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    load_dotenv()
+    output_dir = output_dir or os.getenv('EXPORT_DIR') or DEFAULT_EXPORT_DIR
+    exporter = ReportExporter(workers or int(os.getenv('EXPORT_WORKERS', '0')) or None)
+
+    if batch_results:
+        name = os.path.splitext(os.path.basename(batch_results))[0]
+        sources = [(name, lambda: reports_from_batch(batch_results))]
+    else:
+        ctx = _init_context(_load_settings(targets, 'export'))
+        sources = [(state.name, lambda state=state: reports_from_rows(state.sheets_client.read_rows()))
+                   for state in ctx.targets]
+
+    started = time.time()
+    totals = {'total': 0, 'exported': 0, 'unchanged': 0, 'errors': 0}
+    for name, reports in sources:
+        directory = os.path.join(output_dir, export_directory_name(name))
+        print(f"Exporting {name} to {directory} ({exporter.workers} workers)...")
+        counts = exporter.export(reports(), directory)
+        print(f"  ✓ {counts['exported']} exported, {counts['unchanged']} unchanged, {counts['errors']} errors\n")
+        for key in totals:
+            totals[key] += counts[key]
+
+    print("=" * 60)
+    print("Summary")
+    print("=" * 60)
+    print(f"Reports: {totals['total']}")
+    print(f"Exported (DOCX + Markdown): {totals['exported']}")
+    print(f"Unchanged (skipped): {totals['unchanged']}")
+    print(f"Errors: {totals['errors']}")
+    print(f"Elapsed: {time.time() - started:.1f}s")
+    print(f"Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+
+
+def parse_args(argv=None):
+    """
+    コマンドライン引数を解析（サブコマンドを省略した場合は run）
+
+    Returns:
+        argparse.Namespace: command と各オプション
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ('-h', '--help')):
+        argv.insert(0, 'run')
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--targets', metavar='FILE',
+                        help='JSON list of spreadsheets/sheets to process in one run, each with its own '
+                             'business context (default: SHEETS_TARGETS, or SPREADSHEET_ID/SHEET_NAME)')
+    common.add_argument('--shard', metavar='I/N',
+                        help='Process shard I of N (0-based) with row leases, e.g. 0/3 (default: SHARD)')
+    common.add_argument('--profile', choices=['cprofile', 'sample'],
+                        help='Profile the run (or only the stages in PROFILE_STAGES) and write the profile '
+                             'next to the trace log (default: PROFILE_MODE)')
+
+    processing = argparse.ArgumentParser(add_help=False)
+    processing.add_argument('--resume', nargs='?', const='latest', metavar='RUN_ID',
+                            help='Resume an interrupted run, reusing scraped data and reports saved '
+                                 'in its journal (default: the latest interrupted run)')
+    processing.add_argument('--time-budget', type=float, metavar='MINUTES',
+                            help='Stop starting new rows when the next one would not finish within this budget; '
+                                 'rows are processed in priority order (default: RUN_TIME_BUDGET_MINUTES)')
+
+    parser = argparse.ArgumentParser(description='Kickstarter Market Analyzer')
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    commands.add_parser('scan', parents=[common],
+                        help='List unprocessed rows in processing order (Sheets only)')
+    commands.add_parser('scrape', parents=[common, processing],
+                        help='Scrape unprocessed rows into the run journal (browser only)')
+    commands.add_parser('report', parents=[common, processing],
+                        help='Generate reports for rows scraped into the run journal (OpenAI only)')
+    commands.add_parser('write', parents=[common, processing],
+                        help='Write reports saved in the run journal to the sheet (Sheets only)')
+    run = commands.add_parser('run', parents=[common, processing],
+                              help='Scrape, generate and write in one pass (default)')
+    run.add_argument('--watch', action='store_true',
+                     help='Keep clients and the browser running and process new or edited rows '
+                          'whenever the sheet changes')
+    run.add_argument('--poll-interval', type=float, metavar='SECONDS',
+                     help='Seconds between change checks in watch mode (default: WATCH_POLL_INTERVAL or 60)')
+    batch = commands.add_parser('batch', help='Scrape and generate reports for URLs in a CSV or JSONL file and '
+                                              'stream the results to a JSONL file (no Sheets)')
+    batch.add_argument('input', help='CSV (url, maker_name, creator_name columns) or JSONL input file')
+    batch.add_argument('-o', '--output', metavar='FILE',
+                       help='JSONL file to append results to; rows already completed there are skipped '
+                            '(default: <input>.results.jsonl)')
+    batch.add_argument('--concurrency', type=int, metavar='N',
+                       help='Rows generating reports at the same time (default: BATCH_CONCURRENCY or 4)')
+    batch.add_argument('--profile', choices=['cprofile', 'sample'],
+                       help='Profile the run and write the profile next to the trace log (default: PROFILE_MODE)')
+    export = commands.add_parser('export', help='Render the reports in columns K/L (or a batch results file) '
+                                                'to DOCX and Markdown files, skipping unchanged ones')
+    export.add_argument('--targets', metavar='FILE',
+                        help='JSON list of spreadsheets/sheets to export (default: SHEETS_TARGETS, '
+                             'or SPREADSHEET_ID/SHEET_NAME)')
+    export.add_argument('--from-batch', metavar='FILE',
+                        help='Export a batch results JSONL file instead of the sheet')
+    export.add_argument('-o', '--output-dir', metavar='DIR',
+                        help='Directory to write files to, one subdirectory per sheet (default: EXPORT_DIR or exports)')
+    export.add_argument('--workers', type=int, metavar='N',
+                        help='Rendering processes (default: EXPORT_WORKERS or the CPU count)')
+    return parser.parse_args(argv)
 
 
 if __name__ == '__main__':
-    main()
+    args = parse_args()
+    if args.command == 'batch':
+        run_batch(args.input, args.output, args.concurrency, args.profile)
+    elif args.command == 'export':
+        run_export(args.targets, args.from_batch, args.output_dir, args.workers)
+    else:
+        main(resume=getattr(args, 'resume', None), watch=getattr(args, 'watch', False),
+             poll_interval=getattr(args, 'poll_interval', None), time_budget=getattr(args, 'time_budget', None),
+             shard=args.shard, targets=args.targets, profile=args.profile, command=args.command)
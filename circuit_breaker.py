@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+サーキットブレーカーモジュール
+Kickstarterがチャレンジページ（Bot検出）・ブロックページを返し続けた場合にスクレイピングを一時停止する。
+連続してブロックされた回数がしきい値に達すると開状態になり、待機時間が過ぎるまでページを読み込まない。
+待機後は1件だけ試行（半開状態）し、再びブロックされた場合は待機時間を倍にして開状態に戻す。
+開状態は状態ファイルで同じマシンの他のワーカー（シャーディング時のプロセス）と共有する
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+from profiling import profiled_run
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+DEFAULT_STATE_PATH = os.path.join('data', 'scrape_breaker.json')
+
+# 開状態にする連続ブロック回数・待機秒数の既定値
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN = 300
+DEFAULT_MAX_COOLDOWN = 3600
+
+
+class CircuitBreaker:
+    """連続した失敗でスクレイピングを止めるサーキットブレーカー（スレッドセーフ）"""
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown=DEFAULT_COOLDOWN,
+                 max_cooldown=DEFAULT_MAX_COOLDOWN, state_path=None, clock=time.time):
+        """
+        Args:
+            failure_threshold (int): 開状態にする連続失敗回数（0の場合は無効）
+            cooldown (float): 開状態の待機秒数（再び開状態になるたびに倍、max_cooldown まで）
+            max_cooldown (float): 待機秒数の上限
+            state_path (str, optional): 開状態を他のプロセスと共有する状態ファイル（Noneの場合は共有しない）
+            clock (callable): 現在時刻（UNIX時刻）を返す関数
+        """
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state_path = state_path
+        self.clock = clock
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.open_until = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.failure_threshold > 0
+
+    def allow(self):
+        """
+        ページを読み込んでよいか
+
+        Returns:
+            bool: 閉状態、または待機後の試行1件の場合True（開状態の間はFalse）
+        """
+        if not self.enabled:
+            return True
+        with self._lock:
+            self._sync()
+            if self.state == STATE_OPEN:
+                if self.clock() < self.open_until:
+                    self.rejected += 1
+                    return False
+                # 待機時間が過ぎたので1件だけ試行
+                self.state = STATE_HALF_OPEN
+                self._probing = False
+            if self.state == STATE_HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self):
+        """ページを正常に取得できた（閉状態に戻し、待機秒数をリセット）"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.failures = 0
+            if self.state != STATE_CLOSED:
+                print("🟢 Scrape circuit breaker closed - resuming scraping")
+                self.state = STATE_CLOSED
+                self.cooldown = self.base_cooldown
+                self._probing = False
+                self._write_state(None)
+
+    def record_failure(self):
+        """
+        ブロックされた（しきい値に達した場合・試行が失敗した場合は開状態にする）
+
+        Returns:
+            bool: この呼び出しで開状態になった場合True
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            self.failures += 1
+            if self.state == STATE_HALF_OPEN:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                self._trip('retry was blocked')
+            elif self.failures >= self.failure_threshold:
+                self._trip(f'{self.failures} blocked pages in a row')
+            else:
+                return False
+            return True
+
+    def release(self):
+        """読み込みがブロック以外の理由で失敗した（半開状態の場合は次の呼び出しで再び試行する）"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._probing = False
+
+    def retry_in(self):
+        """開状態が終わるまでの秒数（閉状態の場合は0）"""
+        if self.state != STATE_OPEN:
+            return 0.0
+        return max(0.0, self.open_until - self.clock())
+
+    def stats(self):
+        """集計（state / trips / rejected / failures / retry_in）"""
+        with self._lock:
+            return {
+                'state': self.state,
+                'trips': self.trips,
+                'rejected': self.rejected,
+                'failures': self.failures,
+                'retry_in': round(self.retry_in(), 1),
+            }
+
+    def _trip(self, reason):
+        self.state = STATE_OPEN
+        self.open_until = self.clock() + self.cooldown
+        self.trips += 1
+        self._probing = False
+        print(f"🔴 Scrape circuit breaker opened ({reason}) - pausing scraping for {self.cooldown:.0f}s")
+        self._write_state({'open_until': self.open_until, 'cooldown': self.cooldown})
+
+    def _sync(self):
+        """他のプロセスが開状態にした場合はこちらも開状態にする"""
+        if not self.state_path:
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                shared = json.load(f)
+        except (OSError, ValueError):
+            return
+        if shared.get('open_until', 0) > max(self.open_until, self.clock()):
+            self.state = STATE_OPEN
+            self.open_until = shared['open_until']
+            self.cooldown = shared.get('cooldown', self.cooldown)
+            self._probing = False
+
+    def _write_state(self, state):
+        """状態ファイルを更新（閉状態に戻した場合は削除）"""
+        if not self.state_path:
+            return
+        try:
+            if state is None:
+                if os.path.exists(self.state_path):
+                    os.remove(self.state_path)
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+            tmp_path = f'{self.state_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"⚠️  Could not update circuit breaker state {self.state_path}: {e}")
+
+
+_scrape_breaker = None
+_scrape_breaker_lock = threading.Lock()
+
+
+def get_scrape_breaker():
+    """プロセス内のスクレイパーで共有するサーキットブレーカーを取得（SCRAPE_BREAKER_* で設定）"""
+    global _scrape_breaker
+    with _scrape_breaker_lock:
+        if _scrape_breaker is None:
+            _scrape_breaker = CircuitBreaker(
+                failure_threshold=int(os.getenv('SCRAPE_BREAKER_THRESHOLD', str(DEFAULT_FAILURE_THRESHOLD))),
+                cooldown=float(os.getenv('SCRAPE_BREAKER_COOLDOWN', str(DEFAULT_COOLDOWN))),
+                max_cooldown=float(os.getenv('SCRAPE_BREAKER_MAX_COOLDOWN', str(DEFAULT_MAX_COOLDOWN))),
+                state_path=os.getenv('SCRAPE_BREAKER_STATE', DEFAULT_STATE_PATH) or None,
+            )
+        return _scrape_breaker
+
+
+def simulate(pages, threshold, cooldown):
+    """
+    ブロックされたページ・正常なページの並びでブレーカーの動作を確認（時刻は1ページ60秒で進める）
+
+    Args:
+        pages (str): 'b'（ブロック）と 'o'（正常）の並び（例: 'oobbbbbbooo'）
+        threshold (int): 開状態にする連続ブロック回数
+        cooldown (float): 開状態の待機秒数
+    """
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=threshold, cooldown=cooldown, max_cooldown=cooldown * 8,
+                             clock=lambda: now[0])
+    print("=" * 60)
+    print(f"Circuit Breaker Simulation (threshold {threshold}, cooldown {cooldown:g}s, 60s per page)")
+    print("=" * 60)
+    for i, page in enumerate(pages):
+        if not breaker.allow():
+            action = 'skipped'
+        elif page == 'b':
+            breaker.record_failure()
+            action = 'blocked'
+        else:
+            breaker.record_success()
+            action = 'ok'
+        print(f"  t={now[0]:>6.0f}s  page {i:>3} ({page})  {action:<8} state={breaker.state}")
+        now[0] += 60
+    print(f"\n{breaker.stats()}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate the scrape circuit breaker')
+    parser.add_argument('--pages', default='oobbbbbbbbbbbbboooo',
+                        help="Sequence of page results: b = blocked, o = ok")
+    parser.add_argument('--threshold', type=int, default=DEFAULT_FAILURE_THRESHOLD)
+    parser.add_argument('--cooldown', type=float, default=120)
+    args = parser.parse_args()
+    simulate(args.pages, args.threshold, args.cooldown)
+
+
+if __name__ == '__main__':
+    # PROFILE_MODE=cprofile / sample でプロファイル（logs/profile-*）
+    with profiled_run('circuit_breaker'):
+        main()
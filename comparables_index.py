@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+類似キャンペーン検索モジュール
+スクレイピング済みプロジェクトからTF-IDF転置インデックスを作成し、
+カテゴリ・説明文が近いキャンペーンを実績値付きで返す。
+作成後にスクレイピングしたプロジェクトはインデックスに追加し（IDFは作成時のまま）、
+追加分が一定の割合を超えた場合のみ全体を再作成する
+"""
+
+import bisect
+import heapq
+import math
+import os
+import pickle
+import re
+import tempfile
+import time
+from collections import Counter
+
+from dedup import normalize_url
+from profiling import profiled_run
+from project_record import ProjectRecord
+
+DEFAULT_INDEX_PATH = os.path.join('data', 'comparables_index.pkl')
+INDEX_FORMAT_VERSION = 3
+
+# 作成時の件数に対する追加・更新件数の割合がこれを超えたらIDFを再計算するため再作成
+REBUILD_RATIO = 0.25
+
+# 同一カテゴリのスコア倍率
+CATEGORY_BOOST = 1.5
+# 製品名の語の重み（説明文より強く効かせる）
+TITLE_WEIGHT = 2
+# 1語あたりに走査する転置リストの上限（重み順のチャンピオンリスト）
+MAX_POSTINGS_PER_TERM = 2000
+
+_WORD = re.compile(r'[a-z0-9]+')
+_CJK = re.compile(r'[぀-ヿ㐀-鿿]+')
+_STOPWORDS = frozenset(
+    'a an and are as at be by for from has have in is it its of on or that the this to '
+    'with you your our we will can more new one all'.split()
+)
+
+
+def tokenize(text):
+    """英数字は単語、日本語は文字bigramでトークン化"""
+    text = (text or '').lower()
+    tokens = [w for w in _WORD.findall(text) if len(w) > 1 and w not in _STOPWORDS]
+    for run in _CJK.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def _document_terms(record):
+    terms = Counter(tokenize(record.description))
+    for token in tokenize(record.product_name):
+        terms[token] += TITLE_WEIGHT
+    return terms
+
+
+class ComparablesIndex:
+    """TF-IDF転置インデックスによる類似キャンペーン検索"""
+
+    def __init__(self):
+        self.version = None
+        # プロジェクト情報（ProjectRecord）と正規化URL
+        self.docs = []
+        self.keys = []
+        self.idf = {}
+        self.postings = {}
+        # 作成時の文書数（IDFの計算に使用）と、更新されて使われなくなった文書
+        self.built_docs = 0
+        self.stale = set()
+        # 前回の保存以降に追加した件数
+        self.pending = 0
+        self._doc_ids = {}
+
+    def _index_keys(self):
+        self._doc_ids = {key: doc_id for doc_id, key in enumerate(self.keys) if doc_id not in self.stale}
+
+    @property
+    def live_docs(self):
+        """検索対象の文書数（更新前の文書を除く）"""
+        return len(self.docs) - len(self.stale)
+
+    @property
+    def needs_rebuild(self):
+        """作成後の追加・更新が多く、IDFを再計算すべきか"""
+        return len(self.docs) - self.built_docs > max(100, self.built_docs * REBUILD_RATIO)
+
+    @classmethod
+    def build(cls, records, version=None):
+        """
+        プロジェクト情報のリストからインデックスを作成
+
+        Args:
+            records (list): プロジェクト情報（ProjectRecord）のリスト
+            version: 元データの版（ProjectCache.version）
+
+        Returns:
+            ComparablesIndex: 作成したインデックス
+        """
+        index = cls()
+        index.version = version
+        doc_terms = []
+
+        for record in records:
+            # キャッシュのレコードをそのまま参照する（コピーしない）
+            index.docs.append(record)
+            index.keys.append(normalize_url(record.url))
+            doc_terms.append(_document_terms(record))
+
+        df = Counter()
+        for terms in doc_terms:
+            df.update(terms.keys())
+
+        n_docs = index.built_docs = len(doc_terms)
+        index.idf = {term: math.log((1 + n_docs) / (1 + count)) + 1 for term, count in df.items()}
+
+        # 文書ベクトル（サブリニアTF × IDF、L2正規化）を転置リストに格納
+        for doc_id, terms in enumerate(doc_terms):
+            weights = {t: (1 + math.log(tf)) * index.idf[t] for t, tf in terms.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for term, weight in weights.items():
+                index.postings.setdefault(term, []).append((doc_id, weight / norm))
+
+        # 重みの大きい文書から走査できるように並べ替え
+        for plist in index.postings.values():
+            plist.sort(key=lambda item: item[1], reverse=True)
+
+        index._index_keys()
+        return index
+
+    def add(self, record):
+        """
+        スクレイピングしたプロジェクトを追加（同じURLの文書は検索対象から外す）
+
+        IDFは作成時の値を使い、新しい語は作成時の文書数で1件だけ出現した語として扱う。
+        検索と並行して呼び出せるよう、参照される前に文書・IDFを登録してから転置リストに入れる
+
+        Args:
+            record (ProjectRecord): プロジェクト情報
+        """
+        key = normalize_url(record.url)
+        doc_id = len(self.docs)
+        self.docs.append(record)
+        self.keys.append(key)
+
+        terms = _document_terms(record)
+        new_idf = math.log((1 + self.built_docs) / 2) + 1
+        for term in terms:
+            if term not in self.idf:
+                self.postings.setdefault(term, [])
+                self.idf[term] = new_idf
+        weights = {t: (1 + math.log(tf)) * self.idf[t] for t, tf in terms.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        for term, weight in weights.items():
+            # 重みの降順を保って挿入
+            bisect.insort(self.postings[term], (doc_id, weight / norm), key=lambda item: -item[1])
+
+        previous = self._doc_ids.get(key)
+        if previous is not None:
+            self.stale.add(previous)
+        self._doc_ids[key] = doc_id
+        self.pending += 1
+
+    def query(self, record, k=5):
+        """
+        類似キャンペーンを検索
+
+        Args:
+            record (ProjectRecord): 検索対象のプロジェクト情報
+            k (int): 返す件数
+
+        Returns:
+            list: (ProjectRecord, スコア) のリスト（スコアの高い順）
+        """
+        if not self.docs:
+            return []
+
+        terms = _document_terms(record)
+        weights = {t: (1 + math.log(tf)) * self.idf[t] for t, tf in terms.items() if t in self.idf}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+
+        scores = {}
+        for term, q_weight in weights.items():
+            q_weight /= norm
+            for doc_id, d_weight in self.postings[term][:MAX_POSTINGS_PER_TERM]:
+                scores[doc_id] = scores.get(doc_id, 0.0) + q_weight * d_weight
+
+        own_key = normalize_url(record.url)
+        category = record.category
+        boosted = []
+        for doc_id, score in scores.items():
+            if self.keys[doc_id] == own_key or doc_id in self.stale:
+                continue
+            if category and self.docs[doc_id].category == category:
+                score *= CATEGORY_BOOST
+            boosted.append((score, doc_id))
+
+        top = heapq.nlargest(k, boosted)
+        return [(self.docs[doc_id], round(score, 4)) for score, doc_id in top]
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        """インデックスをアトミックに保存"""
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((INDEX_FORMAT_VERSION, self.version, self.docs, self.keys, self.idf, self.postings,
+                         self.built_docs, self.stale), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.pending = 0
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        """保存済みインデックスを読み込み（存在しない・形式が古い場合はNone）"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                saved = pickle.load(f)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        if saved[0] != INDEX_FORMAT_VERSION:
+            return None
+
+        index = cls()
+        _, index.version, index.docs, index.keys, index.idf, index.postings, index.built_docs, index.stale = saved
+        index._index_keys()
+        return index
+
+
+def load_or_build(project_cache, path=DEFAULT_INDEX_PATH):
+    """
+    キャッシュの版が一致する保存済みインデックスを読み込み、古ければ再作成
+
+    Args:
+        project_cache (ProjectCache): プロジェクトキャッシュ
+        path (str): インデックスファイルのパス
+
+    Returns:
+        ComparablesIndex: インデックス
+    """
+    version = project_cache.version
+    index = ComparablesIndex.load(path)
+    # 他のプロセスが追記した場合は件数が一致しない
+    if index is not None and index.version == version and index.live_docs == len(project_cache) \
+            and not index.needs_rebuild:
+        return index
+
+    index = ComparablesIndex.build(project_cache.records(), version=version)
+    if index.docs:
+        index.save(path)
+    return index
+
+
+def add_record(index, project_cache, record, path=DEFAULT_INDEX_PATH, save_every=50):
+    """
+    キャッシュに追加したプロジェクトをインデックスにも追加（save_every 件ごとに保存）
+
+    Args:
+        index (ComparablesIndex): load_or_build で読み込んだインデックス
+        project_cache (ProjectCache): record を put 済みのプロジェクトキャッシュ
+
+    Returns:
+        ComparablesIndex: インデックス（追加・更新が多くなった場合は再作成したもの）
+    """
+    if index.needs_rebuild:
+        index = ComparablesIndex.build(project_cache.records(), version=project_cache.version)
+        index.save(path)
+        return index
+    index.add(record)
+    if index.pending >= save_every:
+        save_index(index, project_cache, path)
+    return index
+
+
+def save_index(index, project_cache, path=DEFAULT_INDEX_PATH):
+    """追加分があればキャッシュの現在の版で保存（次回の起動時に再作成しない）"""
+    if index.pending:
+        index.version = project_cache.version
+        index.save(path)
+
+
+def test_comparables_index():
+    """類似キャンペーン検索のテスト（合成データでクエリ時間を計測）"""
+    import random
+
+    random.seed(0)
+    vocabulary = ('smart mug coffee temperature bottle water travel backpack camera lens '
+                  'wallet leather desk lamp light speaker audio headphones charger battery '
+                  'keyboard game board card tabletop book comic art print knife tool').split()
+    vocabulary += [f'term{i}' for i in range(5000)]
+    categories = ['Product Design', 'Gadgets', 'Tabletop Games', 'Publishing', 'Technology']
+
+    records = []
+    for i in range(20000):
+        words = random.choices(vocabulary, k=40)
+        records.append(ProjectRecord(
+            url=f'https://www.kickstarter.com/projects/creator{i}/project{i}',
+            product_name=' '.join(words[:3]).title(),
+            description=' '.join(words),
+            category=random.choice(categories),
+            funding_total=float(random.randint(1000, 2000000)),
+            backers=random.randint(10, 20000),
+        ))
+
+    print("=" * 60)
+    print("Comparables Index Test")
+    print("=" * 60)
+
+    started = time.perf_counter()
+    index = ComparablesIndex.build(records)
+    print(f"Built index over {len(records):,} projects in {time.perf_counter() - started:.2f}s")
+
+    target = ProjectRecord(
+        url='https://www.kickstarter.com/projects/example/smart-coffee-mug',
+        product_name='Smart Coffee Mug',
+        description='A temperature-controlled smart mug that keeps your coffee at the perfect temperature',
+        category='Product Design',
+    )
+    started = time.perf_counter()
+    results = index.query(target, k=5)
+    print(f"Query time: {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    started = time.perf_counter()
+    for i in range(100):
+        index.add(ProjectRecord(url=f'https://www.kickstarter.com/projects/new{i}/project{i}',
+                                product_name=target.product_name, description=target.description,
+                                category=target.category))
+    print(f"Add (incremental): {(time.perf_counter() - started) * 10:.2f}ms per project\n")
+
+    for record, score in results:
+        print(f"  {score:.3f}  {record.product_name} ({record.category}) "
+              f"${record.funding_total_usd:,.0f} / {record.backers:,} backers")
+
+    print("\n" + "=" * 60)
+
+
+if __name__ == '__main__':
+    # PROFILE_MODE=cprofile / sample でプロファイル（logs/profile-*）
+    with profiled_run('comparables'):
+        test_comparables_index()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+重複製品検出モジュール
+URL正規化とMinHashによる類似判定で、同一製品・再ローンチ製品の
+既存レポートを再利用する
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+import tempfile
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit, urlunsplit
+
+from profiling import profiled_run
+
+DEFAULT_INDEX_PATH = os.path.join('data', 'dedup_index.json')
+
+# MinHash設定（64個のハッシュを16バンド×4行でLSH）
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# 再利用するレポートの最大経過日数の既定値（公開中のキャンペーンは数字が変わるため再分析する）
+DEFAULT_MAX_AGE_DAYS = 30
+
+# インデックスは全レポートを含むため、行ごとではなくこの件数ごと（とサイクルの終わり）に保存する
+DEFAULT_SAVE_EVERY = 50
+
+# 再ローンチを示す語（「Gulliver (Relaunch)」等）は類似度の計算から除く
+_RELAUNCH_MARKERS = re.compile(r'[(\[]?\b(?:re-?launch(?:ed|ing)?|relaunch)\b[)\]]?', re.I)
+
+# /projects/<creator>/<slug> 以降のサブページ（/description, /rewards 等）は同一製品
+_PROJECT_PATH = re.compile(r'^(/projects/[^/]+/[^/]+)', re.I)
+
+
+def _permutations():
+    """固定シードのハッシュ置換係数を生成（実行間で署名を比較できるように）"""
+    params = []
+    for i in range(NUM_PERM):
+        digest = hashlib.sha256(f'minhash-{i}'.encode()).digest()
+        a, b = struct.unpack('<QQ', digest[:16])
+        params.append((a % (_MERSENNE_PRIME - 1) + 1, b % _MERSENNE_PRIME))
+    return params
+
+
+_PERMUTATIONS = _permutations()
+
+
+def normalize_url(url):
+    """
+    URLを正規化（クエリ・フラグメント・サブページ・末尾スラッシュを除去）
+
+    Args:
+        url (str): 入力URL
+
+    Returns:
+        str: 正規化されたURL
+    """
+    url = (url or '').strip()
+    if not url:
+        return ''
+    if '://' not in url:
+        url = 'https://' + url
+
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host == 'kickstarter.com':
+        host = 'www.kickstarter.com'
+
+    path = parts.path.rstrip('/')
+    match = _PROJECT_PATH.match(path)
+    if match:
+        path = match.group(1)
+
+    return urlunsplit(('https', host, path.lower(), '', ''))
+
+
+def _shingles(text):
+    text = re.sub(r'\s+', ' ', (text or '').lower()).strip()
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def _similarity_text(product_name, description):
+    """類似度を計算する文字列（製品名＋説明、再ローンチを示す語を除く）"""
+    return _RELAUNCH_MARKERS.sub(' ', f'{product_name} {description}')
+
+
+def minhash_signature(text):
+    """
+    テキストのMinHash署名を計算
+
+    Args:
+        text (str): 製品名＋説明文
+
+    Returns:
+        list: NUM_PERM個の整数
+    """
+    hashes = [
+        struct.unpack('<I', hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest())[0]
+        for s in _shingles(text)
+    ]
+    if not hashes:
+        return [_MAX_HASH] * NUM_PERM
+
+    return [
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def estimate_similarity(sig_a, sig_b):
+    """2つの署名からJaccard類似度を推定"""
+    same = sum(1 for x, y in zip(sig_a, sig_b) if x == y)
+    return same / NUM_PERM
+
+
+def _band_keys(signature):
+    return [
+        f'{band}:' + ','.join(str(v) for v in signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])
+        for band in range(BANDS)
+    ]
+
+
+class DuplicateIndex:
+    """生成済みレポートの重複検出インデックス（JSONファイルに永続化）"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, threshold=None, max_age_days=None):
+        """
+        Args:
+            path (str): インデックスファイルのパス
+            threshold (float): 類似と判定するJaccard類似度（DEDUP_THRESHOLD、デフォルト0.8）
+            max_age_days (float): この日数より前に生成したレポートは再利用しない
+                （DEDUP_MAX_AGE_DAYS、デフォルト30日、0の場合は無制限）
+        """
+        self.path = path
+        self.threshold = threshold or float(os.getenv('DEDUP_THRESHOLD', '0.8'))
+        if max_age_days is None:
+            max_age_days = float(os.getenv('DEDUP_MAX_AGE_DAYS', str(DEFAULT_MAX_AGE_DAYS)))
+        self.max_age_days = max_age_days
+        self.entries = {}
+        self._buckets = {}
+        self._dirty = False
+        # 前回の保存以降に追加したレポート数
+        self.pending = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"  ⚠️  Could not load dedup index ({e}); starting empty")
+            self.entries = {}
+
+        for key, entry in self.entries.items():
+            self._add_to_buckets(key, entry['signature'])
+
+    def _add_to_buckets(self, key, signature):
+        for band_key in _band_keys(signature):
+            self._buckets.setdefault(band_key, set()).add(key)
+
+    def _reusable(self, entry, exclude_row=None):
+        """再利用できるエントリか（同じ行で生成したもの・max_age_days より古いものは再利用しない）"""
+        if exclude_row is not None and entry.get('source_row') == exclude_row:
+            return False
+        if self.max_age_days > 0:
+            cutoff = datetime.now() - timedelta(days=self.max_age_days)
+            if datetime.fromisoformat(entry['created_at']) < cutoff:
+                return False
+        return True
+
+    def find_by_url(self, url, exclude_row=None):
+        """
+        正規化URLが一致するエントリを検索
+
+        Args:
+            url (str): KickstarterプロジェクトURL
+            exclude_row (str, optional): この行（row_key）で生成したエントリは返さない（K列を消して再生成する場合）
+
+        Returns:
+            dict or None: インデックスエントリ
+        """
+        entry = self.entries.get(normalize_url(url))
+        if entry is not None and self._reusable(entry, exclude_row):
+            return entry
+        return None
+
+    def find_similar(self, product_name, description, exclude_row=None):
+        """
+        内容が類似するエントリを検索（再ローンチ等の検出）
+
+        Args:
+            exclude_row (str, optional): この行（row_key）で生成したエントリは返さない
+
+        Returns:
+            tuple: (エントリ, 類似度)、見つからない場合は (None, 0.0)
+        """
+        signature = minhash_signature(_similarity_text(product_name, description))
+        candidates = set()
+        for band_key in _band_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+
+        best, best_score = None, 0.0
+        for key in candidates:
+            if not self._reusable(self.entries[key], exclude_row):
+                continue
+            score = estimate_similarity(signature, self.entries[key]['signature'])
+            if score > best_score:
+                best, best_score = self.entries[key], score
+
+        if best_score >= self.threshold:
+            return best, best_score
+        return None, 0.0
+
+    def add(self, url, product_name, description, japanese_report, english_report=None, template_ids=None,
+            source_row=None):
+        """
+        生成したレポートを登録
+
+        Args:
+            template_ids (dict): 生成に使用したプロンプトテンプレート
+            source_row (str): 生成した行（row_key）。同じ行の再生成では再利用しない
+        """
+        key = normalize_url(url)
+        signature = minhash_signature(_similarity_text(product_name, description))
+        self.entries[key] = {
+            'url': key,
+            'source_url': url,
+            'product_name': product_name,
+            'signature': signature,
+            'japanese_report': japanese_report,
+            'english_report': english_report,
+            'template_ids': template_ids or {},
+            'source_row': source_row,
+            'created_at': datetime.now().isoformat(),
+        }
+        self._add_to_buckets(key, signature)
+        self._dirty = True
+        self.pending += 1
+
+    def save_if_due(self, save_every=DEFAULT_SAVE_EVERY):
+        """前回の保存以降の追加が save_every 件に達したら保存"""
+        if self.pending >= save_every:
+            self.save()
+
+    def save(self):
+        """変更があればアトミックに保存"""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        self.pending = 0
+
+
+def row_key(spreadsheet_id, sheet_name, row_number):
+    """シートの行を表すキー（インデックスエントリの source_row）"""
+    return f'{spreadsheet_id}/{sheet_name}/{row_number}'
+
+
+def refresh_report(report, old_url, new_url):
+    """
+    再利用するレポート内の製品URLを差し替える（軽量リフレッシュ）
+
+    Args:
+        report (str): 既存レポート
+        old_url (str): 既存レポートの製品URL
+        new_url (str): 今回の製品URL
+
+    Returns:
+        str: URLを差し替えたレポート
+    """
+    if not report or not old_url or old_url == new_url:
+        return report
+    return report.replace(old_url, new_url)
+
+
+def test_dedup():
+    """重複検出のテスト"""
+    urls = [
+        'https://www.kickstarter.com/projects/beehivebooks/gulliver?ref=discovery',
+        'kickstarter.com/projects/beehivebooks/gulliver/description',
+        'https://www.kickstarter.com/projects/beehivebooks/gulliver/',
+    ]
+
+    print("=" * 60)
+    print("Dedup Test")
+    print("=" * 60)
+    for url in urls:
+        print(f"{url}\n  -> {normalize_url(url)}")
+
+    description = 'A beautiful reimagining of Jonathan Swift\'s classic tale'
+    a = minhash_signature(_similarity_text('Gulliver', description))
+    b = minhash_signature(_similarity_text('Gulliver (Relaunch)', description))
+    c = minhash_signature(_similarity_text('Smart Coffee Mug', 'A temperature-controlled smart mug'))
+    threshold = float(os.getenv('DEDUP_THRESHOLD', '0.8'))
+    print()
+    for label, score in (('Relaunch', estimate_similarity(a, b)), ('Unrelated', estimate_similarity(a, c))):
+        print(f"{label} similarity: {score:.2f} "
+              f"({'duplicate' if score >= threshold else 'different'} at DEDUP_THRESHOLD={threshold})")
+    print("\n" + "=" * 60)
+
+
+if __name__ == '__main__':
+    # PROFILE_MODE=cprofile / sample でプロファイル（logs/profile-*）
+    with profiled_run('dedup'):
+        test_dedup()
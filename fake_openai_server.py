@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+ローカル用OpenAI互換サーバー（負荷試験用）
+chat completions API（ストリーミング含む）を模擬し、レイテンシ分布・
+エラー・429（レート制限）を注入できる。実際のトークンは消費しない
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RESPONSE = (
+    "Load Test Maker Sales Team\n\n"
+    "お世話になっております。\n"
+    "これは負荷試験用のダミーレポートです。実際の市場分析は含まれていません。\n\n"
+    "①日本における販売実績: ダミー\n"
+    "②類似商品の販売実績額: ダミー\n"
+    "③想定販売価格帯: ダミー\n"
+    "④販売予測と成功可能性: ダミー\n"
+)
+
+
+def parse_latency(spec):
+    """
+    レイテンシ分布の指定を解析
+
+    Args:
+        spec (str): 'fixed:0.5' / 'uniform:0.2,1.5' / 'lognormal:-0.5,0.6'（秒）
+
+    Returns:
+        callable: 待機秒数を返す関数
+    """
+    kind, _, params = spec.partition(':')
+    values = [float(v) for v in params.split(',')] if params else []
+
+    if kind == 'fixed':
+        return lambda: values[0] if values else 0.0
+    if kind == 'uniform':
+        low, high = values
+        return lambda: random.uniform(low, high)
+    if kind == 'lognormal':
+        mu, sigma = values
+        return lambda: random.lognormvariate(mu, sigma)
+    raise ValueError(f'Unknown latency distribution: {spec}')
+
+
+class FakeOpenAIStats:
+    """サーバー側の統計（スレッドセーフ）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.completed = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def enter(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self, outcome):
+        with self._lock:
+            self.in_flight -= 1
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'completed': self.completed,
+                'rate_limited': self.rate_limited,
+                'errors': self.errors,
+                'max_in_flight': self.max_in_flight,
+            }
+
+
+class FakeOpenAIServer:
+    """OpenAI互換のローカルサーバー"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency='fixed:0', error_rate=0.0,
+                 rate_limit_rate=0.0, retry_after=0.5, response_text=DEFAULT_RESPONSE):
+        """
+        Args:
+            host (str): 待ち受けアドレス
+            port (int): 待ち受けポート（0の場合は空きポート）
+            latency (str): レイテンシ分布（parse_latency参照）
+            error_rate (float): 500エラーを返す確率
+            rate_limit_rate (float): 429を返す確率
+            retry_after (float): 429時のRetry-Afterヘッダー秒数
+            response_text (str): 返すレポート本文
+        """
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.response_text = response_text
+        self.stats = FakeOpenAIStats()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+
+                if self.path.rstrip('/') != '/v1/chat/completions':
+                    self._send_json(404, {'error': {'message': f'Unknown path {self.path}',
+                                                    'type': 'invalid_request_error'}})
+                    return
+
+                server.stats.enter()
+                outcome = 'completed'
+                try:
+                    time.sleep(server.latency())
+                    roll = random.random()
+                    if roll < server.rate_limit_rate:
+                        outcome = 'rate_limited'
+                        self._send_json(429, {'error': {'message': 'Rate limit reached (injected)',
+                                                        'type': 'rate_limit_error',
+                                                        'code': 'rate_limit_exceeded'}},
+                                        headers={'Retry-After': str(server.retry_after)})
+                    elif roll < server.rate_limit_rate + server.error_rate:
+                        outcome = 'errors'
+                        self._send_json(500, {'error': {'message': 'Internal error (injected)',
+                                                        'type': 'server_error'}})
+                    elif request.get('stream'):
+                        self._stream(request)
+                    else:
+                        self._send_json(200, server.completion(request))
+                finally:
+                    server.stats.leave(outcome)
+
+            def _stream(self, request):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+
+                completion_id = f'chatcmpl-{uuid.uuid4().hex[:24]}'
+                text = server.response_text
+                pieces = [text[i:i + 32] for i in range(0, len(text), 32)]
+                for piece in pieces + [None]:
+                    chunk = {
+                        'id': completion_id,
+                        'object': 'chat.completion.chunk',
+                        'created': int(time.time()),
+                        'model': request.get('model', 'fake'),
+                        'choices': [{
+                            'index': 0,
+                            'delta': {'content': piece} if piece else {},
+                            'finish_reason': None if piece else 'stop',
+                        }],
+                    }
+                    self._write_chunk(f'data: {json.dumps(chunk, ensure_ascii=False)}\n\n')
+                self._write_chunk('data: [DONE]\n\n')
+                self.wfile.write(b'0\r\n\r\n')
+
+            def _write_chunk(self, text):
+                data = text.encode('utf-8')
+                self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+
+        return Handler
+
+    def completion(self, request):
+        """非ストリーミングのレスポンスを作成"""
+        prompt_chars = sum(len(m.get('content', '')) for m in request.get('messages', []))
+        return {
+            'id': f'chatcmpl-{uuid.uuid4().hex[:24]}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'fake'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': self.response_text},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': prompt_chars // 2,
+                'completion_tokens': len(self.response_text) // 2,
+                'total_tokens': (prompt_chars + len(self.response_text)) // 2,
+            },
+        }
+
+    def start(self):
+        """バックグラウンドスレッドで起動"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake OpenAI chat completions server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', default='uniform:0.5,2.0',
+                        help="fixed:S / uniform:LOW,HIGH / lognormal:MU,SIGMA (seconds)")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=float, default=0.5)
+    parser.add_argument('--response-file', help='File containing the canned report text')
+    args = parser.parse_args()
+
+    response_text = DEFAULT_RESPONSE
+    if args.response_file:
+        with open(args.response_file, 'r', encoding='utf-8') as f:
+            response_text = f.read()
+
+    server = FakeOpenAIServer(args.host, args.port, args.latency, args.error_rate,
+                              args.rate_limit_rate, args.retry_after, response_text)
+    print(f"Fake OpenAI server listening on {server.base_url}")
+    print(f"  export OPENAI_BASE_URL={server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\nStats: {server.stats.snapshot()}")
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
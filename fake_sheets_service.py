@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+メモリ上のGoogle Sheets APIサービス（負荷試験・オフライン検証用）
+googleapiclientのservice.spreadsheets().values() と同じ呼び出し形式で
+get / batchGet / update / batchUpdate を提供する
+"""
+
+import random
+import re
+import threading
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+_A1_RANGE = re.compile(r'^([A-Z]+)?(\d+)?(?::([A-Z]+)?(\d+)?)?$')
+
+
+def column_index(letters):
+    """列名（A, B, ..., AA）を0始まりの列番号に変換"""
+    index = 0
+    for char in letters:
+        index = index * 26 + (ord(char) - 64)
+    return index - 1
+
+
+def parse_a1(range_name):
+    """
+    A1形式の範囲を解析
+
+    Args:
+        range_name (str): 'sheet!B2:E100' / 'sheet!A:L' / 'sheet!K5' 等
+
+    Returns:
+        tuple: (シート名, 開始行, 終了行, 開始列, 終了列)。行・列は0始まり、終了はNone可
+    """
+    sheet, _, cells = range_name.rpartition('!')
+    sheet = sheet.strip("'")
+    match = _A1_RANGE.match(cells)
+    if not match:
+        raise ValueError(f'Unsupported range: {range_name}')
+    col1, row1, col2, row2 = match.groups()
+    if ':' not in cells:
+        col2, row2 = col1, row1
+
+    start_row = int(row1) - 1 if row1 else 0
+    end_row = int(row2) - 1 if row2 else None
+    start_col = column_index(col1) if col1 else 0
+    end_col = column_index(col2) if col2 else None
+    return sheet, start_row, end_row, start_col, end_col
+
+
+class _Request:
+    def __init__(self, func):
+        self._func = func
+
+    def execute(self, num_retries=0):
+        return self._func()
+
+
+class _Spreadsheets:
+    def __init__(self, service):
+        self._service = service
+
+    def get(self, spreadsheetId, **kwargs):
+        return self._service.get_spreadsheet(spreadsheetId, **kwargs)
+
+    def values(self):
+        return self._service
+
+
+class FakeSheetsService:
+    """シート名 → 2次元リストのグリッドを保持するフェイクサービス"""
+
+    def __init__(self, sheets=None, error_rate=0.0, error_status=429):
+        """
+        Args:
+            sheets (dict): {シート名: [[セル値, ...], ...]}（1行目はヘッダー）
+            error_rate (float): リクエストがエラーになる確率（クォータ超過等の模擬）
+            error_status (int): 注入するエラーのHTTPステータス
+        """
+        self.sheets = sheets or {}
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.calls = {'spreadsheets.get': 0, 'get': 0, 'batchGet': 0, 'update': 0, 'batchUpdate': 0}
+        self.errors = 0
+        self.cells_read = 0
+        self.cells_written = 0
+        self._lock = threading.Lock()
+
+    def spreadsheets(self):
+        return _Spreadsheets(self)
+
+    def _inject_error(self):
+        """error_rateの確率でHttpErrorを送出（ロック取得中に呼び出す）"""
+        if self.error_rate and random.random() < self.error_rate:
+            self.errors += 1
+            resp = httplib2.Response({'status': self.error_status})
+            raise HttpError(resp, b'{"error": {"message": "Injected error"}}')
+
+    def _read(self, range_name):
+        sheet, start_row, end_row, start_col, end_col = parse_a1(range_name)
+        grid = self.sheets.get(sheet, [])
+        last_row = len(grid) - 1 if end_row is None else min(end_row, len(grid) - 1)
+
+        values = []
+        for row in grid[start_row:last_row + 1]:
+            cells = list(row[start_col:] if end_col is None else row[start_col:end_col + 1])
+            # Sheets APIと同様に行末の空セルを返さない
+            while cells and cells[-1] == '':
+                cells.pop()
+            values.append(cells)
+        # Sheets APIと同様に末尾の空行を返さない
+        while values and not any(values[-1]):
+            values.pop()
+        self.cells_read += sum(len(v) for v in values)
+        return {'range': range_name, 'majorDimension': 'ROWS', 'values': values} if values \
+            else {'range': range_name, 'majorDimension': 'ROWS'}
+
+    def _write(self, range_name, values):
+        sheet, start_row, _, start_col, _ = parse_a1(range_name)
+        grid = self.sheets.setdefault(sheet, [])
+        for r, row_values in enumerate(values):
+            while len(grid) <= start_row + r:
+                grid.append([])
+            row = grid[start_row + r]
+            for c, value in enumerate(row_values):
+                while len(row) <= start_col + c:
+                    row.append('')
+                row[start_col + c] = value
+                self.cells_written += 1
+
+    def get_spreadsheet(self, spreadsheetId, **kwargs):
+        """spreadsheets().get 相当（シートのプロパティのみ返す）"""
+        def run():
+            with self._lock:
+                self.calls['spreadsheets.get'] += 1
+                self._inject_error()
+                return {'sheets': [
+                    {'properties': {'title': title,
+                                    'gridProperties': {'rowCount': max(len(grid), 1000),
+                                                       'columnCount': 26}}}
+                    for title, grid in self.sheets.items()
+                ]}
+        return _Request(run)
+
+    def get(self, spreadsheetId, range, **kwargs):
+        def run():
+            with self._lock:
+                self.calls['get'] += 1
+                self._inject_error()
+                return self._read(range)
+        return _Request(run)
+
+    def batchGet(self, spreadsheetId, ranges, **kwargs):
+        def run():
+            with self._lock:
+                self.calls['batchGet'] += 1
+                self._inject_error()
+                return {'valueRanges': [self._read(r) for r in ranges]}
+        return _Request(run)
+
+    def update(self, spreadsheetId, range, valueInputOption, body):
+        def run():
+            with self._lock:
+                self.calls['update'] += 1
+                self._inject_error()
+                self._write(range, body['values'])
+                return {'updatedRange': range}
+        return _Request(run)
+
+    def batchUpdate(self, spreadsheetId, body):
+        def run():
+            with self._lock:
+                self.calls['batchUpdate'] += 1
+                self._inject_error()
+                for item in body['data']:
+                    self._write(item['range'], item['values'])
+                return {'totalUpdatedCells': sum(len(v) for d in body['data'] for v in d['values'])}
+        return _Request(run)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+HTTP接続プール共有モジュール
+OpenAIクライアント間で共有するkeep-alive対応のhttpxクライアントを提供し、
+接続の新規作成・再利用・待機の統計を記録する
+"""
+
+import os
+import threading
+import time
+
+import httpx
+
+# 接続待ちとみなす閾値（秒）
+POOL_WAIT_THRESHOLD = 0.001
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class PoolStats:
+    """接続プールの統計（スレッドセーフ）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.tls_handshakes = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+
+    def record(self, opened, tls, wait):
+        with self._lock:
+            self.requests += 1
+            if opened:
+                self.connections_opened += 1
+            else:
+                self.connections_reused += 1
+            if tls:
+                self.tls_handshakes += 1
+            if wait >= POOL_WAIT_THRESHOLD:
+                self.waited += 1
+                self.wait_seconds += wait
+
+    def snapshot(self):
+        """統計の辞書を返す"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'connections_opened': self.connections_opened,
+                'connections_reused': self.connections_reused,
+                'tls_handshakes': self.tls_handshakes,
+                'waited': self.waited,
+                'wait_seconds': round(self.wait_seconds, 3),
+            }
+
+
+class SharedHTTPPool:
+    """keep-alive・HTTP/2対応の共有httpxクライアント"""
+
+    def __init__(self, max_connections=None, max_keepalive=None, keepalive_expiry=None,
+                 http2=None, timeout=None, connect_timeout=None):
+        """
+        Args:
+            max_connections (int): 最大同時接続数（OPENAI_HTTP_MAX_CONNECTIONS）
+            max_keepalive (int): 保持するkeep-alive接続数（OPENAI_HTTP_MAX_KEEPALIVE）
+            keepalive_expiry (float): keep-alive接続の保持秒数（OPENAI_HTTP_KEEPALIVE_EXPIRY）
+            http2 (bool): HTTP/2を使用するか（OPENAI_HTTP2、h2未インストール時は無効）
+            timeout (float): 読み書きのタイムアウト秒数（OPENAI_HTTP_TIMEOUT）
+            connect_timeout (float): 接続タイムアウト秒数（OPENAI_HTTP_CONNECT_TIMEOUT）
+        """
+        self.max_connections = max_connections or _env_int('OPENAI_HTTP_MAX_CONNECTIONS', 10)
+        self.max_keepalive = max_keepalive or _env_int('OPENAI_HTTP_MAX_KEEPALIVE', self.max_connections)
+        self.keepalive_expiry = keepalive_expiry or _env_float('OPENAI_HTTP_KEEPALIVE_EXPIRY', 30.0)
+        self.timeout = timeout or _env_float('OPENAI_HTTP_TIMEOUT', 120.0)
+        self.connect_timeout = connect_timeout or _env_float('OPENAI_HTTP_CONNECT_TIMEOUT', 10.0)
+
+        if http2 is None:
+            http2 = os.getenv('OPENAI_HTTP2', 'true').lower() == 'true'
+        if http2 and not _http2_available():
+            print("  ⚠️  h2 is not installed; falling back to HTTP/1.1 (pip install 'httpx[http2]')")
+            http2 = False
+        self.http2 = http2
+
+        self.stats = PoolStats()
+        self.client = httpx.Client(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            event_hooks={'request': [self._attach_trace]},
+        )
+
+    def _attach_trace(self, request):
+        """httpcoreのtraceイベントで接続の新規作成・再利用・待機時間を記録"""
+        started = time.perf_counter()
+        state = {'done': False, 'opened': False, 'tls': False}
+
+        def trace(event_name, info):
+            if state['done']:
+                return
+            if event_name == 'connection.connect_tcp.started':
+                state['opened'] = True
+                state['wait'] = time.perf_counter() - started
+            elif event_name == 'connection.start_tls.complete':
+                state['tls'] = True
+            elif event_name.endswith('send_request_headers.started'):
+                wait = state.get('wait', time.perf_counter() - started)
+                state['done'] = True
+                self.stats.record(state['opened'], state['tls'], wait)
+
+        request.extensions['trace'] = trace
+
+    def close(self):
+        self.client.close()
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_shared_pool():
+    """プロセス内で共有する接続プールを取得（初回呼び出し時に作成）"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = SharedHTTPPool()
+        return _shared_pool
+
+
+def get_shared_http_client():
+    """OpenAI(http_client=...)に渡す共有httpxクライアントを取得"""
+    return get_shared_pool().client
+
+
+def get_pool_stats():
+    """共有プールの統計を取得（未作成の場合はNone）"""
+    pool = _shared_pool
+    return pool.stats.snapshot() if pool else None
+
+
+def close_shared_pool():
+    """共有プールを閉じる"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is not None:
+            _shared_pool.close()
+            _shared_pool = None
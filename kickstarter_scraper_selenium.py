@@ -4,6 +4,7 @@ Kickstarterスクレイピングモジュール（Selenium版）
 実際のブラウザを使用してBot検出を回避
 """
 
+import html as html_entities
 import time
 import random
 import re
@@ -16,17 +17,69 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 
+from circuit_breaker import get_scrape_breaker
+from profiling import profiled_run
+from project_record import STATUS_BLOCKED, STATUS_ERROR, STATUS_NOT_FOUND, ProjectRecord
+from prompt_templates import format_end_date, format_reward_tiers
+from tracing import span
+
+# ページの種類（classify_page の戻り値）
+PAGE_PROJECT = 'project'
+PAGE_BLOCKED = 'blocked'
+PAGE_NOT_FOUND = 'not_found'
+PAGE_UNKNOWN = 'unknown'
+
+# プロジェクトページにのみ含まれる要素（埋め込みJSON・支援額の属性）
+_PROJECT_MARKERS = re.compile(r'window\.current_project|data-pledged=|"pledged"\s*:', re.I)
+
+# チャレンジページ（Cloudflare・PerimeterX）・ブロックページ・レート制限
+_BLOCK_MARKERS = re.compile(
+    r'/cdn-cgi/challenge-platform|cf-turnstile|cf-chl-|<title>\s*Just a moment|Attention Required!'
+    r'|px-captcha|_pxAppId|Access to this page has been denied|<title>\s*Access Denied'
+    r'|verify (?:that )?you are (?:a )?human|Too Many Requests', re.I)
+
+# 存在しないプロジェクト（削除・非公開・URL誤り）
+_NOT_FOUND_MARKERS = re.compile(
+    r"<title>[^<]*(?:\b404\b|Page not found)|(?:can.t|couldn.t) find (?:that|this|the) page"
+    r"|project (?:is )?(?:no longer|not) available", re.I)
+
+
+def classify_page(html):
+    """
+    読み込んだページの種類を判定
+
+    Args:
+        html (str): ページのHTML
+
+    Returns:
+        tuple: (PAGE_PROJECT / PAGE_BLOCKED / PAGE_NOT_FOUND / PAGE_UNKNOWN, 判定理由)
+    """
+    if _PROJECT_MARKERS.search(html):
+        return PAGE_PROJECT, None
+    match = _BLOCK_MARKERS.search(html)
+    if match:
+        marker = re.sub(r'<title>\s*', '', match.group(0))
+        return PAGE_BLOCKED, f'Blocked by bot detection ({marker})'
+    if _NOT_FOUND_MARKERS.search(html):
+        return PAGE_NOT_FOUND, 'Project page not found'
+    # ブロックの目印が無いページ（メンテナンス・マークアップ変更等）はブロックとして扱わない
+    # （'不明'/0のレコードは作らず、ブレーカーも動かさない）
+    return PAGE_UNKNOWN, 'Unrecognized page without project data'
+
 
 class KickstarterScraperSelenium:
     """Selenium を使用したKickstarterスクレイパー"""
 
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, breaker=None):
         """
         Args:
             headless (bool): ヘッドレスモード（画面非表示）
+            breaker (CircuitBreaker, optional): Bot検出時のサーキットブレーカー
+                （省略時はプロセス内で共有するもの）
         """
         self.headless = headless
         self.driver = None
+        self.breaker = breaker if breaker is not None else get_scrape_breaker()
 
     def _init_driver(self):
         """Chromeドライバーを初期化"""
@@ -81,50 +134,94 @@ class KickstarterScraperSelenium:
             url (str): KickstarterプロジェクトURL
 
         Returns:
-            dict: プロジェクト情報
+            ProjectRecord: プロジェクト情報（取得に失敗した場合は status='error'、
+                チャレンジページ・ブレーカーが開いている場合は 'blocked'、存在しない場合は 'not_found'）
         """
+        # Bot検出が続いている間はページを読み込まない（ブラウザも起動しない）
+        if not self.breaker.allow():
+            return self._error_response(
+                url, f"Scraping paused by circuit breaker (retry in {self.breaker.retry_in():.0f}s)",
+                STATUS_BLOCKED)
+
         if not self.driver:
-            if not self._init_driver():
+            with span('driver_start'):
+                started = self._init_driver()
+            if not started:
+                self.breaker.release()
                 return self._error_response(url, "Failed to initialize Chrome driver")
 
         try:
             print(f"Fetching: {url}")
-
-            # ページにアクセス
-            self.driver.get(url)
-
-            # ページロード待機
-            time.sleep(random.uniform(3, 5))
-
-            # HTMLを取得
-            html = self.driver.page_source
+            with span('page_load') as attrs:
+                html = self._load_page(url)
+                attrs['bytes'] = len(html)
+                page_type, reason = classify_page(html)
+                attrs['page'] = page_type
+
+            if page_type == PAGE_BLOCKED:
+                print(f"✗ {reason}")
+                self.breaker.record_failure()
+                return self._error_response(url, reason, STATUS_BLOCKED)
+            if page_type == PAGE_UNKNOWN:
+                print(f"✗ {reason}")
+                # ブロックかどうか判定できないため、ブレーカーの状態は変えない
+                self.breaker.release()
+                return self._error_response(url, reason)
+            self.breaker.record_success()
+            if page_type == PAGE_NOT_FOUND:
+                print(f"✗ {reason}")
+                return self._error_response(url, reason, STATUS_NOT_FOUND)
 
             # データ抽出（既存のメソッドを使用）
-            data = {
-                'url': url,
-                'product_name': self._extract_product_name(html),
-                'pledge_amounts': self._extract_pledge_amounts(html),
-                'funding_total_usd': self._extract_funding_total(html),
-                'funding_total_jpy': 0,
-                'backers': self._extract_backers(html),
-                'category': self._extract_category(html),
-                'end_date': self._extract_end_date(html),
-                'description': self._extract_description(html),
-                'goal_amount_usd': self._extract_goal_amount(html),
-                'fetched_at': datetime.now().isoformat()
-            }
-
-            # 円換算
-            if data['funding_total_usd'] > 0:
-                data['funding_total_jpy'] = int(data['funding_total_usd'] * 150)
-
-            print(f"✓ Data extracted: {data['product_name']}")
+            with span('extract'):
+                data = self._extract_data(url, html)
+
+            print(f"✓ Data extracted: {data.product_name}")
             return data
 
         except Exception as e:
             print(f"✗ Error: {e}")
+            # ブロックかどうか判定できないため、ブレーカーの状態は変えない
+            self.breaker.release()
             return self._error_response(url, str(e))
 
+    def _extract_data(self, url, html):
+        """ページのHTMLからプロジェクト情報を抽出"""
+        currency, usd_rate = self._extract_currency(html)
+        return ProjectRecord(
+            url=url,
+            product_name=self._extract_product_name(html),
+            description=self._extract_description(html),
+            category=self._extract_category(html),
+            currency=currency,
+            usd_rate=usd_rate,
+            reward_tiers=self._extract_reward_tiers(html),
+            funding_total=self._extract_funding_total(html),
+            goal_amount=self._extract_goal_amount(html),
+            backers=self._extract_backers(html),
+            end_timestamp=self._extract_end_timestamp(html),
+            fetched_at=time.time(),
+        )
+
+    def _load_page(self, url):
+        """
+        ページを読み込んでHTMLを返す（リプレイ用スクレイパーで差し替え可能）
+
+        Args:
+            url (str): KickstarterプロジェクトURL
+
+        Returns:
+            str: ページのHTML
+        """
+        # ページにアクセス
+        self.driver.get(url)
+
+        # ページロード待機
+        time.sleep(random.uniform(3, 5))
+
+        # HTMLを取得
+        return self.driver.page_source
+
     def close(self):
         """ドライバーを閉じる"""
         if self.driver:
@@ -144,33 +241,29 @@ class KickstarterScraperSelenium:
         """製品名を抽出"""
         match = re.search(r'<meta\s+property="og:title"\s+content="([^"]+)"', html, re.I)
         if match:
-            return match.group(1).replace(' — Kickstarter', '').strip()
+            return html_entities.unescape(match.group(1)).replace(' — Kickstarter', '').strip()
 
         match = re.search(r'<title>([^<]+)</title>', html, re.I)
         if match:
-            return match.group(1).replace(' — Kickstarter', '').strip()
+            return html_entities.unescape(match.group(1)).replace(' — Kickstarter', '').strip()
 
         return '不明'
 
-    def _extract_pledge_amounts(self, html):
-        """プレッジ金額を抽出"""
+    def _extract_reward_tiers(self, html):
+        """リワードの最低プレッジ額を抽出（昇順のタプル、取得できない場合は空）"""
         amounts = set()
 
         pattern = re.compile(r'data-reward[^>]*minimum[^>]*=["\'](\d+)["\']', re.I)
         for match in pattern.finditer(html):
             amounts.add(int(match.group(1)))
 
-        pattern = re.compile(r'"minimum"[^}]*:\s*(\d+)', re.I)
+        pattern = re.compile(r'"minimum"\s*:\s*"?(\d+)', re.I)
         for match in pattern.finditer(html):
             amount = int(match.group(1))
             if 0 < amount < 100000:
                 amounts.add(amount)
 
-        if not amounts:
-            return '不明'
-
-        sorted_amounts = sorted(amounts)
-        return ', '.join([f'${amt} (約{int(amt * 150):,}円)' for amt in sorted_amounts])
+        return tuple(sorted(amounts))
 
     def _extract_funding_total(self, html):
         """総支援額を抽出"""
@@ -182,14 +275,29 @@ class KickstarterScraperSelenium:
             except ValueError:
                 pass
 
-        match = re.search(r'"pledged"[^}]*"amount"[^}]*:\s*"?(\d+(?:\.\d+)?)"?', html, re.I)
+        # "pledged":123.0 または "pledged":{"amount":"123.0",...}（同じオブジェクト内の他の数値を拾わない）
+        match = re.search(r'"pledged"\s*:\s*(?:\{[^}]*?"amount"\s*:\s*)?"?(\d+(?:\.\d+)?)', html, re.I)
         if match:
             try:
                 return float(match.group(1))
             except ValueError:
                 pass
 
-        return 0
+        return 0.0
+
+    def _extract_currency(self, html):
+        """通貨とUSD換算レートを抽出（取得できない場合はUSD）"""
+        currency = 'USD'
+        match = re.search(r'data-currency=["\']([A-Z]{3})["\']', html) or \
+            re.search(r'"currency"\s*:\s*"([A-Z]{3})"', html)
+        if match:
+            currency = match.group(1)
+
+        usd_rate = 1.0
+        match = re.search(r'"(?:static_)?usd_rate"\s*:\s*"?(\d+(?:\.\d+)?)"?', html)
+        if match and currency != 'USD':
+            usd_rate = float(match.group(1))
+        return currency, usd_rate
 
     def _extract_backers(self, html):
         """支援者数を抽出"""
@@ -197,7 +305,7 @@ class KickstarterScraperSelenium:
         if match:
             return int(match.group(1))
 
-        match = re.search(r'"backers_count"[^}]*:\s*(\d+)', html, re.I)
+        match = re.search(r'"backers_count"\s*:\s*(\d+)', html, re.I)
         if match:
             return int(match.group(1))
 
@@ -213,34 +321,38 @@ class KickstarterScraperSelenium:
         if match:
             return match.group(1)
 
-        match = re.search(r'"category"[^}]*"name"[^}]*:\s*"([^"]+)"', html, re.I)
+        match = re.search(r'"category"\s*:\s*\{[^}]*?"name"\s*:\s*"([^"]+)"', html, re.I)
         if match:
             return match.group(1)
 
         return '不明'
 
-    def _extract_end_date(self, html):
-        """終了日を抽出"""
+    def _extract_end_timestamp(self, html):
+        """終了日時を抽出（UNIX時刻、取得できない場合はNone）"""
         match = re.search(r'data-end[_-]time=["\']([^"\']+)["\']', html, re.I)
         if match:
             try:
                 timestamp = int(match.group(1))
-                date = datetime.fromtimestamp(timestamp)
-                return date.strftime('%Y年%m月%d日')
-            except (ValueError, OSError):
+                datetime.fromtimestamp(timestamp)  # 範囲外の値を除外
+                return timestamp
+            except (ValueError, OSError, OverflowError):
                 pass
 
-        return '不明'
+        match = re.search(r'"deadline"\s*:\s*(\d{9,11})', html)
+        if match:
+            return int(match.group(1))
+
+        return None
 
     def _extract_description(self, html):
         """製品説明を抽出"""
         match = re.search(r'<meta\s+property="og:description"\s+content="([^"]+)"', html, re.I)
         if match:
-            return match.group(1)[:500]
+            return html_entities.unescape(match.group(1))[:500]
 
         match = re.search(r'<meta\s+name="description"\s+content="([^"]+)"', html, re.I)
         if match:
-            return match.group(1)[:500]
+            return html_entities.unescape(match.group(1))[:500]
 
         return '説明なし'
 
@@ -254,24 +366,15 @@ class KickstarterScraperSelenium:
             except ValueError:
                 pass
 
-        return 0
+        match = re.search(r'"goal"\s*:\s*"?(\d+(?:\.\d+)?)', html, re.I)
+        if match:
+            return float(match.group(1))
+
+        return 0.0
 
-    def _error_response(self, url, error_message):
+    def _error_response(self, url, error_message, status=STATUS_ERROR):
         """エラーレスポンス"""
-        return {
-            'url': url,
-            'product_name': '取得失敗',
-            'pledge_amounts': '不明',
-            'funding_total_usd': 0,
-            'funding_total_jpy': 0,
-            'backers': 0,
-            'category': '不明',
-            'end_date': '不明',
-            'description': f'エラー: {error_message}',
-            'goal_amount_usd': 0,
-            'fetched_at': datetime.now().isoformat(),
-            'error': error_message
-        }
+        return ProjectRecord.failed(url, error_message, status)
 
 
 def test_selenium_scraper():
@@ -289,19 +392,21 @@ def test_selenium_scraper():
         print("\n" + "=" * 60)
         print("Results")
         print("=" * 60)
-        print(f"Product Name: {data['product_name']}")
-        print(f"Pledge Amounts: {data['pledge_amounts']}")
-        print(f"Funding Total: ${data['funding_total_usd']:,.2f} (約{data['funding_total_jpy']:,}円)")
-        print(f"Backers: {data['backers']:,}")
-        print(f"Category: {data['category']}")
-        print(f"End Date: {data['end_date']}")
-        print(f"Description: {data['description'][:100]}...")
+        print(f"Product Name: {data.product_name}")
+        print(f"Reward Tiers: {format_reward_tiers(data)}")
+        print(f"Funding Total: {data.funding_total:,.2f} {data.currency} (約{data.funding_total_jpy:,}円)")
+        print(f"Backers: {data.backers:,}")
+        print(f"Category: {data.category}")
+        print(f"End Date: {format_end_date(data.end_timestamp)}")
+        print(f"Description: {data.description[:100]}...")
 
-        if 'error' in data:
-            print(f"\n⚠️  Error: {data['error']}")
+        if not data.ok:
+            print(f"\n⚠️  Error: {data.error}")
 
     print("\n" + "=" * 60)
 
 
 if __name__ == '__main__':
-    test_selenium_scraper()
+    # PROFILE_MODE=cprofile / sample でプロファイル（logs/profile-*）
+    with profiled_run('scraper'):
+        test_selenium_scraper()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+エンドツーエンド負荷試験ハーネス
+フェイクOpenAIサーバー・フェイクSheets・HTMLフィクスチャに対して
+check_kickstarter.main() を実行し、処理速度とリトライ・レート制限の挙動を計測する
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import check_kickstarter
+from fake_openai_server import FakeOpenAIServer
+from fake_sheets_service import FakeSheetsService
+from replay_scraper import ReplayScraper
+from sheets_client import GoogleSheetsClient
+from sheets_quota import SheetsQuotaScheduler
+
+HEADER = ['No', 'URL', '商品名', 'メーカー名', 'クリエーター名', '', '', '', '', '', '日本語レポート', '英語レポート']
+
+
+class _ScaledTime:
+    """check_kickstarter内の待機時間（レート制限対策のsleep）を縮める"""
+
+    def __init__(self, scale):
+        self.scale = scale
+
+    def sleep(self, seconds):
+        if self.scale > 0:
+            time.sleep(seconds * self.scale)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+# Bot検出を模擬する行に割り当てるチャレンジページ（fixtures/kickstarter/errors）
+BLOCKED_FIXTURE = 'blocked_cloudflare'
+
+
+def build_grid(row_count, fixture_names, blocked_after=None):
+    """負荷試験用のシート（ヘッダー＋未処理行）を作成（blocked_after 以降の行はチャレンジページを返す）"""
+    grid = [list(HEADER)]
+    for i in range(row_count):
+        fixture = fixture_names[i % len(fixture_names)]
+        if blocked_after is not None and i >= blocked_after:
+            fixture = BLOCKED_FIXTURE
+        grid.append([
+            str(i + 1),
+            f'https://www.kickstarter.com/projects/loadtest{i}/{fixture}?ref=load-test',
+            '',
+            f'Maker {i}',
+            f'Creator {i}',
+        ])
+    return grid
+
+
+def run_load_test(rows=20, latency='fixed:0.2', error_rate=0.0, rate_limit_rate=0.0,
+                  retry_after=0.2, page_load_delay=0.0, pacing_scale=0.0, dedup=False,
+                  sheets_error_rate=0.0, targets=1, profile=None, blocked_after=None):
+    """
+    負荷試験を実行（targets > 1 の場合は行を複数のシートに分けて1回の実行で処理）
+
+    Returns:
+        dict: 計測結果
+    """
+    server = FakeOpenAIServer(latency=latency, error_rate=error_rate,
+                              rate_limit_rate=rate_limit_rate, retry_after=retry_after).start()
+    sheet_names = ['kickstarter'] if targets <= 1 else [f'client{i + 1}' for i in range(targets)]
+    scraper = ReplayScraper(page_load_delay=page_load_delay)
+    fixtures = sorted(scraper.fixtures)
+    grids = {}
+    for i, name in enumerate(sheet_names):
+        grid = build_grid(rows, fixtures, blocked_after)
+        grids[name] = [grid[0]] + grid[1:][i::len(sheet_names)]
+    service = FakeSheetsService(grids, error_rate=sheets_error_rate)
+    # バックオフを短くしたクォータ管理（リトライの挙動のみ確認する）
+    quota = SheetsQuotaScheduler(read_per_minute=600, write_per_minute=600, backoff_base=0.05)
+
+    os.environ.update({
+        'OPENAI_BASE_URL': server.base_url,
+        'OPENAI_API_KEY': 'sk-load-test',
+        'SPREADSHEET_ID': 'load-test',
+        'SHEET_NAME': sheet_names[0],
+        'DEDUP_MODE': 'reuse' if dedup else 'off',
+        # トレースログ・プロファイルは一時ディレクトリではなく実行したディレクトリに残す
+        'TRACE_LOG_DIR': os.path.abspath(os.getenv('TRACE_LOG_DIR', 'logs')),
+        'SHEETS_TARGETS': json.dumps([
+            {'sheet_name': name, 'business_context': f'Load test client {name}'} for name in sheet_names
+        ]) if targets > 1 else '',
+    })
+
+    original = (check_kickstarter.create_scraper, check_kickstarter.create_sheets_client, check_kickstarter.time)
+    check_kickstarter.create_scraper = lambda: scraper
+    check_kickstarter.create_sheets_client = lambda spreadsheet_id, name: GoogleSheetsClient(
+        spreadsheet_id, name, service=service, quota=quota)
+    check_kickstarter.time = _ScaledTime(pacing_scale)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # data/ 以下のキャッシュ等を本番ディレクトリに書き込まない
+        os.chdir(workdir)
+        started = time.perf_counter()
+        try:
+            check_kickstarter.main(profile=profile)
+        finally:
+            elapsed = time.perf_counter() - started
+            os.chdir(cwd)
+            (check_kickstarter.create_scraper, check_kickstarter.create_sheets_client,
+             check_kickstarter.time) = original
+            server.stop()
+
+    reports = [row[10] if len(row) > 10 else '' for name in sheet_names for row in service.sheets[name][1:]]
+    failed = sum(1 for r in reports if not r or r.startswith('エラー'))
+
+    return {
+        'rows': rows,
+        'targets': len(sheet_names),
+        'elapsed_seconds': round(elapsed, 2),
+        'rows_per_minute': round(rows / elapsed * 60, 1) if elapsed else 0.0,
+        'rows_failed': failed,
+        'pages_served': scraper.pages_served,
+        'breaker': scraper.breaker.stats(),
+        'openai': server.stats.snapshot(),
+        'sheets_calls': dict(service.calls),
+        'sheets_errors_injected': service.errors,
+        'sheets_quota': quota.snapshot(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end load test against fake OpenAI/Sheets backends')
+    parser.add_argument('--rows', type=int, default=20)
+    parser.add_argument('--latency', default='fixed:0.2')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=float, default=0.2)
+    parser.add_argument('--page-load-delay', type=float, default=0.0,
+                        help='Simulated browser page load time per row (seconds)')
+    parser.add_argument('--pacing-scale', type=float, default=0.0,
+                        help='Multiplier for the runner sleeps between steps (1.0 = production pacing)')
+    parser.add_argument('--dedup', action='store_true', help='Keep duplicate detection enabled')
+    parser.add_argument('--sheets-error-rate', type=float, default=0.0,
+                        help='Probability that a Sheets API call returns 429')
+    parser.add_argument('--targets', type=int, default=1,
+                        help='Split the rows across this many sheets processed in one run')
+    parser.add_argument('--blocked-after', type=int,
+                        help='Serve a bot-detection challenge page for rows from this index on (outage simulation)')
+    parser.add_argument('--profile', choices=['cprofile', 'sample'],
+                        help='Profile the run (stages from PROFILE_STAGES); written next to the trace log')
+    args = parser.parse_args()
+
+    result = run_load_test(args.rows, args.latency, args.error_rate, args.rate_limit_rate,
+                           args.retry_after, args.page_load_delay, args.pacing_scale, args.dedup,
+                           args.sheets_error_rate, args.targets, args.profile, args.blocked_after)
+
+    openai_stats = result['openai']
+    print("\n" + "=" * 60)
+    print("Load Test Result")
+    print("=" * 60)
+    print(f"Rows: {result['rows']} across {result['targets']} sheets in {result['elapsed_seconds']}s "
+          f"({result['rows_per_minute']} rows/min)")
+    print(f"Rows with errors: {result['rows_failed']}")
+    print(f"Pages served: {result['pages_served']}")
+    if result['breaker']['trips']:
+        print(f"Scrape circuit breaker: {result['breaker']}")
+    print(f"OpenAI requests: {openai_stats['requests']} "
+          f"(completed {openai_stats['completed']}, 429 {openai_stats['rate_limited']}, "
+          f"5xx {openai_stats['errors']}, max in-flight {openai_stats['max_in_flight']})")
+    retries = openai_stats['requests'] - openai_stats['completed']
+    print(f"Requests absorbed by client retries or failed: {retries}")
+    print(f"Sheets calls: {result['sheets_calls']} ({result['sheets_errors_injected']} errors injected)")
+    print(f"Sheets quota: {result['sheets_quota']}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+優先度スケジューラーモジュール
+未処理の行をクライアント指定の優先度・キャンペーン終了までの残り時間・支援額の伸び
+（キャッシュ済みのスクレイピング結果）で並べ替え、実行時間の上限内で価値の高い行から処理する
+"""
+
+import math
+import time
+
+# スコアの重み（クライアント指定の優先度が最も強い）
+CLIENT_WEIGHT = 10.0
+DEADLINE_WEIGHT = 1.0
+MOMENTUM_WEIGHT = 0.5
+
+# この時間以内に終了するキャンペーンほど優先（時間）
+DEADLINE_HORIZON_HOURS = 14 * 24
+
+# 優先度列の文字表記
+_PRIORITY_WORDS = {
+    '最優先': 3, '至急': 3, 'urgent': 3,
+    '高': 2, 'high': 2,
+    '中': 1, 'medium': 1,
+    '': 0, 'normal': 0,
+    '低': -1, 'low': -1,
+}
+
+
+def parse_client_priority(value):
+    """
+    優先度列の値を数値に変換
+
+    Args:
+        value (str): 数値、または '高' / 'high' 等の表記
+
+    Returns:
+        float: 優先度（大きいほど先に処理、未指定は0）
+    """
+    text = str(value or '').strip().lower()
+    if text in _PRIORITY_WORDS:
+        return float(_PRIORITY_WORDS[text])
+    try:
+        return float(text)
+    except ValueError:
+        return 0.0
+
+
+def deadline_score(end_timestamp, now):
+    """
+    終了日時によるスコア
+
+    Returns:
+        float: 終了済み 0.0 / 不明（未取得） 0.5 / 実施中 0.5〜1.0（終了が近いほど高い）
+    """
+    if end_timestamp is None:
+        return 0.5
+    hours_left = (end_timestamp - now) / 3600
+    if hours_left <= 0:
+        return 0.0
+    return 0.5 + 0.5 * max(0.0, 1 - hours_left / DEADLINE_HORIZON_HOURS)
+
+
+def funding_rate(record, previous):
+    """
+    直近2回のスクレイピング結果から支援額の伸び（USD/時間）を計算
+
+    Returns:
+        float or None: 伸び（スナップショットが1つしかない場合はNone）
+    """
+    if not record or not previous:
+        return None
+    hours = (record.fetched_at - previous.fetched_at) / 3600
+    if hours <= 0:
+        return None
+    return max(0.0, (record.funding_total_usd - previous.funding_total_usd) / hours)
+
+
+def prioritize(rows, project_cache=None, now=None):
+    """
+    未処理の行を優先度の高い順に並べ替え（同点はシートの順）
+
+    Args:
+        rows (list): get_unprocessed_rows の戻り値
+        project_cache (ProjectCache, optional): 過去のスクレイピング結果
+        now (float, optional): 現在時刻（UNIX時刻）
+
+    Returns:
+        list: 'priority_score' を追加した行のリスト
+    """
+    now = now or time.time()
+
+    cached = []
+    for row in rows:
+        record = project_cache.get(row['url']) if project_cache else None
+        previous = project_cache.previous(row['url']) if project_cache else None
+        cached.append((record, funding_rate(record, previous)))
+    max_rate = max([rate for _, rate in cached if rate] or [0.0])
+
+    for row, (record, rate) in zip(rows, cached):
+        end_timestamp = record.end_timestamp if record else None
+        deadline = deadline_score(end_timestamp, now)
+
+        momentum = 0.0
+        if deadline > 0 and record:
+            if rate is not None and max_rate > 0:
+                momentum = math.log1p(rate) / math.log1p(max_rate)
+            elif record.goal_amount:
+                # 伸びが計算できない場合は達成率で代用（200%で頭打ち、伸びより弱く評価）
+                momentum = 0.5 * min(record.funding_total / record.goal_amount, 2.0) / 2
+
+        row['priority_score'] = round(
+            CLIENT_WEIGHT * parse_client_priority(row.get('priority'))
+            + DEADLINE_WEIGHT * deadline
+            + MOMENTUM_WEIGHT * momentum, 4)
+
+    return sorted(rows, key=lambda r: (-r['priority_score'], r['row_number']))
+
+
+class TimeBudget:
+    """実行時間の上限（1行あたりの平均処理時間から、次の行が間に合うかを判定）"""
+
+    def __init__(self, seconds):
+        """
+        Args:
+            seconds (float): 上限（秒）
+        """
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.rows = 0
+        self.row_seconds = 0.0
+
+    @property
+    def remaining(self):
+        return self.seconds - (time.monotonic() - self.started)
+
+    def record_row(self, seconds):
+        self.rows += 1
+        self.row_seconds += seconds
+
+    def allows_next_row(self):
+        """残り時間で次の1行を処理できる見込みがあるか"""
+        estimate = self.row_seconds / self.rows if self.rows else 0.0
+        return self.remaining >= estimate and self.remaining > 0
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+処理台帳モジュール
+行ごとの処理状況（スクレイピング・日本語生成・英語生成・書き込み）と入力のハッシュを
+ローカルのSQLiteに記録し、シートのK列に頼らずに処理済みかを判定する
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from dedup import normalize_url
+
+DEFAULT_LEDGER_PATH = os.path.join('data', 'ledger.sqlite3')
+
+# 処理段階（記録順）
+STAGES = ('scraped', 'jp_generated', 'en_generated', 'written')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    spreadsheet_id  TEXT NOT NULL,
+    sheet_name      TEXT NOT NULL,
+    input_hash      TEXT NOT NULL,
+    row_number      INTEGER NOT NULL,
+    url_key         TEXT NOT NULL,
+    status          TEXT NOT NULL,
+    scraped_at      TEXT,
+    jp_generated_at TEXT,
+    en_generated_at TEXT,
+    written_at      TEXT,
+    scrape_hash     TEXT,
+    template_ids    TEXT,
+    error           TEXT,
+    updated_at      TEXT NOT NULL,
+    PRIMARY KEY (spreadsheet_id, sheet_name, input_hash)
+);
+CREATE INDEX IF NOT EXISTS rows_url ON rows (spreadsheet_id, sheet_name, url_key);
+CREATE INDEX IF NOT EXISTS rows_row ON rows (spreadsheet_id, sheet_name, row_number);
+"""
+
+
+def input_hash(url, product_name, maker_name, creator_name):
+    """
+    行の入力（B〜E列）のハッシュ
+
+    Returns:
+        str: 正規化URLと各列を連結したSHA-1
+    """
+    payload = '\x1f'.join([normalize_url(url), product_name.strip(), maker_name.strip(), creator_name.strip()])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def record_hash(record):
+    """スクレイピング結果（ProjectRecord）のハッシュ（取得日時は除外）"""
+    payload = record.to_dict()
+    del payload['fetched_at']
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class ProcessingLedger:
+    """行ごとの処理状況を記録するSQLite台帳"""
+
+    def __init__(self, path=DEFAULT_LEDGER_PATH):
+        """
+        Args:
+            path (str): SQLiteファイルのパス
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def load_sheet(self, spreadsheet_id, sheet_name):
+        """
+        シート単位の台帳を一括取得（1クエリ）
+
+        Returns:
+            tuple: ({input_hash: 行情報}, 記録済みの正規化URLの集合, {行番号: その行に最後に記録した行情報})
+        """
+        cursor = self.conn.execute(
+            'SELECT * FROM rows WHERE spreadsheet_id = ? AND sheet_name = ? ORDER BY updated_at',
+            (spreadsheet_id, sheet_name)
+        )
+        entries = {}
+        url_keys = set()
+        by_row = {}
+        for row in cursor:
+            entry = dict(row)
+            entries[entry['input_hash']] = entry
+            url_keys.add(entry['url_key'])
+            # 更新日時の順に読み込むため、同じ行の後の記録で上書きされる
+            by_row[entry['row_number']] = entry
+        return entries, url_keys, by_row
+
+    def record_stage(self, spreadsheet_id, sheet_name, row_data, stage, status='in_progress', **fields):
+        """
+        処理段階の完了を記録
+
+        Args:
+            spreadsheet_id (str): スプレッドシートID
+            sheet_name (str): シート名
+            row_data (dict): get_unprocessed_rows の1行（input_hashを含む）
+            stage (str): STAGES のいずれか（Noneの場合は状態のみ更新）
+            status (str): 'in_progress' / 'written' / 'error' / 'write_failed'
+            **fields: scrape_hash, template_ids, error など追加で記録する値
+        """
+        now = datetime.now().isoformat()
+        values = {
+            'spreadsheet_id': spreadsheet_id,
+            'sheet_name': sheet_name,
+            'input_hash': row_data['input_hash'],
+            'row_number': row_data['row_number'],
+            'url_key': normalize_url(row_data['url']),
+            'status': status,
+            'updated_at': now,
+        }
+        if stage:
+            if stage not in STAGES:
+                raise ValueError(f'Unknown stage: {stage}')
+            values[f'{stage}_at'] = now
+        if 'template_ids' in fields and not isinstance(fields['template_ids'], str):
+            fields['template_ids'] = json.dumps(fields['template_ids'])
+        values.update(fields)
+
+        columns = ', '.join(values)
+        placeholders = ', '.join('?' for _ in values)
+        updates = ', '.join(
+            f'{c} = excluded.{c}' for c in values if c not in ('spreadsheet_id', 'sheet_name', 'input_hash')
+        )
+        self.conn.execute(
+            f'INSERT INTO rows ({columns}) VALUES ({placeholders}) '
+            f'ON CONFLICT (spreadsheet_id, sheet_name, input_hash) DO UPDATE SET {updates}',
+            list(values.values())
+        )
+        self.conn.commit()
+
+    def mark_write_failed(self, spreadsheet_id, sheet_name, row_number, error):
+        """書き込みに失敗した行を未完了に戻す"""
+        self.conn.execute(
+            "UPDATE rows SET status = 'write_failed', written_at = NULL, error = ?, updated_at = ? "
+            "WHERE spreadsheet_id = ? AND sheet_name = ? AND row_number = ? AND status = 'written'",
+            (error, datetime.now().isoformat(), spreadsheet_id, sheet_name, row_number)
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
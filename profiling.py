@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+プロファイリングモジュール
+PROFILE_MODE（または --profile）を指定した場合のみ、トレースの段階（スパン）単位でプロファイラーを有効にし、
+トレースログと同じディレクトリにプロファイルとフレームグラフ用の出力を書き込む。
+無効時はスパンごとに属性を1つ確認するだけで、計測のオーバーヘッドは無い
+
+- cprofile: 決定的プロファイラー（.prof: snakeviz / flameprof で可視化、.txt: 累積時間の上位）
+- sample:   サンプリングプロファイラー（.folded: flamegraph.pl / speedscope 用のスタック、.txt: 自己時間の上位）
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_MODES = ('off', 'cprofile', 'sample')
+
+# サンプリング間隔（ミリ秒）
+DEFAULT_SAMPLE_INTERVAL_MS = 5
+
+# .txt に出力する関数の数
+TOP_FUNCTIONS = 30
+
+
+class StageProfiler:
+    """指定した段階の実行中のみ有効になるプロファイラー（段階が未指定の場合は実行全体）"""
+
+    def __init__(self, mode, stages=None, interval_ms=DEFAULT_SAMPLE_INTERVAL_MS):
+        """
+        Args:
+            mode (str): 'cprofile' または 'sample'
+            stages (list, optional): プロファイルする段階名（'extract', 'openai_ja' 等、tracingのスパン名）
+            interval_ms (float): サンプリング間隔（'sample' の場合）
+        """
+        if mode not in PROFILE_MODES[1:]:
+            raise ValueError(f'Unknown PROFILE_MODE: {mode}')
+        self.mode = mode
+        self.stages = set(stages or [])
+        self.interval = interval_ms / 1000
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # cprofile: スレッドごとのプロファイラー（cProfileは呼び出したスレッドのみを計測する）
+        self._profiles = []
+        # sample: 計測中のスレッド → 段階名、収集したスタック
+        self._active = {}
+        self.samples = Counter()
+        self._sampler = None
+        self._stop = threading.Event()
+
+    def wants(self, name):
+        return not self.stages or name in self.stages
+
+    def enter(self, name):
+        """段階の開始（入れ子の場合は最も外側の段階のみ計測）"""
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        if depth:
+            return
+        if self.mode == 'cprofile':
+            profile = getattr(self._local, 'profile', None)
+            if profile is None:
+                profile = self._local.profile = cProfile.Profile()
+                with self._lock:
+                    self._profiles.append(profile)
+            try:
+                profile.enable()
+                self._local.enabled = True
+            except ValueError:
+                # 別のプロファイラーが有効な場合（Python 3.12以降は同時に1つまで）は計測しない
+                self._local.enabled = False
+        else:
+            with self._lock:
+                self._active[threading.get_ident()] = name
+            self._ensure_sampler()
+
+    def exit(self):
+        self._local.depth -= 1
+        if self._local.depth:
+            return
+        if self.mode == 'cprofile':
+            if self._local.enabled:
+                self._local.profile.disable()
+        else:
+            with self._lock:
+                self._active.pop(threading.get_ident(), None)
+
+    def _ensure_sampler(self):
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample_loop, name='stage-profiler', daemon=True)
+            self._sampler.start()
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, stage in active.items():
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                    frame = frame.f_back
+                stack.append(f'stage:{stage}')
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def write(self, output_dir, run_id):
+        """
+        プロファイルを書き込み
+
+        Returns:
+            list: 書き込んだファイルのパス
+        """
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        os.makedirs(output_dir, exist_ok=True)
+        base = os.path.join(output_dir, f'profile-{run_id}')
+        paths = []
+
+        if self.mode == 'cprofile':
+            with self._lock:
+                profiles = list(self._profiles)
+            if not profiles:
+                return paths
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(f'{base}.prof')
+            paths.append(f'{base}.prof')
+            text = io.StringIO()
+            pstats.Stats(f'{base}.prof', stream=text).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+            summary = text.getvalue()
+        elif self.samples:
+            with open(f'{base}.folded', 'w', encoding='utf-8') as f:
+                for stack, count in self.samples.most_common():
+                    f.write(f'{stack} {count}\n')
+            paths.append(f'{base}.folded')
+            summary = self._format_self_time()
+        else:
+            # 段階がサンプリング間隔より短い場合（抽出・プロンプト作成等はcprofileを使う）
+            summary = (f'0 samples: the profiled stages finished within the {self.interval * 1000:g} ms '
+                       f'sampling interval; use PROFILE_MODE=cprofile for short stages\n')
+
+        with open(f'{base}.txt', 'w', encoding='utf-8') as f:
+            f.write(f'mode: {self.mode}, stages: {", ".join(sorted(self.stages)) or "(all)"}\n\n')
+            f.write(summary)
+        paths.append(f'{base}.txt')
+        return paths
+
+    def _format_self_time(self):
+        """サンプルの末尾（実行中の関数）ごとの割合"""
+        total = sum(self.samples.values())
+        leaves = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        lines = [f'{total} samples ({self.interval * 1000:g} ms interval)', '']
+        for function, count in leaves.most_common(TOP_FUNCTIONS):
+            lines.append(f'{count / total:7.1%} {count:>7}  {function}')
+        return '\n'.join(lines) + '\n'
+
+
+def create_profiler(mode=None, stages=None):
+    """
+    環境変数（PROFILE_MODE / PROFILE_STAGES / PROFILE_INTERVAL_MS）からプロファイラーを作成
+
+    Args:
+        mode (str, optional): 'off' / 'cprofile' / 'sample'（Noneの場合はPROFILE_MODE）
+        stages (str, optional): カンマ区切りの段階名（Noneの場合はPROFILE_STAGES、空なら実行全体）
+
+    Returns:
+        StageProfiler or None: 無効の場合はNone
+    """
+    mode = (mode or os.getenv('PROFILE_MODE', 'off')).strip().lower()
+    if mode in ('', 'off', 'none'):
+        return None
+    stages = stages if stages is not None else os.getenv('PROFILE_STAGES', '')
+    return StageProfiler(
+        mode,
+        [s.strip() for s in stages.split(',') if s.strip()],
+        float(os.getenv('PROFILE_INTERVAL_MS', str(DEFAULT_SAMPLE_INTERVAL_MS))),
+    )
+
+
+@contextmanager
+def profiled_run(name, mode=None, stages=None):
+    """
+    各モジュールのテスト用エントリーポイントをプロファイル（PROFILE_MODE=off の場合は何もしない）
+
+    Args:
+        name (str): 実行IDに使う名前（'scraper' 等）
+        mode (str, optional): 'cprofile' / 'sample'（Noneの場合はPROFILE_MODE）
+        stages (str, optional): カンマ区切りの段階名（Noneの場合はPROFILE_STAGES）
+    """
+    from tracing import get_tracer
+
+    profiler = create_profiler(mode, stages)
+    if profiler is None:
+        yield None
+        return
+
+    tracer = get_tracer()
+    tracer.start_run(f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}", profiler)
+    try:
+        yield profiler
+    finally:
+        for path in tracer.finish():
+            print(f"🔬 Profile written: {path}")
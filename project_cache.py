@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+プロジェクトデータキャッシュモジュール
+スクレイピング済みのKickstarterプロジェクト情報（ProjectRecord）をローカルに蓄積する。
+PROJECT_CACHE_FORMAT=msgpack の場合はJSON Linesの代わりにmsgpackで保存する（読み込みが高速）
+"""
+
+import json
+import os
+
+from dedup import normalize_url
+from project_record import ProjectRecord, iter_msgpack_records
+
+DEFAULT_CACHE_PATH = os.path.join('data', 'projects.jsonl')
+MSGPACK_CACHE_PATH = os.path.join('data', 'projects.msgpack')
+
+CACHE_FORMATS = ('json', 'msgpack')
+
+
+def default_cache_path():
+    """PROJECT_CACHE_FORMAT（json / msgpack）に対応するキャッシュファイルのパス"""
+    cache_format = os.getenv('PROJECT_CACHE_FORMAT', 'json').strip().lower()
+    if cache_format not in CACHE_FORMATS:
+        raise ValueError(f'Unknown PROJECT_CACHE_FORMAT: {cache_format}')
+    return MSGPACK_CACHE_PATH if cache_format == 'msgpack' else DEFAULT_CACHE_PATH
+
+
+class ProjectCache:
+    """スクレイピング結果のキャッシュ（JSON Lines またはmsgpack形式、追記のみ）"""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str, optional): キャッシュファイルのパス（.msgpack の場合はmsgpack形式、
+                Noneの場合はPROJECT_CACHE_FORMATに対応するパス）
+        """
+        self.path = path or default_cache_path()
+        self.msgpack = self.path.endswith('.msgpack')
+        self._records = {}
+        # 1つ前のスナップショット（支援額の伸びの計算に使用）
+        self._previous = {}
+        # カテゴリごとの最終更新の通し番号（カテゴリ単位の集計の無効化判定に使用）
+        self._generation = 0
+        self._category_generations = {}
+        self._load()
+
+    def _load(self):
+        if self.msgpack and not os.path.exists(self.path) and os.path.exists(DEFAULT_CACHE_PATH):
+            # JSON Lines形式のキャッシュから移行
+            for record in self._read_jsonl(DEFAULT_CACHE_PATH):
+                self._remember(normalize_url(record.url), record)
+            self._append_all(self.snapshots())
+            return
+        if not os.path.exists(self.path):
+            return
+        if self.msgpack:
+            with open(self.path, 'rb') as f:
+                records = list(iter_msgpack_records(f))
+        else:
+            records = self._read_jsonl(self.path)
+        for record in records:
+            self._remember(normalize_url(record.url), record)
+
+    @staticmethod
+    def _read_jsonl(path):
+        records = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    # 旧形式（表示用文字列を含むdict）の行も読み込める
+                    records.append(ProjectRecord.from_dict(json.loads(line)))
+                except (json.JSONDecodeError, TypeError):
+                    # 書き込み途中で中断された行は無視
+                    continue
+        return records
+
+    def _append_all(self, records):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        if self.msgpack:
+            with open(self.path, 'ab') as f:
+                for record in records:
+                    f.write(record.to_msgpack())
+        else:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(record.to_json() + '\n')
+
+    def snapshots(self):
+        """1つ前のスナップショットを含む全レコード（書き込み順）"""
+        return list(self._previous.values()) + list(self._records.values())
+
+    def _remember(self, key, record):
+        self._generation += 1
+        self._category_generations[record.category] = self._generation
+        if key in self._records:
+            previous = self._records[key]
+            self._previous[key] = previous
+            # カテゴリが変わった場合は元のカテゴリも更新扱い
+            self._category_generations[previous.category] = self._generation
+        self._records[key] = record
+
+    @property
+    def version(self):
+        """キャッシュの版（ファイルサイズと更新時刻）。インデックス等の無効化判定に使用"""
+        if not os.path.exists(self.path):
+            return (0, 0)
+        stat = os.stat(self.path)
+        return (stat.st_size, int(stat.st_mtime_ns))
+
+    def category_version(self, category):
+        """カテゴリの版（そのカテゴリのレコードが追加・更新されるたびに変わる）"""
+        return self._category_generations.get(category, 0)
+
+    def get(self, url):
+        """
+        URLに対応する最新のプロジェクト情報を取得
+
+        Returns:
+            ProjectRecord or None: プロジェクト情報
+        """
+        return self._records.get(normalize_url(url))
+
+    def put(self, record):
+        """
+        プロジェクト情報を追記（エラーレスポンスは保存しない）
+
+        Args:
+            record (ProjectRecord): fetch_project_data の戻り値
+        """
+        if not record.ok:
+            return
+
+        self._append_all([record])
+        self._remember(normalize_url(record.url), record)
+
+    def previous(self, url):
+        """
+        URLに対応する1つ前のスナップショットを取得
+
+        Returns:
+            ProjectRecord or None: プロジェクト情報
+        """
+        return self._previous.get(normalize_url(url))
+
+    def records(self):
+        """全プロジェクトの最新情報"""
+        return list(self._records.values())
+
+    def __len__(self):
+        return len(self._records)
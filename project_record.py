@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+プロジェクト情報レコードモジュール
+スクレイピング結果を数値のまま保持する型付きレコード（slots付きdataclass）と、
+キャッシュ・ジャーナル用のJSON / msgpackシリアライズを提供する。
+表示用の文字列（「$49 (約7,350円)」等）への整形はプロンプト作成時のみ行う（prompt_templates）
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass, fields
+from datetime import datetime
+
+from profiling import profiled_run
+
+# 円換算レート（USD → JPY）
+JPY_PER_USD = 150
+
+# msgpack形式（位置引数のリスト）の版。項目を追加・変更した場合に上げる
+RECORD_FORMAT_VERSION = 1
+
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+# チャレンジページ（Bot検出）・ブロックページが返された、またはサーキットブレーカーが開いている
+STATUS_BLOCKED = 'blocked'
+# プロジェクトが存在しない（削除・非公開・URL誤り）
+STATUS_NOT_FOUND = 'not_found'
+
+
+@dataclass(slots=True)
+class ProjectRecord:
+    """Kickstarterプロジェクト1件分の情報（金額はプロジェクトの通貨建ての数値）"""
+
+    url: str
+    product_name: str = '不明'
+    description: str = '説明なし'
+    category: str = '不明'
+    currency: str = 'USD'
+    # 1通貨単位あたりのUSD（USDの場合は1.0）
+    usd_rate: float = 1.0
+    # リワードの最低プレッジ額（昇順）
+    reward_tiers: tuple = ()
+    funding_total: float = 0.0
+    goal_amount: float = 0.0
+    backers: int = 0
+    # 終了日時・取得日時（UNIX時刻）
+    end_timestamp: int = None
+    fetched_at: float = 0.0
+    status: str = STATUS_OK
+    error: str = None
+
+    @classmethod
+    def failed(cls, url, error_message, status=STATUS_ERROR):
+        """取得失敗を表すレコード（取得できた範囲の値でレポート生成を続けられるよう既定値を入れる）"""
+        return cls(url, product_name='取得失敗', description=f'エラー: {error_message}',
+                   fetched_at=time.time(), status=status, error=error_message)
+
+    @property
+    def ok(self):
+        return self.status == STATUS_OK
+
+    @property
+    def funding_total_usd(self):
+        return self.funding_total * self.usd_rate
+
+    @property
+    def goal_amount_usd(self):
+        return self.goal_amount * self.usd_rate
+
+    @property
+    def funding_total_jpy(self):
+        return int(self.funding_total_usd * JPY_PER_USD)
+
+    def to_dict(self):
+        """JSON用のdict（項目名付き）"""
+        return {name: getattr(self, name) for name in FIELD_NAMES}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        to_dict の戻り値、または旧形式のdict（'pledge_amounts' の表示用文字列、'funding_total_usd'、
+        ISO形式の 'fetched_at'、'error' キー）からレコードを作成
+
+        Args:
+            data (dict): プロジェクト情報
+
+        Returns:
+            ProjectRecord: レコード
+        """
+        if 'reward_tiers' not in data:
+            return cls._from_legacy_dict(data)
+        record = cls(**{name: data[name] for name in FIELD_NAMES if name in data})
+        record.reward_tiers = tuple(record.reward_tiers)
+        record.category = sys.intern(record.category)
+        record.currency = sys.intern(record.currency)
+        return record
+
+    @classmethod
+    def _from_legacy_dict(cls, data):
+        fetched_at = data.get('fetched_at') or 0.0
+        if isinstance(fetched_at, str):
+            try:
+                fetched_at = datetime.fromisoformat(fetched_at).timestamp()
+            except ValueError:
+                fetched_at = 0.0
+        return cls(
+            url=data.get('url', ''),
+            product_name=data.get('product_name', '不明'),
+            description=data.get('description', '説明なし'),
+            category=sys.intern(data.get('category', '不明')),
+            reward_tiers=parse_legacy_pledge_amounts(data.get('pledge_amounts', '')),
+            funding_total=float(data.get('funding_total_usd') or 0),
+            goal_amount=float(data.get('goal_amount_usd') or 0),
+            backers=int(data.get('backers') or 0),
+            end_timestamp=data.get('end_timestamp'),
+            fetched_at=fetched_at,
+            status=STATUS_ERROR if 'error' in data else STATUS_OK,
+            error=data.get('error'),
+        )
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+    def to_list(self):
+        """msgpack用のリスト（先頭が形式の版、以降は項目の定義順）"""
+        return [RECORD_FORMAT_VERSION] + [getattr(self, name) for name in FIELD_NAMES]
+
+    @classmethod
+    def from_list(cls, values):
+        """
+        to_list の戻り値からレコードを作成
+
+        Raises:
+            ValueError: 形式の版・項目数が一致しない場合
+        """
+        if not values or values[0] != RECORD_FORMAT_VERSION or len(values) != len(FIELD_NAMES) + 1:
+            raise ValueError(f'Unsupported project record format: {values[:1]}')
+        record = cls(*values[1:])
+        record.reward_tiers = tuple(record.reward_tiers)
+        record.category = sys.intern(record.category)
+        record.currency = sys.intern(record.currency)
+        return record
+
+    def to_msgpack(self):
+        return _msgpack().packb(self.to_list(), use_bin_type=True)
+
+    @classmethod
+    def from_msgpack(cls, data):
+        return cls.from_list(_msgpack().unpackb(data, raw=False))
+
+
+FIELD_NAMES = tuple(f.name for f in fields(ProjectRecord))
+
+_LEGACY_AMOUNT = re.compile(r'\$([\d,]+(?:\.\d+)?)')
+
+
+def parse_legacy_pledge_amounts(text):
+    """旧形式の 'pledge_amounts'（'$49 (約7,350円), $79 (約11,850円)'）から金額を取り出す"""
+    amounts = []
+    for match in _LEGACY_AMOUNT.finditer(text or ''):
+        amount = float(match.group(1).replace(',', ''))
+        amounts.append(int(amount) if amount.is_integer() else amount)
+    return tuple(sorted(amounts))
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError('msgpack is required for PROJECT_CACHE_FORMAT=msgpack: pip install msgpack')
+    return msgpack
+
+
+def iter_msgpack_records(f):
+    """
+    msgpackのレコードを連結したファイルから順に読み込み（書き込み途中で中断された末尾は無視）
+
+    Args:
+        f: バイナリモードで開いたファイル
+
+    Yields:
+        ProjectRecord: レコード
+    """
+    msgpack = _msgpack()
+    unpacker = msgpack.Unpacker(f, raw=False)
+    while True:
+        try:
+            values = unpacker.unpack()
+        except msgpack.OutOfData:
+            return
+        except (ValueError, msgpack.UnpackException):
+            # 書き込み途中で中断された末尾
+            return
+        yield ProjectRecord.from_list(values)
+
+
+def _synthetic_records(n):
+    """ベンチマーク用の合成レコード"""
+    import random
+
+    random.seed(0)
+    vocabulary = ('smart mug coffee temperature bottle water travel backpack camera lens wallet '
+                  'leather desk lamp light speaker audio headphones charger battery keyboard').split()
+    categories = ['Product Design', 'Gadgets', 'Tabletop Games', 'Publishing', 'Technology']
+    now = time.time()
+    records = []
+    for i in range(n):
+        words = random.choices(vocabulary, k=30)
+        records.append(ProjectRecord(
+            url=f'https://www.kickstarter.com/projects/creator{i}/project{i}',
+            product_name=' '.join(words[:3]).title(),
+            description=' '.join(words),
+            category=random.choice(categories),
+            reward_tiers=tuple(sorted(random.sample(range(5, 500), 4))),
+            funding_total=float(random.randint(1000, 2000000)),
+            goal_amount=float(random.randint(1000, 100000)),
+            backers=random.randint(10, 20000),
+            end_timestamp=int(now) + random.randint(-86400 * 30, 86400 * 30),
+            fetched_at=now,
+        ))
+    return records
+
+
+def _legacy_dict(record):
+    """旧形式（表示用文字列を含むdict）への変換（ベンチマークの比較用）"""
+    end_date = datetime.fromtimestamp(record.end_timestamp).strftime('%Y年%m月%d日')
+    return {
+        'url': record.url,
+        'product_name': record.product_name,
+        'pledge_amounts': ', '.join(f'${amt} (約{int(amt * JPY_PER_USD):,}円)' for amt in record.reward_tiers),
+        'funding_total_usd': record.funding_total,
+        'funding_total_jpy': record.funding_total_jpy,
+        'backers': record.backers,
+        'category': record.category,
+        'end_date': end_date,
+        'end_timestamp': record.end_timestamp,
+        'description': record.description,
+        'goal_amount_usd': record.goal_amount,
+        'fetched_at': datetime.fromtimestamp(record.fetched_at).isoformat(),
+    }
+
+
+def _measure_memory(build):
+    """build() が確保したメモリ（バイト）"""
+    import gc
+    import tracemalloc
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return items, used
+
+
+def benchmark(n=100000):
+    """
+    旧形式のdictとレコードのメモリ使用量、JSON / msgpackのシリアライズ速度を比較
+
+    Args:
+        n (int): レコード数
+    """
+    source = _synthetic_records(n)
+    json_lines = [r.to_json() for r in source]
+    legacy_lines = [json.dumps(_legacy_dict(r), ensure_ascii=False) for r in source]
+
+    print("=" * 60)
+    print(f"Project Record Benchmark ({n:,} records)")
+    print("=" * 60)
+
+    # 文字列はレコード間で共有しないよう、シリアライズ済みのデータから読み込んで計測
+    _, legacy_bytes = _measure_memory(lambda: [json.loads(line) for line in legacy_lines])
+    _, record_bytes = _measure_memory(lambda: [ProjectRecord.from_json(line) for line in json_lines])
+    print(f"{'Memory':<24}{'total':>10}{'per record':>14}")
+    print(f"{'  legacy dict':<24}{legacy_bytes / 1e6:>8.1f}MB{legacy_bytes / n:>12.0f} B")
+    print(f"{'  ProjectRecord':<24}{record_bytes / 1e6:>8.1f}MB{record_bytes / n:>12.0f} B")
+
+    rows = []
+
+    def timed(label, encode, decode):
+        started = time.perf_counter()
+        encoded = [encode(r) for r in source]
+        encode_s = time.perf_counter() - started
+        started = time.perf_counter()
+        for data in encoded:
+            decode(data)
+        decode_s = time.perf_counter() - started
+        size = sum(len(data) for data in encoded)
+        rows.append((label, encode_s, decode_s, size))
+
+    timed('legacy dict / json', lambda r: json.dumps(_legacy_dict(r), ensure_ascii=False).encode('utf-8'),
+          json.loads)
+    timed('record / json', lambda r: r.to_json().encode('utf-8'), ProjectRecord.from_json)
+    try:
+        timed('record / msgpack', ProjectRecord.to_msgpack, ProjectRecord.from_msgpack)
+    except ImportError as e:
+        print(f"\n⚠️  {e}")
+
+    print(f"\n{'Serialization':<24}{'encode(s)':>10}{'decode(s)':>11}{'us/record':>11}{'size':>11}")
+    for label, encode_s, decode_s, size in rows:
+        print(f"{'  ' + label:<24}{encode_s:>10.2f}{decode_s:>11.2f}"
+              f"{(encode_s + decode_s) / n * 1e6:>11.1f}{size / 1e6:>9.1f}MB")
+
+    print("\n" + "=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark project record memory and serialization')
+    parser.add_argument('--records', type=int, default=100000, help='Number of synthetic records')
+    args = parser.parse_args()
+    benchmark(args.records)
+
+
+if __name__ == '__main__':
+    # PROFILE_MODE=cprofile / sample でプロファイル（logs/profile-*）
+    with profiled_run('project_record'):
+        main()
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+プロンプトテンプレート管理モジュール
+prompts/<テンプレート名>/<バージョン>.txt を起動時に一度だけ読み込んで事前コンパイルし、
+固定部分と行ごとの変数を分けてレンダリングする
+"""
+
+import argparse
+import os
+import re
+import string
+import threading
+import time
+from datetime import datetime
+
+from project_record import JPY_PER_USD, ProjectRecord
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prompts')
+
+# 料金単価（gpt-4o-mini、USD / 1Mトークン）：ベンチマークのコスト試算用
+INPUT_PRICE_PER_MTOKEN = 0.15
+OUTPUT_PRICE_PER_MTOKEN = 0.60
+
+_BUSINESS_CONTEXT_SECTION = {
+    'ja': '\n【事業者からの追加情報】\n{business_context}\n',
+}
+_COMPARABLES_SECTION = {
+    'ja': ('\n【参考：Kickstarter上の類似キャンペーン実績（当社収集データ）】\n{lines}\n'
+           '※②③の類似製品・価格帯の分析では、上記の実績値を根拠として活用してください\n'),
+    'en': ('\n【Reference: Comparable Kickstarter Campaigns (our collected data)】\n{lines}\n'
+           '※Use these actual figures as evidence for sections ② and ③\n'),
+}
+_HISTORY_SECTION = {
+    'ja': ('\n【参考：支援額の推移（当社の定点観測）】\n{lines}\n'
+           '※キャンペーンの勢い（伸びの加速・減速）の評価と販売予測の根拠として活用してください\n'),
+    'en': ('\n【Reference: Funding History (our periodic observations)】\n{lines}\n'
+           '※Use this trend as evidence when assessing momentum and forecasting sales\n'),
+}
+_CATEGORY_SECTION = {
+    'ja': ('\n【参考：カテゴリ「{category}」の実績分布（当社収集データ {projects:,}件）】\n{lines}\n'
+           '※価格戦略・販売予測では、カテゴリ内での本プロジェクトの位置づけを根拠として活用してください\n'),
+    'en': ('\n【Reference: "{category}" Category Benchmarks (our data, {projects:,} projects)】\n{lines}\n'
+           '※Use this project\'s position within the category as evidence for pricing and sales forecasts\n'),
+}
+_UNKNOWN = {'ja': '不明', 'en': 'Unknown'}
+
+
+class PromptTemplate:
+    """事前コンパイル済みのプロンプトテンプレート"""
+
+    def __init__(self, name, version, text, system=None):
+        """
+        Args:
+            name (str): テンプレート名（例: ja_improved）
+            version (str): バージョン（例: v1）
+            text (str): str.format形式のテンプレート本文
+            system (str, optional): systemメッセージ（固定文）
+        """
+        self.name = name
+        self.version = version
+        self.template_id = f'{name}@{version}'
+        self.system = system
+
+        # (固定文字列, 変数名, 書式指定) のリストに分解しておき、描画時は結合のみ行う
+        self._parts = []
+        fields = []
+        for literal, field, spec, conversion in string.Formatter().parse(text):
+            if conversion:
+                raise ValueError(f'{self.template_id}: conversions (!{conversion}) are not supported')
+            self._parts.append((literal, field, spec or ''))
+            if field is not None and field not in fields:
+                fields.append(field)
+        self.fields = tuple(fields)
+        self.static_chars = sum(len(literal) for literal, _, _ in self._parts) + len(system or '')
+
+    def render(self, variables):
+        """
+        変数を埋め込んでプロンプトを作成
+
+        Args:
+            variables (dict): build_prompt_variables の戻り値
+
+        Returns:
+            str: プロンプト
+        """
+        out = []
+        for literal, field, spec in self._parts:
+            out.append(literal)
+            if field is not None:
+                out.append(format(variables[field], spec))
+        return ''.join(out)
+
+
+def _version_key(version):
+    return [int(p) if p.isdigit() else p for p in re.split(r'(\d+)', version)]
+
+
+class PromptRegistry:
+    """バージョン付きプロンプトテンプレートのレジストリ"""
+
+    def __init__(self, prompts_dir=PROMPTS_DIR, selected_versions=None):
+        """
+        Args:
+            prompts_dir (str): テンプレートのディレクトリ
+            selected_versions (str): 使用するバージョンの指定（例: 'ja_improved=v2,en_improved=v1'）。
+                Noneの場合は PROMPT_TEMPLATE_VERSIONS 環境変数、未指定のテンプレートは最新版
+        """
+        self.templates = {}
+        for name in sorted(os.listdir(prompts_dir)):
+            directory = os.path.join(prompts_dir, name)
+            if not os.path.isdir(directory):
+                continue
+            for filename in sorted(os.listdir(directory)):
+                if not filename.endswith('.txt') or filename.endswith('.system.txt'):
+                    continue
+                version = filename[:-len('.txt')]
+                with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                    text = f.read()
+                system = None
+                system_path = os.path.join(directory, f'{version}.system.txt')
+                if os.path.exists(system_path):
+                    with open(system_path, 'r', encoding='utf-8') as f:
+                        system = f.read()
+                self.templates.setdefault(name, {})[version] = PromptTemplate(name, version, text, system)
+
+        self.selected = {
+            name: max(versions, key=_version_key) for name, versions in self.templates.items()
+        }
+        if selected_versions is None:
+            selected_versions = os.getenv('PROMPT_TEMPLATE_VERSIONS', '')
+        for item in filter(None, (s.strip() for s in selected_versions.split(','))):
+            name, _, version = item.partition('=')
+            self.get(name, version)  # 存在確認
+            self.selected[name] = version
+
+    def get(self, name, version=None):
+        """
+        テンプレートを取得
+
+        Args:
+            name (str): テンプレート名
+            version (str, optional): バージョン（Noneの場合は選択中のバージョン）
+
+        Returns:
+            PromptTemplate: テンプレート
+        """
+        version = version or self.selected.get(name)
+        try:
+            return self.templates[name][version]
+        except KeyError:
+            raise KeyError(f'Unknown prompt template: {name}@{version}') from None
+
+    def get_by_id(self, template_id):
+        """'name@version' 形式でテンプレートを取得"""
+        name, _, version = template_id.partition('@')
+        return self.get(name, version or None)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """プロセス内で共有するレジストリを取得（初回のみ読み込み）"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PromptRegistry()
+        return _registry
+
+
+def format_amount(amount, currency='USD'):
+    """金額を表示用に整形（USDは '$49'、それ以外は '49 EUR'、端数がある場合は小数2桁）"""
+    text = f'{amount:,.0f}' if float(amount).is_integer() else f'{amount:,.2f}'
+    return f'${text}' if currency == 'USD' else f'{text} {currency}'
+
+
+def format_reward_tiers(record, language='ja'):
+    """
+    リワードの最低プレッジ額をプロンプト用に整形（'$49 (約7,350円), $79 (約11,850円)'）
+
+    Args:
+        record (ProjectRecord): プロジェクト情報
+        language (str): 'ja' または 'en'
+
+    Returns:
+        str: 整形した文字列（リワードが無い場合は不明値）
+    """
+    if not record.reward_tiers:
+        return _UNKNOWN[language]
+    parts = []
+    for amount in record.reward_tiers:
+        jpy = int(amount * record.usd_rate * JPY_PER_USD)
+        approx = f'約{jpy:,}円' if language == 'ja' else f'~¥{jpy:,}'
+        parts.append(f'{format_amount(amount, record.currency)} ({approx})')
+    return ', '.join(parts)
+
+
+def format_end_date(end_timestamp, language='ja'):
+    """終了日時（UNIX時刻）を表示用に整形"""
+    if end_timestamp is None:
+        return _UNKNOWN[language]
+    end = datetime.fromtimestamp(end_timestamp)
+    return end.strftime('%Y年%m月%d日') if language == 'ja' else end.strftime('%Y-%m-%d')
+
+
+def format_comparables(comparables, language='ja'):
+    """類似キャンペーンの実績（ComparablesIndex.query の戻り値）をプロンプト用のテキストに整形"""
+    lines = []
+    for record, _score in comparables or []:
+        backers = record.backers
+        funding = record.funding_total_usd
+        average = funding / max(backers, 1)
+        pledges = format_reward_tiers(record, language)
+        if language == 'ja':
+            lines.append(
+                f"- {record.product_name}（{record.category}）: 総支援額 ${funding:,.0f} / "
+                f"支援者数 {backers:,}人 / 平均支援額 ${average:.2f} / プレッジ: {pledges}"
+            )
+        else:
+            lines.append(
+                f"- {record.product_name} ({record.category}): Total ${funding:,.0f} / "
+                f"{backers:,} backers / Avg pledge ${average:.2f} / Pledges: {pledges}"
+            )
+    return '\n'.join(lines)
+
+
+def format_history(history, language='ja'):
+    """
+    支援額の推移（SnapshotStore.momentum の戻り値）をプロンプト用のテキストに整形
+
+    Args:
+        history (dict): 推移の要約（金額はプロジェクトの通貨建て）
+        language (str): 'ja' または 'en'
+
+    Returns:
+        str: 整形した行（改行区切り）
+    """
+    rate = history['usd_rate']
+    first_funding = history['first_funding'] * rate
+    last_funding = history['last_funding'] * rate
+    gained = last_funding - first_funding
+    backers_gained = history['last_backers'] - history['first_backers']
+    first_day = format_end_date(int(history['first_at']), language)
+    last_day = format_end_date(int(history['last_at']), language)
+
+    windows = []
+    for label, ja_label, en_label in (('24h', '直近24時間', 'Last 24 hours'), ('7d', '直近7日間', 'Last 7 days')):
+        if f'gained_{label}' not in history:
+            continue
+        amount = history[f'gained_{label}'] * rate
+        backers = history[f'backers_{label}']
+        if language == 'ja':
+            windows.append(f"{ja_label}: +${amount:,.0f}（+{backers:,}人）")
+        else:
+            windows.append(f"{en_label}: +${amount:,.0f} (+{backers:,} backers)")
+
+    if language == 'ja':
+        lines = [
+            f"- 観測期間: {first_day}〜{last_day}（支援額の変化 {history['snapshots']}回）",
+            f"- 総支援額: ${first_funding:,.0f} → ${last_funding:,.0f}（+${gained:,.0f}）、"
+            f"支援者数: {history['first_backers']:,}人 → {history['last_backers']:,}人（+{backers_gained:,}人）",
+        ]
+        if windows:
+            lines.append(f"- {'、'.join(windows)}")
+        if history['goal_amount']:
+            lines.append(f"- ゴール達成率: {history['last_funding'] / history['goal_amount']:.0%}")
+    else:
+        lines = [
+            f"- Observed: {first_day} to {last_day} ({history['snapshots']} funding changes)",
+            f"- Total funding: ${first_funding:,.0f} -> ${last_funding:,.0f} (+${gained:,.0f}), "
+            f"backers: {history['first_backers']:,} -> {history['last_backers']:,} (+{backers_gained:,})",
+        ]
+        if windows:
+            lines.append(f"- {', '.join(windows)}")
+        if history['goal_amount']:
+            lines.append(f"- Goal attainment: {history['last_funding'] / history['goal_amount']:.0%}")
+    return '\n'.join(lines)
+
+
+def format_category_stats(stats, language='ja'):
+    """
+    カテゴリの実績分布（CategoryAnalytics.context の戻り値）をプロンプト用のテキストに整形
+
+    Args:
+        stats (dict): カテゴリの分布（金額はUSD）
+        language (str): 'ja' または 'en'
+
+    Returns:
+        str: 整形した行（改行区切り）
+    """
+    ja = language == 'ja'
+    top = max(stats['funding_top_share'], 0.01)
+    if ja:
+        lines = [f"- 総支援額: 中央値 ${stats['funding_p50']:,.0f}、上位25% ${stats['funding_p75']:,.0f}、"
+                 f"上位10% ${stats['funding_p90']:,.0f}（本プロジェクトは上位{top:.0%}）"]
+    else:
+        lines = [f"- Total funding: median ${stats['funding_p50']:,.0f}, top 25% ${stats['funding_p75']:,.0f}, "
+                 f"top 10% ${stats['funding_p90']:,.0f} (this project: top {top:.0%})"]
+
+    if 'attainment_p50' in stats:
+        if ja:
+            lines.append(f"- ゴール達成率: 中央値 {stats['attainment_p50']:.0%}、"
+                         f"ゴール達成したプロジェクト {stats['success_rate']:.0%}")
+        else:
+            lines.append(f"- Goal attainment: median {stats['attainment_p50']:.0%}, "
+                         f"{stats['success_rate']:.0%} of projects reached their goal")
+
+    if 'pledge_per_backer_p50' in stats:
+        if ja:
+            lines.append(f"- 支援者1人あたりの支援額: 中央値 ${stats['pledge_per_backer_p50']:,.0f}"
+                         f"（支援額$1,000あたり {stats['backers_per_1k_usd_p50']:,.1f}人）")
+        else:
+            lines.append(f"- Pledge per backer: median ${stats['pledge_per_backer_p50']:,.0f} "
+                         f"({stats['backers_per_1k_usd_p50']:,.1f} backers per $1,000)")
+
+    if 'price_bands' in stats:
+        bands = []
+        for low, high, share in stats['price_bands']:
+            label = f"${low:,.0f}+" if high is None else f"${low:,.0f}-{high:,.0f}"
+            bands.append(f"{label} {share:.0%}")
+        if ja:
+            lines.append(f"- リワード価格帯: 最低価格の中央値 ${stats['entry_price_p50']:,.0f}、"
+                         f"中央50%は ${stats['reward_price_p25']:,.0f}〜${stats['reward_price_p75']:,.0f}"
+                         f"（{' / '.join(bands)}）")
+        else:
+            lines.append(f"- Reward prices: median entry tier ${stats['entry_price_p50']:,.0f}, "
+                         f"middle 50% ${stats['reward_price_p25']:,.0f}-${stats['reward_price_p75']:,.0f} "
+                         f"({' / '.join(bands)})")
+    return '\n'.join(lines)
+
+
+def build_prompt_variables(data, maker_name, creator_name, language='ja', business_context='',
+                           comparables=None, history=None, category_stats=None):
+    """
+    1行分のプロンプト変数を作成（表示用の整形はここでのみ行う）
+
+    Args:
+        data (ProjectRecord): Kickstarterから取得したデータ
+        maker_name (str): メーカー名
+        creator_name (str): クリエーター名
+        language (str): 'ja' または 'en'（不明値の表記に使用）
+        business_context (str): 事業者からの追加情報
+        comparables (list, optional): 類似キャンペーンの実績リスト
+        history (dict, optional): 支援額の推移の要約（SnapshotStore.momentum）
+        category_stats (dict, optional): カテゴリの実績分布（CategoryAnalytics.context）
+
+    Returns:
+        dict: テンプレート変数
+    """
+    funding_total = data.funding_total_usd
+    backers = data.backers
+
+    business_context_section = ''
+    if business_context and language in _BUSINESS_CONTEXT_SECTION:
+        business_context_section = _BUSINESS_CONTEXT_SECTION[language].format(
+            business_context=business_context)
+
+    comparables_section = ''
+    if comparables:
+        comparables_section = _COMPARABLES_SECTION[language].format(
+            lines=format_comparables(comparables, language))
+
+    # 当社が蓄積したデータ（v2以降のテンプレートで使用）
+    market_data_section = ''
+    if history:
+        market_data_section += _HISTORY_SECTION[language].format(lines=format_history(history, language))
+    if category_stats:
+        market_data_section += _CATEGORY_SECTION[language].format(
+            category=category_stats['category'], projects=category_stats['projects'],
+            lines=format_category_stats(category_stats, language))
+
+    return {
+        'product_name': data.product_name,
+        'maker_name': maker_name,
+        'creator_name': creator_name,
+        'url': data.url,
+        'pledge_amounts': format_reward_tiers(data, language),
+        'funding_total': funding_total,
+        'funding_jpy': data.funding_total_jpy,
+        'backers': backers,
+        'avg_pledge': funding_total / max(backers, 1),
+        'category': data.category,
+        'description': data.description,
+        'business_context_section': business_context_section,
+        'comparables_section': comparables_section,
+        'market_data_section': market_data_section,
+    }
+
+
+SAMPLE_DATA = ProjectRecord(
+    url='https://www.kickstarter.com/projects/example/smart-coffee-mug',
+    product_name='Smart Coffee Mug',
+    description='A temperature-controlled smart mug that keeps your beverage at the perfect temperature...',
+    category='Product Design',
+    reward_tiers=(49, 79, 129),
+    funding_total=456789.50,
+    backers=5234,
+)
+
+
+def benchmark_templates(template_ids=None, calls=0, model='gpt-4o-mini'):
+    """
+    テンプレートを並べて比較（描画時間・文字数、calls>0の場合はAPIのレイテンシとトークン数）
+
+    Args:
+        template_ids (list): 比較する 'name@version' のリスト（Noneの場合は全て）
+        calls (int): テンプレートごとのAPI呼び出し回数（OPENAI_BASE_URLでフェイクサーバーも指定可）
+        model (str): 使用するモデル
+    """
+    registry = get_registry()
+    if template_ids:
+        templates = [registry.get_by_id(t) for t in template_ids]
+    else:
+        templates = [t for versions in registry.templates.values() for t in versions.values()]
+
+    client = None
+    if calls:
+        from openai import OpenAI
+        from http_pool import get_shared_http_client
+        client = OpenAI(http_client=get_shared_http_client())
+
+    print(f"{'template':<22}{'render(us)':>11}{'chars':>8}{'static%':>9}"
+          f"{'latency(s)':>12}{'in_tok':>8}{'out_tok':>9}{'cost($)':>10}")
+    for template in templates:
+        language = 'en' if template.name.startswith('en') else 'ja'
+        variables = build_prompt_variables(SAMPLE_DATA, 'Ember Technologies', 'Ember Team', language)
+
+        started = time.perf_counter()
+        for _ in range(1000):
+            prompt = template.render(variables)
+        render_us = (time.perf_counter() - started) * 1000
+
+        total_chars = len(prompt) + len(template.system or '')
+        static_pct = template.static_chars / max(total_chars, 1) * 100
+        row = f"{template.template_id:<22}{render_us:>11.1f}{total_chars:>8}{static_pct:>8.1f}%"
+
+        if client:
+            latencies, in_tokens, out_tokens = [], 0, 0
+            messages = ([{'role': 'system', 'content': template.system}] if template.system else []) + \
+                [{'role': 'user', 'content': prompt}]
+            for _ in range(calls):
+                started = time.perf_counter()
+                response = client.chat.completions.create(model=model, messages=messages,
+                                                          max_tokens=4000, temperature=0.7)
+                latencies.append(time.perf_counter() - started)
+                in_tokens += response.usage.prompt_tokens
+                out_tokens += response.usage.completion_tokens
+            cost = (in_tokens * INPUT_PRICE_PER_MTOKEN + out_tokens * OUTPUT_PRICE_PER_MTOKEN) / 1e6 / calls
+            row += (f"{sum(latencies) / calls:>12.2f}{in_tokens // calls:>8}"
+                    f"{out_tokens // calls:>9}{cost:>10.5f}")
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List and benchmark prompt templates')
+    parser.add_argument('templates', nargs='*', help="Template ids to compare, e.g. ja_improved@v1")
+    parser.add_argument('--calls', type=int, default=0,
+                        help='API calls per template to measure latency and token usage')
+    parser.add_argument('--model', default=os.getenv('OPENAI_MODEL', 'gpt-4o-mini'))
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    registry = get_registry()
+    print("=" * 60)
+    print("Prompt Templates")
+    print("=" * 60)
+    for name, versions in registry.templates.items():
+        print(f"{name}: {', '.join(sorted(versions, key=_version_key))} (selected: {registry.selected[name]})")
+    print()
+    benchmark_templates(args.templates or None, args.calls, args.model)
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
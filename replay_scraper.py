@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+リプレイ用スクレイパーモジュール
+保存済みHTMLフィクスチャをブラウザなしで返し、負荷試験・オフライン検証に使用する
+"""
+
+import glob
+import itertools
+import os
+import time
+
+from kickstarter_scraper_selenium import KickstarterScraperSelenium
+from profiling import profiled_run
+from prompt_templates import format_reward_tiers
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'kickstarter')
+
+# チャレンジページ・存在しないページのフィクスチャ（slugを指定した場合のみ返す）
+ERROR_FIXTURES_SUBDIR = 'errors'
+
+
+def _find_fixtures(directory):
+    """ディレクトリ内のHTMLフィクスチャ（名前 → パス）"""
+    return {
+        os.path.splitext(os.path.basename(path))[0]: path
+        for path in sorted(glob.glob(os.path.join(directory, '*.html')))
+    }
+
+
+class ReplayScraper(KickstarterScraperSelenium):
+    """HTMLフィクスチャを返すスクレイパー（抽出処理は本番と同じ）"""
+
+    def __init__(self, headless=True, fixtures_dir=DEFAULT_FIXTURES_DIR, page_load_delay=0.0, breaker=None):
+        """
+        Args:
+            headless (bool): 互換性のための引数（未使用）
+            fixtures_dir (str): HTMLフィクスチャのディレクトリ
+            page_load_delay (float): ページ読み込みを模擬する待機秒数
+            breaker (CircuitBreaker, optional): サーキットブレーカー（省略時はプロセス内で共有するもの）
+        """
+        super().__init__(headless=headless, breaker=breaker)
+        self.page_load_delay = page_load_delay
+        self.fixtures = _find_fixtures(fixtures_dir)
+        if not self.fixtures:
+            raise FileNotFoundError(f'No HTML fixtures found in {fixtures_dir}')
+        self.error_pages = _find_fixtures(os.path.join(fixtures_dir, ERROR_FIXTURES_SUBDIR))
+        self._cycle = itertools.cycle(sorted(self.fixtures))
+        self.pages_served = 0
+
+    def _init_driver(self):
+        # ブラウザは起動しない
+        return True
+
+    def _load_page(self, url):
+        """
+        URLの末尾（プロジェクトのslug）と同名のフィクスチャ（errors/ 内のページを含む）を返す。
+        該当がない場合はプロジェクトページのフィクスチャを順番に返す
+        """
+        slug = url.rstrip('/').split('?')[0].rsplit('/', 1)[-1]
+        if slug in self.fixtures:
+            path = self.fixtures[slug]
+        elif slug in self.error_pages:
+            path = self.error_pages[slug]
+        else:
+            path = self.fixtures[next(self._cycle)]
+
+        if self.page_load_delay:
+            time.sleep(self.page_load_delay)
+
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        self.pages_served += 1
+        return html
+
+
+def test_replay_scraper():
+    """リプレイ用スクレイパーのテスト"""
+    print("=" * 60)
+    print("Replay Scraper Test")
+    print("=" * 60)
+
+    with ReplayScraper() as scraper:
+        for name in scraper.fixtures:
+            data = scraper.fetch_project_data(f'https://www.kickstarter.com/projects/fixture/{name}')
+            print(f"{name}: {data.product_name} / ${data.funding_total_usd:,.2f} / "
+                  f"{data.backers:,} backers / {format_reward_tiers(data)}")
+
+    print("\n" + "=" * 60)
+
+
+if __name__ == '__main__':
+    # PROFILE_MODE=cprofile / sample でプロファイル（logs/profile-*）
+    with profiled_run('replay_scraper'):
+        test_replay_scraper()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+レポート出力モジュール
+シートのK列・L列（またはbatchの結果ファイル）のレポートを、1行ごとにDOCXとMarkdownのファイルに出力する。
+レンダリングはプロセスプールで並列に行い、ファイルは一時ファイルからの置き換えでアトミックに書き込む。
+元のレポートのハッシュを出力先のマニフェストに記録し、変更の無い行は出力しない
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from profiling import profiled_run
+
+DEFAULT_EXPORT_DIR = 'exports'
+
+# 出力形式の版（レイアウトを変更した場合に上げると、次回の出力ですべての行を出力し直す）
+EXPORT_FORMAT_VERSION = 1
+
+# 出力済みの行のハッシュ（ファイル名 → ハッシュ）
+MANIFEST_NAME = '.export_manifest.json'
+
+_SLUG = re.compile(r'[^a-z0-9]+')
+_PROJECT_SLUG = re.compile(r'/projects/[^/]+/([^/?#]+)', re.I)
+# 「【詳細な市場分析】」のような見出しの行
+_HEADING = re.compile(r'^【[^】]+】$')
+_BULLET = re.compile(r'^(?:[-・•])\s*')
+
+
+def reports_from_rows(rows):
+    """
+    シートの行（read_rows の戻り値、1行目は見出し）から出力するレポートを取り出す
+    （K列が空、またはエラーメッセージの行は除く）
+
+    Yields:
+        dict: 'key', 'url', 'product_name', 'maker_name', 'creator_name', 'japanese_report', 'english_report'
+    """
+    for row_number, row in enumerate(rows[1:], start=2):
+        cells = list(row) + [''] * (12 - len(row))
+        japanese_report = cells[10].strip()
+        if not japanese_report or japanese_report.startswith('エラー'):
+            continue
+        yield {
+            'key': f'row{row_number:05d}',
+            'url': cells[1].strip(),
+            'product_name': cells[2].strip(),
+            'maker_name': cells[3].strip(),
+            'creator_name': cells[4].strip(),
+            'japanese_report': japanese_report,
+            'english_report': cells[11].strip(),
+        }
+
+
+def reports_from_batch(path):
+    """
+    batch コマンドの結果ファイル（JSON Lines）から成功した行のレポートを取り出す
+
+    Yields:
+        dict: reports_from_rows と同じ形式
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for text in f:
+            try:
+                result = json.loads(text)
+            except json.JSONDecodeError:
+                # 書き込み途中で中断された末尾行
+                continue
+            if result.get('status') != 'ok' or not result.get('japanese_report'):
+                continue
+            project = result.get('project') or {}
+            yield {
+                'key': f"line{result['line']:05d}",
+                'url': result['url'],
+                'product_name': project.get('product_name', ''),
+                'maker_name': result.get('maker_name', ''),
+                'creator_name': result.get('creator_name', ''),
+                'japanese_report': result['japanese_report'],
+                'english_report': result.get('english_report') or '',
+            }
+
+
+def source_hash(report):
+    """出力の元になる値（レポート本文・製品情報・出力形式の版）のハッシュ"""
+    payload = json.dumps([EXPORT_FORMAT_VERSION] + [report.get(k, '') for k in (
+        'url', 'product_name', 'maker_name', 'creator_name', 'japanese_report', 'english_report')],
+        ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def file_stem(report):
+    """出力ファイル名（拡張子なし）。例: row00012-smart-coffee-mug"""
+    match = _PROJECT_SLUG.search(report.get('url', ''))
+    slug = _SLUG.sub('-', (match.group(1) if match else '').lower()).strip('-')[:60]
+    return f"{report['key']}-{slug}" if slug else report['key']
+
+
+def _title(report):
+    return report.get('product_name') or file_stem(report)
+
+
+def render_markdown(report):
+    """
+    レポートをMarkdownに変換（【…】の行は見出し、それ以外の行は改行を保持）
+
+    Returns:
+        str: Markdown
+    """
+    lines = [f"# {_title(report)}", '']
+    for label, key in (('URL', 'url'), ('Maker', 'maker_name'), ('Creator', 'creator_name')):
+        if report.get(key):
+            lines.append(f"- {label}: {report[key]}")
+    for heading, key in (('日本語レポート', 'japanese_report'), ('English Report', 'english_report')):
+        if not report.get(key):
+            continue
+        lines += ['', f"## {heading}", '']
+        in_list = False
+        for line in report[key].splitlines():
+            line = line.strip()
+            if not line or _HEADING.match(line):
+                if lines[-1]:
+                    lines.append('')
+                if line:
+                    lines += [f"### {line}", '']
+                in_list = False
+            elif line.startswith('- '):
+                lines.append(line)
+                in_list = True
+            else:
+                if in_list:
+                    # 箇条書きの後の行が項目の続きとして扱われないよう空行を入れる
+                    lines.append('')
+                    in_list = False
+                # 段落内の改行をそのまま表示するため、行末に半角スペース2つ
+                lines.append(line + '  ')
+    return '\n'.join(lines).rstrip() + '\n'
+
+
+def render_docx(report, f):
+    """
+    レポートをDOCXに変換してファイルに書き込み（python-docx はこの関数を呼ぶプロセスでのみ読み込む）
+
+    Args:
+        report (dict): 出力するレポート
+        f: バイナリモードで開いたファイル
+    """
+    from docx import Document
+    from docx.oxml.ns import qn
+
+    document = Document()
+    normal = document.styles['Normal']
+    normal.font.name = 'Meiryo'
+    normal.element.rPr.rFonts.set(qn('w:eastAsia'), 'Meiryo')
+    # スタイル名での指定は段落ごとに全スタイルを走査するため、スタイルIDを先に解決して直接設定する
+    style_ids = {name: document.styles[name].style_id
+                 for name in ('Title', 'Heading 1', 'Heading 2', 'List Bullet')}
+
+    def add(text, style=None):
+        paragraph = document.add_paragraph(text)
+        if style:
+            paragraph._p.style = style_ids[style]
+
+    add(_title(report), 'Title')
+    for label, key in (('URL', 'url'), ('Maker', 'maker_name'), ('Creator', 'creator_name')):
+        if report.get(key):
+            add(f"{label}: {report[key]}")
+    for heading, key in (('日本語レポート', 'japanese_report'), ('English Report', 'english_report')):
+        if not report.get(key):
+            continue
+        add(heading, 'Heading 1')
+        for line in report[key].splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if _HEADING.match(line):
+                add(line, 'Heading 2')
+            elif _BULLET.match(line):
+                add(_BULLET.sub('', line, count=1), 'List Bullet')
+            else:
+                add(line)
+    document.save(f)
+
+
+def _atomic_write(path, mode, write):
+    """一時ファイルに書き込んでから置き換え（中断しても書きかけのファイルを残さない）"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, **({} if 'b' in mode else {'encoding': 'utf-8'})) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def export_report(report, output_dir):
+    """
+    1行分のレポートをDOCXとMarkdownに出力（プロセスプールで実行、例外はエラーメッセージとして返す）
+
+    Returns:
+        tuple: (ファイル名, ハッシュ, エラーメッセージ または None)
+    """
+    stem = file_stem(report)
+    try:
+        _atomic_write(os.path.join(output_dir, stem + '.md'), 'w', lambda f: f.write(render_markdown(report)))
+        _atomic_write(os.path.join(output_dir, stem + '.docx'), 'wb', lambda f: render_docx(report, f))
+    except Exception as e:
+        return stem, None, str(e)[:500]
+    return stem, source_hash(report), None
+
+
+class ReportExporter:
+    """レポートをDOCX / Markdownに並列で出力（変更の無い行は出力しない）"""
+
+    def __init__(self, workers=None):
+        """
+        Args:
+            workers (int, optional): プロセス数（Noneの場合はCPU数）
+        """
+        self.workers = max(1, workers or os.cpu_count() or 1)
+
+    @staticmethod
+    def _load_manifest(output_dir):
+        path = os.path.join(output_dir, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def export(self, reports, output_dir):
+        """
+        レポートを出力
+
+        Args:
+            reports (iterable): reports_from_rows / reports_from_batch の戻り値
+            output_dir (str): 出力先ディレクトリ
+
+        Returns:
+            dict: 件数（total / exported / unchanged / errors）
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = self._load_manifest(output_dir)
+        counts = {'total': 0, 'exported': 0, 'unchanged': 0, 'errors': 0}
+
+        jobs = []
+        for report in reports:
+            counts['total'] += 1
+            stem = file_stem(report)
+            unchanged = manifest.get(stem) == source_hash(report) and all(
+                os.path.exists(os.path.join(output_dir, stem + ext)) for ext in ('.md', '.docx'))
+            if unchanged:
+                counts['unchanged'] += 1
+            else:
+                jobs.append(report)
+
+        if len(jobs) > 1 and self.workers > 1:
+            # 1回のプロセス間通信で複数行を渡す
+            chunksize = max(1, len(jobs) // (self.workers * 4))
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+                results = list(pool.map(export_report, jobs, [output_dir] * len(jobs), chunksize=chunksize))
+        else:
+            results = [export_report(report, output_dir) for report in jobs]
+
+        for stem, digest, error in results:
+            if error:
+                counts['errors'] += 1
+                print(f"  ❌ {stem}: {error}")
+                continue
+            manifest[stem] = digest
+            counts['exported'] += 1
+
+        if results:
+            _atomic_write(os.path.join(output_dir, MANIFEST_NAME), 'w',
+                          lambda f: json.dump(manifest, f, ensure_ascii=False, indent=0))
+        return counts
+
+
+def export_directory_name(name):
+    """シート名等を出力先のサブディレクトリ名に変換"""
+    return re.sub(r'[\\/:*?"<>|\s]+', '_', name).strip('_') or 'reports'
+
+
+def benchmark(n=500, workers=None):
+    """
+    合成レポートでの出力時間を計測（初回、変更なしの再実行、10件変更後の再実行）
+
+    Args:
+        n (int): レポート数
+        workers (int, optional): プロセス数
+    """
+    import shutil
+
+    from prompt_templates import SAMPLE_DATA
+
+    section = ('【詳細な市場分析】\n①日本における、クラウドファンディング・EC市場の動向\n'
+               '- 類似製品の支援額は$50,000〜$300,000\n- 価格帯は$49〜$129が中心\n'
+               + 'この製品はターゲット層のニーズに合致しており、日本市場でも十分な需要が見込めます。' * 8 + '\n')
+    english = ('【Market Analysis】\n- Comparable products raised $50,000-$300,000\n'
+               + 'The product addresses a clear need and should resonate with Japanese backers. ' * 8 + '\n')
+    reports = [{
+        'key': f'row{i + 2:05d}',
+        'url': f'https://www.kickstarter.com/projects/creator{i}/project-{i}',
+        'product_name': f'{SAMPLE_DATA.product_name} {i}',
+        'maker_name': f'Maker {i}',
+        'creator_name': f'Creator {i}',
+        'japanese_report': section * 6,
+        'english_report': english * 6,
+    } for i in range(n)]
+
+    directory = tempfile.mkdtemp()
+    exporter = ReportExporter(workers)
+    print("=" * 60)
+    print(f"Report Export Benchmark ({n:,} reports, {exporter.workers} workers)")
+    print("=" * 60)
+    for label in ('first export', 'unchanged', '10 reports changed'):
+        if label == '10 reports changed':
+            for report in reports[:10]:
+                report['japanese_report'] += '\n追記'
+        started = time.perf_counter()
+        counts = exporter.export(reports, directory)
+        print(f"  {label:<24}{time.perf_counter() - started:>8.2f}s  "
+              f"exported {counts['exported']:,}, unchanged {counts['unchanged']:,}, errors {counts['errors']}")
+    size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    print(f"\nOutput size: {size / 1e6:.1f}MB")
+    shutil.rmtree(directory)
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark DOCX / Markdown report export')
+    parser.add_argument('--reports', type=int, default=500, help='Number of synthetic reports')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    args = parser.parse_args()
+    benchmark(args.reports, args.workers)
+
+
+if __name__ == '__main__':
+    # PROFILE_MODE=cprofile / sample でプロファイル（logs/profile-*）
+    with profiled_run('report_export'):
+        main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+実行ジャーナルモジュール
+1回の実行で得られた中間成果物（スクレイピング結果・日本語レポート・英語レポート）を
+行ごとに得られた時点で追記・fsyncし、中断後の --resume で完了済みの段階を省略できるようにする
+"""
+
+import glob
+import json
+import os
+from datetime import datetime
+
+DEFAULT_JOURNAL_DIR = os.path.join('data', 'runs')
+
+# 完了済みのジャーナルを残す件数
+KEEP_FINISHED = 10
+
+
+def _read_events(path):
+    """ジャーナルを読み込み（書き込み途中で中断された末尾行は無視）"""
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return events
+
+
+class RunJournal:
+    """1回の実行分の追記型ジャーナル（data/runs/<run_id>.jsonl）"""
+
+    def __init__(self, path, run_id, events=None):
+        """
+        Args:
+            path (str): ジャーナルファイルのパス
+            run_id (str): 実行ID
+            events (list, optional): 再開時に読み込んだ既存のイベント
+        """
+        self.path = path
+        self.run_id = run_id
+        self.resumed = events is not None
+        self.artifacts = {}
+        for event in events or []:
+            if event.get('event') == 'stage':
+                self.artifacts.setdefault(event['input_hash'], {})[event['stage']] = event.get('data')
+        self._file = open(path, 'a', encoding='utf-8')
+
+    @classmethod
+    def start(cls, spreadsheet_id, sheet_name, journal_dir=DEFAULT_JOURNAL_DIR):
+        """新しい実行のジャーナルを作成"""
+        os.makedirs(journal_dir, exist_ok=True)
+        run_id = datetime.now().strftime('%Y%m%d-%H%M%S-') + f'{os.getpid()}'
+        # 複数のシートを処理する場合は同じ秒に複数のジャーナルを作成するため連番を付ける
+        base_id, suffix = run_id, 1
+        while os.path.exists(os.path.join(journal_dir, f'{run_id}.jsonl')):
+            suffix += 1
+            run_id = f'{base_id}-{suffix}'
+        journal = cls(os.path.join(journal_dir, f'{run_id}.jsonl'), run_id)
+        journal._append({'event': 'start', 'run_id': run_id, 'spreadsheet_id': spreadsheet_id,
+                         'sheet_name': sheet_name, 'at': datetime.now().isoformat()})
+        return journal
+
+    @classmethod
+    def resume(cls, spreadsheet_id, sheet_name, run_id='latest', journal_dir=DEFAULT_JOURNAL_DIR):
+        """
+        中断された実行のジャーナルを再開（該当するものが無い場合は新規作成）
+
+        Args:
+            spreadsheet_id (str): スプレッドシートID
+            sheet_name (str): シート名
+            run_id (str): 再開する実行ID（'latest' の場合は同じシートの最新の未完了ジャーナル）
+        """
+        if run_id == 'latest':
+            candidates = sorted(glob.glob(os.path.join(journal_dir, '*.jsonl')), reverse=True)
+        else:
+            candidates = [os.path.join(journal_dir, f'{run_id}.jsonl')]
+
+        for path in candidates:
+            if not os.path.exists(path):
+                continue
+            events = _read_events(path)
+            if not events or events[0].get('event') != 'start':
+                continue
+            header = events[0]
+            if (header.get('spreadsheet_id'), header.get('sheet_name')) != (spreadsheet_id, sheet_name):
+                continue
+            if any(e.get('event') == 'finish' for e in events) and run_id == 'latest':
+                # 最新の実行が正常終了している場合は再開するものが無い
+                break
+            journal = cls(path, header['run_id'], events)
+            journal._append({'event': 'resume', 'at': datetime.now().isoformat()})
+            return journal
+
+        print(f"  No interrupted run to resume for {sheet_name} - starting a new journal")
+        return cls.start(spreadsheet_id, sheet_name, journal_dir)
+
+    def _append(self, event):
+        # 1行ずつ書き込んでfsyncし、プロセスが強制終了されても書き込み済みの行は残す
+        self._file.write(json.dumps(event, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def get(self, row_data, stage):
+        """
+        記録済みの成果物を取得
+
+        Args:
+            row_data (dict): get_unprocessed_rows の1行（input_hashを含む）
+            stage (str): 'scraped' / 'jp_generated' / 'en_generated' / 'written'
+
+        Returns:
+            記録時のデータ（未記録の場合はNone）
+        """
+        return self.artifacts.get(row_data['input_hash'], {}).get(stage)
+
+    def record(self, row_data, stage, data=True):
+        """段階の成果物を記録"""
+        self.artifacts.setdefault(row_data['input_hash'], {})[stage] = data
+        self._append({'event': 'stage', 'input_hash': row_data['input_hash'],
+                      'row_number': row_data['row_number'], 'stage': stage, 'data': data})
+
+    def finish(self):
+        """正常終了を記録し、古い完了済みジャーナルを削除"""
+        self._append({'event': 'finish', 'at': datetime.now().isoformat()})
+        self.close()
+
+        finished = []
+        for path in sorted(glob.glob(os.path.join(os.path.dirname(self.path), '*.jsonl')), reverse=True):
+            if any(e.get('event') == 'finish' for e in _read_events(path)):
+                finished.append(path)
+        for path in finished[KEEP_FINISHED:]:
+            os.remove(path)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+スクレイパー抽出ベンチマークモジュール
+HTMLコーパス（fixtures/kickstarter：公開中・成功・失敗・リワードなし・USD以外・JSONのみのページ）から
+抽出方式ごとにプロジェクト情報を抽出し、正解データ（<名前>.expected.json）との一致、ページ/秒、ピークメモリを計測する。
+スクレイパーの性能改善はこの数値で比較する（ブラウザ・ネットワークは使わない）。
+check ではチャレンジページ・存在しないページ（fixtures/kickstarter/errors）の判定も確認する
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+from kickstarter_scraper_selenium import (PAGE_BLOCKED, PAGE_NOT_FOUND, PAGE_PROJECT, PAGE_UNKNOWN,
+                                          KickstarterScraperSelenium, classify_page)
+from profiling import profiled_run
+from replay_scraper import DEFAULT_FIXTURES_DIR, ERROR_FIXTURES_SUBDIR
+
+GOLDEN_SUFFIX = '.expected.json'
+
+# 取得ごとに変わるため正解データと比較しない項目
+VOLATILE_FIELDS = ('url', 'fetched_at')
+
+# 実際のページの大きさ（数百KB）を模擬する詰め物（抽出対象の値は含まない）
+_FILLER = (
+    '<li class="nav-item"><a href="/discover/categories/design/product%20design">Product Design</a></li>\n'
+    '<script type="application/json">{"__typename":"Project","slug":"related-project","imageUrl":'
+    '"https://ksr-ugc.imgix.net/assets/000/000/000/original.jpg?ixlib=rb-4.1.0&w=680&fit=crop",'
+    '"creator":{"__typename":"User","slug":"creator","isVerified":true},"isLaunched":true}</script>\n'
+)
+
+_scraper = KickstarterScraperSelenium()
+
+
+def fixture_url(name):
+    return f'https://www.kickstarter.com/projects/fixture/{name}'
+
+
+def load_corpus(fixtures_dir=DEFAULT_FIXTURES_DIR):
+    """
+    HTMLフィクスチャを読み込み
+
+    Returns:
+        list: (名前, HTML) のリスト（名前順）
+    """
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, '*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            corpus.append((os.path.splitext(os.path.basename(path))[0], f.read()))
+    return corpus
+
+
+def comparable(record):
+    """正解データと比較する値（取得ごとに変わる項目を除いたJSON互換のdict）"""
+    values = record.to_dict()
+    for name in VOLATILE_FIELDS:
+        del values[name]
+    values['reward_tiers'] = list(values['reward_tiers'])
+    return values
+
+
+def load_golden(name, fixtures_dir=DEFAULT_FIXTURES_DIR):
+    """正解データを読み込み（無い場合はNone）"""
+    path = os.path.join(fixtures_dir, name + GOLDEN_SUFFIX)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_golden(name, record, fixtures_dir=DEFAULT_FIXTURES_DIR):
+    path = os.path.join(fixtures_dir, name + GOLDEN_SUFFIX)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(comparable(record), f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    return path
+
+
+def extract_regex(url, html):
+    """本番の抽出処理（項目ごとに正規表現でページ全体を検索）"""
+    return _scraper._extract_data(url, html)
+
+
+def _search(pattern, text):
+    match = re.search(pattern, text, re.I)
+    return match.group(1) if match else None
+
+
+def extract_lxml(url, html):
+    """
+    DOMを1回だけ解析し、data属性・metaタグはDOMから、JSONの値はscript要素の中だけを正規表現で検索する抽出処理
+    （本番の抽出処理の代替案。正解データとの一致と速度を比較する）
+    """
+    from lxml import html as lxml_html
+
+    from project_record import ProjectRecord
+
+    doc = lxml_html.fromstring(html)
+
+    def first(xpath):
+        values = doc.xpath(xpath)
+        return values[0] if values else None
+
+    scripts = '\n'.join(doc.xpath('//script/text()'))
+    profile = first('//*[@data-pledged or @data-backers-count or @data-category]')
+    attrs = profile.attrib if profile is not None else {}
+
+    title = first('//meta[@property="og:title"]/@content') or first('//title/text()')
+    description = first('//meta[@property="og:description"]/@content') or \
+        first('//meta[@name="description"]/@content')
+
+    currency = attrs.get('data-currency') or _search(r'"currency"\s*:\s*"([A-Z]{3})"', scripts) or 'USD'
+    usd_rate = _search(r'"(?:static_)?usd_rate"\s*:\s*"?(\d+(?:\.\d+)?)', scripts)
+
+    tiers = {int(v) for v in doc.xpath('//@data-reward-minimum') if v.isdigit()}
+    tiers.update(amount for amount in map(int, re.findall(r'"minimum"\s*:\s*"?(\d+)', scripts))
+                 if 0 < amount < 100000)
+
+    def amount(attr, fallback):
+        value = re.sub(r'[^0-9.]', '', attrs.get(attr, ''))
+        return float(value) if value else fallback(scripts)
+
+    backers = attrs.get('data-backers-count')
+    if backers is not None:
+        backers = int(backers)
+    else:
+        backers = int(_search(r'"backers_count"\s*:\s*(\d+)', scripts) or
+                      (_search(r'([\d,]+)\s+backers?', doc.text_content()) or '0').replace(',', ''))
+
+    end_timestamp = attrs.get('data-end_time') or attrs.get('data-end-time') or \
+        _search(r'"deadline"\s*:\s*(\d{9,11})', scripts)
+
+    return ProjectRecord(
+        url=url,
+        product_name=title.replace(' — Kickstarter', '').strip() if title else '不明',
+        description=description[:500] if description else '説明なし',
+        category=attrs.get('data-category') or _scraper._extract_category(scripts),
+        currency=currency,
+        usd_rate=float(usd_rate) if usd_rate and currency != 'USD' else 1.0,
+        reward_tiers=tuple(sorted(tiers)),
+        funding_total=amount('data-pledged', _scraper._extract_funding_total),
+        goal_amount=amount('data-goal', _scraper._extract_goal_amount),
+        backers=backers,
+        end_timestamp=int(end_timestamp) if end_timestamp else None,
+        fetched_at=time.time(),
+    )
+
+
+# 抽出方式（名前 → (url, html) を受け取り ProjectRecord を返す関数）
+STRATEGIES = {
+    'regex': extract_regex,
+    'lxml': extract_lxml,
+}
+
+
+def pad_page(html, kb):
+    """ページを指定KBまで詰め物で大きくする（抽出結果は変わらない）"""
+    if kb <= 0:
+        return html
+    repeat = max(0, kb * 1024 - len(html)) // len(_FILLER) + 1
+    return html.replace('</body>', _FILLER * repeat + '</body>', 1)
+
+
+def check(strategies, corpus, fixtures_dir=DEFAULT_FIXTURES_DIR):
+    """
+    抽出結果を正解データと比較し、不一致の項目を表示
+
+    Returns:
+        dict: 抽出方式 → 一致したページ数
+    """
+    matched = {}
+    for strategy in strategies:
+        matched[strategy] = 0
+        for name, html in corpus:
+            expected = load_golden(name, fixtures_dir)
+            if expected is None:
+                print(f"  ⚠️  {name}: no {name}{GOLDEN_SUFFIX} (run update-golden)")
+                continue
+            actual = comparable(STRATEGIES[strategy](fixture_url(name), html))
+            diffs = [key for key in expected if actual.get(key) != expected[key]]
+            if diffs:
+                for key in diffs:
+                    print(f"  ❌ {strategy} / {name}: {key} = {actual.get(key)!r} (expected {expected[key]!r})")
+            else:
+                matched[strategy] += 1
+    return matched
+
+
+def expected_page_type(name):
+    """フィクスチャ名から期待するページの種類（errors/ 内は blocked_* / not_found* / unknown*）"""
+    if name.startswith('blocked'):
+        return PAGE_BLOCKED
+    if name.startswith('not_found'):
+        return PAGE_NOT_FOUND
+    if name.startswith('unknown'):
+        return PAGE_UNKNOWN
+    return PAGE_PROJECT
+
+
+def check_classification(fixtures_dir=DEFAULT_FIXTURES_DIR):
+    """
+    プロジェクトページ・エラーページの判定を確認し、誤りを表示
+
+    Returns:
+        tuple: (正しく判定したページ数, ページ数)
+    """
+    corpus = load_corpus(fixtures_dir) + load_corpus(os.path.join(fixtures_dir, ERROR_FIXTURES_SUBDIR))
+    correct = 0
+    for name, html in corpus:
+        page_type, reason = classify_page(html)
+        if page_type == expected_page_type(name):
+            correct += 1
+        else:
+            print(f"  ❌ classify / {name}: {page_type} ({reason}), expected {expected_page_type(name)}")
+    return correct, len(corpus)
+
+
+def _peak_memory(extract, corpus):
+    """1ページの抽出で確保したメモリの最大値（バイト）"""
+    tracemalloc.start()
+    peak = 0
+    for name, html in corpus:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        extract(fixture_url(name), html)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return peak
+
+
+def benchmark(strategies, pad_kb=300, seconds=2.0, fixtures_dir=DEFAULT_FIXTURES_DIR):
+    """
+    抽出方式ごとのスループット・ピークメモリ・正解データとの一致を計測
+
+    Args:
+        strategies (list): 抽出方式の名前
+        pad_kb (int): 各ページを詰め物でこの大きさ（KB）にして計測（0の場合はフィクスチャのまま）
+        seconds (float): 抽出方式ごとの計測時間（秒）
+
+    Returns:
+        bool: すべての抽出方式がすべてのページで正解データと一致した場合True
+    """
+    corpus = load_corpus(fixtures_dir)
+    padded = [(name, pad_page(html, pad_kb)) for name, html in corpus]
+    page_bytes = sum(len(html.encode('utf-8')) for _, html in padded) / len(padded)
+
+    print("=" * 60)
+    print(f"Scraper Extraction Benchmark ({len(corpus)} pages, ~{page_bytes / 1024:.0f}KB each)")
+    print("=" * 60)
+    matched = check(strategies, corpus, fixtures_dir)
+    matched_padded = check(strategies, padded, fixtures_dir)
+
+    print(f"\n{'Strategy':<10}{'pages/s':>10}{'us/page':>10}{'MB/s':>8}{'peak KB':>10}{'golden':>9}{'padded':>9}")
+    for strategy in strategies:
+        extract = STRATEGIES[strategy]
+        extract(fixture_url(corpus[0][0]), padded[0][1])  # 遅延importを計測から除く
+        pages = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            for name, html in padded:
+                extract(fixture_url(name), html)
+            pages += len(padded)
+        elapsed = time.perf_counter() - started
+        peak = _peak_memory(extract, padded)
+        print(f"{strategy:<10}{pages / elapsed:>10,.0f}{elapsed / pages * 1e6:>10,.0f}"
+              f"{pages * page_bytes / elapsed / 1e6:>8.1f}{peak / 1024:>10,.0f}"
+              f"{matched[strategy]:>6}/{len(corpus)}{matched_padded[strategy]:>6}/{len(corpus)}")
+    print("=" * 60)
+    return all(matched[s] == len(corpus) and matched_padded[s] == len(corpus) for s in strategies)
+
+
+def record_page(url, name=None, fixtures_dir=DEFAULT_FIXTURES_DIR):
+    """
+    実際のページをSeleniumで取得してコーパスに追加し、本番の抽出結果を正解データとして保存
+    （保存した正解データは目視で確認し、誤りがあれば修正する）
+
+    Args:
+        url (str): KickstarterプロジェクトURL
+        name (str, optional): フィクスチャ名（Noneの場合はURLのslug）
+    """
+    name = name or url.rstrip('/').split('?')[0].rsplit('/', 1)[-1]
+    with KickstarterScraperSelenium(headless=True) as scraper:
+        if not scraper._init_driver():
+            sys.exit(1)
+        html = scraper._load_page(url)
+    path = os.path.join(fixtures_dir, name + '.html')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    print(f"✓ Saved {path} ({len(html):,} characters)")
+    golden = save_golden(name, extract_regex(url, html), fixtures_dir)
+    print(f"✓ Saved {golden} - review the expected values before committing")
+
+
+def update_golden(fixtures_dir=DEFAULT_FIXTURES_DIR):
+    """本番の抽出結果で正解データを作成・更新（抽出処理の修正で値が正しくなった場合に使用）"""
+    for name, html in load_corpus(fixtures_dir):
+        print(f"✓ {save_golden(name, extract_regex(fixture_url(name), html), fixtures_dir)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline scraper extraction benchmark and golden-output check')
+    commands = parser.add_subparsers(dest='command')
+    bench = commands.add_parser('bench', help='Measure pages/s and peak memory per strategy (default)')
+    bench.add_argument('--strategy', action='append', choices=sorted(STRATEGIES),
+                       help='Strategy to measure (repeatable, default: all)')
+    bench.add_argument('--pad-kb', type=int, default=300,
+                       help='Pad each page to this size to simulate real page weight (default: 300, 0 to disable)')
+    bench.add_argument('--seconds', type=float, default=2.0, help='Measurement time per strategy')
+    check_parser = commands.add_parser('check', help='Compare extraction results with the golden outputs '
+                                                     'and check page classification')
+    check_parser.add_argument('--strategy', action='append', choices=sorted(STRATEGIES))
+    commands.add_parser('update-golden', help='Rewrite the golden outputs from the production extractor')
+    record = commands.add_parser('record', help='Capture a live project page into the corpus (Selenium)')
+    record.add_argument('url')
+    record.add_argument('--name', help='Fixture name (default: the project slug)')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record_page(args.url, args.name)
+    elif args.command == 'update-golden':
+        update_golden()
+    elif args.command == 'check':
+        strategies = args.strategy or list(STRATEGIES)
+        corpus = load_corpus()
+        matched = check(strategies, corpus)
+        for strategy in strategies:
+            print(f"{strategy}: {matched[strategy]}/{len(corpus)} pages match the golden outputs")
+        classified, pages = check_classification()
+        print(f"classify: {classified}/{pages} pages classified correctly")
+        if any(matched[s] != len(corpus) for s in strategies) or classified != pages:
+            sys.exit(1)
+    else:
+        strategies = getattr(args, 'strategy', None) or list(STRATEGIES)
+        if not benchmark(strategies, getattr(args, 'pad_kb', 300), getattr(args, 'seconds', 2.0)):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    # PROFILE_MODE=cprofile / sample でプロファイル（logs/profile-*）
+    with profiled_run('scraper_benchmark'):
+        main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+シャーディング・リースモジュール
+未処理の行を安定したハッシュでN個のワーカー（プロセス・GitHub Actionsのmatrixジョブ）に分割し、
+行ごとにリースを取得してから処理することで、同じレポートを複数のワーカーが生成しないようにする
+"""
+
+import hashlib
+import os
+import random
+import socket
+import sqlite3
+import time
+
+from dedup import normalize_url
+
+DEFAULT_LEASE_PATH = os.path.join('data', 'leases.sqlite3')
+
+# リースの有効期間（秒）。書き込みのフラッシュまで保持するため1行の処理時間より十分長くする
+DEFAULT_LEASE_TTL = 15 * 60
+
+# シート上のリースを書き込んでから確認するまでの待機（秒）
+SHEET_LEASE_SETTLE_SECONDS = 2.0
+
+
+def parse_shard(spec):
+    """
+    シャード指定を解析
+
+    Args:
+        spec (str): 'I/N'（0始まり、例: '0/3'）
+
+    Returns:
+        tuple: (index, count)
+    """
+    index, _, count = str(spec).partition('/')
+    index, count = int(index), int(count or 1)
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f'Invalid shard {spec!r}: expected I/N with 0 <= I < N')
+    return index, count
+
+
+def shard_of(url, count):
+    """URL（正規化後）から担当シャードを決定（プロセス・マシンをまたいで同じ結果）"""
+    digest = hashlib.sha1(normalize_url(url).encode('utf-8')).hexdigest()
+    return int(digest[:8], 16) % count
+
+
+def default_worker_id():
+    """ワーカーID（WORKER_ID、なければ ホスト名:PID）"""
+    return os.getenv('WORKER_ID') or f'{socket.gethostname()}:{os.getpid()}'
+
+
+class SQLiteLeaseStore:
+    """同一マシン上の複数プロセス用のリース（SQLiteのトランザクションで排他）"""
+
+    def __init__(self, path=DEFAULT_LEASE_PATH, worker_id=None, ttl=DEFAULT_LEASE_TTL):
+        """
+        Args:
+            path (str): SQLiteファイルのパス
+            worker_id (str, optional): ワーカーID
+            ttl (float): リースの有効期間（秒）
+        """
+        self.worker_id = worker_id or default_worker_id()
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS leases ('
+            ' key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+
+    def claim(self, key, row_number=None):
+        """
+        リースを取得（他のワーカーが有効なリースを持っている場合は失敗）
+
+        Returns:
+            bool: 取得できた場合True
+        """
+        now = time.time()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute('SELECT owner, expires_at FROM leases WHERE key = ?', (key,)).fetchone()
+            if row and row[0] != self.worker_id and row[1] > now:
+                self.conn.execute('ROLLBACK')
+                return False
+            self.conn.execute(
+                'INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at',
+                (key, self.worker_id, now + self.ttl)
+            )
+            self.conn.execute('COMMIT')
+            return True
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    def release(self, key, row_number=None):
+        """自分のリースを解放"""
+        self.conn.execute('DELETE FROM leases WHERE key = ? AND owner = ?', (key, self.worker_id))
+
+    def close(self):
+        self.conn.close()
+
+
+class SheetLeaseStore:
+    """
+    シートの列に書き込むリース（別マシンのワーカー・matrixジョブ間で共有）
+
+    セルに '<ワーカーID>|<期限のUNIX時刻>' を書き込み、少し待ってから読み直して
+    自分の値が残っている場合のみ取得とする（Sheets APIに比較交換が無いため、後勝ちで判定）
+    """
+
+    def __init__(self, sheets_client, column='M', worker_id=None, ttl=DEFAULT_LEASE_TTL,
+                 settle_seconds=SHEET_LEASE_SETTLE_SECONDS):
+        """
+        Args:
+            sheets_client (GoogleSheetsClient): Sheetsクライアント
+            column (str): リースを書き込む列
+            worker_id (str, optional): ワーカーID
+            ttl (float): リースの有効期間（秒）
+            settle_seconds (float): 書き込みから確認までの待機（秒）
+        """
+        self.sheets_client = sheets_client
+        self.column = column
+        self.worker_id = worker_id or default_worker_id()
+        self.ttl = ttl
+        self.settle_seconds = settle_seconds
+
+    def _read(self, row_number):
+        value = self.sheets_client.read_cell(row_number, self.column)
+        owner, _, expires_at = value.rpartition('|')
+        try:
+            return owner, float(expires_at)
+        except ValueError:
+            return '', 0.0
+
+    def claim(self, key, row_number=None):
+        owner, expires_at = self._read(row_number)
+        if owner and owner != self.worker_id and expires_at > time.time():
+            return False
+        self.sheets_client.write_cell_now(row_number, self.column, f'{self.worker_id}|{time.time() + self.ttl:.0f}')
+        time.sleep(self.settle_seconds * random.uniform(1.0, 1.5))
+        owner, _ = self._read(row_number)
+        return owner == self.worker_id
+
+    def release(self, key, row_number=None):
+        owner, _ = self._read(row_number)
+        if owner == self.worker_id:
+            self.sheets_client.write_cell_now(row_number, self.column, '')
+
+    def close(self):
+        pass
+
+
+def create_lease_store(kind, sheets_client=None, worker_id=None):
+    """
+    リースストアを作成
+
+    Args:
+        kind (str): 'sqlite' / 'sheet' / 'off'
+        sheets_client (GoogleSheetsClient, optional): 'sheet' の場合に必要
+
+    Returns:
+        SQLiteLeaseStore / SheetLeaseStore / None
+    """
+    ttl = float(os.getenv('LEASE_TTL_SECONDS', str(DEFAULT_LEASE_TTL)))
+    if kind == 'sqlite':
+        return SQLiteLeaseStore(worker_id=worker_id, ttl=ttl)
+    if kind == 'sheet':
+        column = os.getenv('SHEETS_LEASE_COLUMN', 'M').strip().upper()
+        return SheetLeaseStore(sheets_client, column, worker_id=worker_id, ttl=ttl)
+    if kind in ('', 'off', 'none'):
+        return None
+    raise ValueError(f'Unknown LEASE_STORE: {kind}')
@@ -4,65 +4,296 @@ Google Sheets連携モジュール
 スプレッドシートからデータを読み取り、レポートを書き込む
 """
 
+import hashlib
 import os
 import json
 import pickle
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google.oauth2 import service_account
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+import threading
+import time
+import atexit
+import weakref
 from googleapiclient.errors import HttpError
 
+from dedup import normalize_url
+from processing_ledger import input_hash
+from profiling import profiled_run
+from sheets_quota import RETRYABLE_STATUSES, get_quota_scheduler
+
 # スコープ：Sheets APIの読み書き
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
+# 認証情報とディスカバリードキュメントはプロセス内で1回だけ読み込む
+# （サービス自体はhttplib2がスレッドセーフでないためクライアントごとに構築、構築は0.1ms程度）
+_credentials_cache = {}
+_discovery_document = None
+_auth_lock = threading.Lock()
+
+
+def _credentials_source():
+    """使用する認証方式を判定（'env' / 'service_account_file' / 'oauth'）"""
+    if os.getenv('GOOGLE_CREDENTIALS_JSON'):
+        return 'env'
+    if os.path.exists('credentials.json'):
+        try:
+            with open('credentials.json', 'r') as f:
+                if json.load(f).get('type') == 'service_account':
+                    return 'service_account_file'
+        except (json.JSONDecodeError, AttributeError):
+            pass
+    return 'oauth'
+
+
+def _load_discovery_document():
+    """
+    google-api-python-clientに同梱の静的ディスカバリードキュメント（sheets v4）を読み込み
+    ネットワークからの取得は行わない
+    """
+    global _discovery_document
+    if _discovery_document is None:
+        from googleapiclient import discovery_cache
+        document = discovery_cache.get_static_doc('sheets', 'v4')
+        if document is None:
+            raise RuntimeError('Static discovery document for sheets v4 is not bundled with '
+                               'google-api-python-client; upgrade the package (>= 2.0)')
+        _discovery_document = json.loads(document)
+    return _discovery_document
+
+
+def build_sheets_service(credentials):
+    """静的ディスカバリードキュメントからSheets APIサービスを構築"""
+    from googleapiclient.discovery import build_from_document
+    with _auth_lock:
+        document = _load_discovery_document()
+    return build_from_document(document, credentials=credentials)
+
+
+def _parse_k_length(signal, from_length_column):
+    """K列のシグナル（補助列の文字数、またはK列の値）を文字数に変換"""
+    if from_length_column:
+        try:
+            return int(float(signal))
+        except ValueError:
+            return 0
+    return len(signal.strip())
+
+
+# K列の本文をこの文字数以上ダウンロードした場合は補助列（SHEETS_K_LENGTH_COLUMN）の設定を促す
+REPORT_DOWNLOAD_WARNING_CHARS = 1_000_000
+
+
+def column_letter(col):
+    """列番号（1始まり）を列名（A, B, C, ...）に変換"""
+    return chr(64 + col)  # A=65
+
+
+# 終了時に未送信の更新を書き込むBatchWriter（atexitの登録はプロセスで1回）
+_live_writers = weakref.WeakSet()
+
+
+def _flush_live_writers():
+    for writer in list(_live_writers):
+        writer.flush()
+
+
+atexit.register(_flush_live_writers)
+
+
+class BatchWriter:
+    """
+    セル更新をバッファし、values.batchUpdateで1リクエストにまとめて書き込む
+    件数（max_updates）・経過時間（max_delay）・明示的なflush()・終了時のいずれかで書き込む。
+    httplib2のサービスはスレッドセーフでないため、書き込みは常に呼び出し元のスレッドで行う
+    （経過時間は add() と flush_if_due() の呼び出し時に確認する）
+    """
+
+    def __init__(self, service, spreadsheet_id, sheet_name, max_updates=20, max_delay=30.0, quota=None):
+        """
+        Args:
+            service: Sheets APIサービス
+            spreadsheet_id (str): スプレッドシートID
+            sheet_name (str): シート名
+            max_updates (int): この件数に達したら書き込む
+            max_delay (float): 最初の更新からこの秒数が経過したら書き込む
+            quota (SheetsQuotaScheduler, optional): クォータ管理（Noneの場合はプロセス共有のもの）
+        """
+        self.service = service
+        self.quota = quota or get_quota_scheduler()
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_name = sheet_name
+        self.max_updates = max_updates
+        self.max_delay = max_delay
+        self.failures = {}
+        self.requests = 0
+        self._pending = []
+        self._lock = threading.RLock()
+        self._first_added_at = None
+        _live_writers.add(self)
+
+    def add(self, row, col, value):
+        """
+        セル更新を追加
+
+        Args:
+            row (int): 行番号（1始まり）
+            col (int): 列番号（1始まり）
+            value (str): 値
+        """
+        range_name = f'{self.sheet_name}!{column_letter(col)}{row}'
+        with self._lock:
+            # 同じセルへの未送信の更新は最後の値のみ送る
+            self._pending = [u for u in self._pending if u[1] != range_name]
+            self._pending.append((row, range_name, value))
+            if self._first_added_at is None:
+                self._first_added_at = time.monotonic()
+            if len(self._pending) >= self.max_updates:
+                self.flush()
+            else:
+                self.flush_if_due()
+
+    def flush_if_due(self):
+        """
+        最初の更新から max_delay 秒が経過していれば書き込む（行の合間などに呼び出す）
+
+        Returns:
+            dict: 書き込みに失敗した行 {行番号: エラーメッセージ}
+        """
+        with self._lock:
+            if self._first_added_at is None or self.max_delay <= 0:
+                return {}
+            if time.monotonic() - self._first_added_at < self.max_delay:
+                return {}
+            return self.flush()
+
+    def flush(self):
+        """
+        バッファ中の更新を書き込む
+
+        Returns:
+            dict: 書き込みに失敗した行 {行番号: エラーメッセージ}
+        """
+        with self._lock:
+            self._first_added_at = None
+            pending, self._pending = self._pending, []
+            if not pending:
+                return {}
+
+            failures = {}
+            try:
+                self._batch_update(pending)
+            except HttpError as err:
+                by_row = {}
+                for update in pending:
+                    by_row.setdefault(update[0], []).append(update)
+                if err.resp.status in RETRYABLE_STATUSES:
+                    # クォータ超過・サーバーエラーがリトライ後も続く場合は行ごとの再送でさらに消費しない
+                    print(f'Batch write of {len(pending)} cells failed after retries ({err})')
+                    failures = {row: str(err) for row in by_row}
+                else:
+                    # 1件の不正な範囲でリクエスト全体が失敗するため、行ごとに再送して失敗行を特定
+                    print(f'Batch write of {len(pending)} cells failed ({err}); retrying row by row')
+                    for row, updates in by_row.items():
+                        try:
+                            self._batch_update(updates)
+                        except HttpError as row_err:
+                            failures[row] = str(row_err)
+                            print(f'Error writing row {row} to spreadsheet: {row_err}')
+
+            written = len(pending) - sum(1 for u in pending if u[0] in failures)
+            print(f'✓ Flushed {written} cell updates in batch ({len(failures)} rows failed)')
+            self.failures.update(failures)
+            return failures
+
+    def _batch_update(self, updates):
+        self.requests += 1
+        self.quota.execute('write', self.service.spreadsheets().values().batchUpdate(
+            spreadsheetId=self.spreadsheet_id,
+            body={
+                'valueInputOption': 'RAW',
+                'data': [{'range': range_name, 'values': [[value]]} for _, range_name, value in updates]
+            }
+        ))
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
 
 class GoogleSheetsClient:
     """Google Sheetsクライアント"""
 
-    def __init__(self, spreadsheet_id, sheet_name='kickstarter'):
+    def __init__(self, spreadsheet_id, sheet_name='kickstarter', service=None, quota=None):
         """
         Args:
             spreadsheet_id (str): スプレッドシートID
             sheet_name (str): シート名
+            service: Sheets APIサービス（Noneの場合は認証して作成、テスト時はフェイクを指定）
+            quota (SheetsQuotaScheduler, optional): クォータ管理（Noneの場合はプロセス共有のもの）
         """
         self.spreadsheet_id = spreadsheet_id
         self.sheet_name = sheet_name
-        self.service = self._authenticate()
+        self.service = service or self._authenticate()
+        self.quota = quota or get_quota_scheduler()
+        self.read_stats = {'requests': 0, 'cells': 0}
+        # このクライアントが送信したリクエスト数（複数シートを処理する場合のシートごとの集計用）
+        self.api_requests = {'read': 0, 'write': 0}
+        self.writer = BatchWriter(
+            self.service,
+            spreadsheet_id,
+            sheet_name,
+            max_updates=int(os.getenv('SHEETS_WRITE_BATCH_SIZE', '20')),
+            max_delay=float(os.getenv('SHEETS_WRITE_MAX_DELAY', '30')),
+            quota=self.quota
+        )
+
+    def _execute(self, kind, request):
+        """共有のクォータ管理を通してリクエストを実行し、このクライアントの集計に加算"""
+        self.api_requests[kind] += 1
+        return self.quota.execute(kind, request)
 
     def _authenticate(self):
         """Google Sheets APIの認証（OAuth or サービスアカウント）"""
+        started = time.perf_counter()
+        source = _credentials_source()
+        with _auth_lock:
+            creds = _credentials_cache.get(source)
+            if creds is None:
+                creds = _credentials_cache[source] = self._load_credentials(source)
+        service = build_sheets_service(creds)
+        self.startup_seconds = time.perf_counter() - started
+        print(f"Sheets service ready in {self.startup_seconds * 1000:.0f} ms ({source})")
+        return service
+
+    def _load_credentials(self, source):
+        """
+        認証情報を読み込み（認証方式ごとに必要なモジュールのみインポート）
 
+        Args:
+            source (str): _credentials_source の戻り値
+
+        Returns:
+            認証情報
+        """
         # GitHub Actions等の環境変数からサービスアカウント認証
-        if os.getenv('GOOGLE_CREDENTIALS_JSON'):
+        if source == 'env':
+            from google.oauth2 import service_account
             print("Using service account authentication (from environment variable)")
-            credentials_json = os.getenv('GOOGLE_CREDENTIALS_JSON')
-            credentials_dict = json.loads(credentials_json)
-            creds = service_account.Credentials.from_service_account_info(
+            credentials_dict = json.loads(os.getenv('GOOGLE_CREDENTIALS_JSON'))
+            return service_account.Credentials.from_service_account_info(
                 credentials_dict,
                 scopes=SCOPES
             )
-            return build('sheets', 'v4', credentials=creds)
 
-        # credentials.jsonがある場合はサービスアカウント認証を試みる
-        if os.path.exists('credentials.json'):
-            try:
-                with open('credentials.json', 'r') as f:
-                    credentials_dict = json.load(f)
-
-                # サービスアカウントかどうか判定
-                if credentials_dict.get('type') == 'service_account':
-                    print("Using service account authentication (from credentials.json)")
-                    creds = service_account.Credentials.from_service_account_file(
-                        'credentials.json',
-                        scopes=SCOPES
-                    )
-                    return build('sheets', 'v4', credentials=creds)
-            except (json.JSONDecodeError, KeyError):
-                pass
+        # credentials.jsonがサービスアカウントの場合
+        if source == 'service_account_file':
+            from google.oauth2 import service_account
+            print("Using service account authentication (from credentials.json)")
+            return service_account.Credentials.from_service_account_file(
+                'credentials.json',
+                scopes=SCOPES
+            )
 
         # OAuth 2.0認証（ローカル実行用）
+        from google.oauth2.credentials import Credentials
         print("Using OAuth 2.0 authentication (interactive)")
         creds = None
 
@@ -74,6 +305,7 @@ class GoogleSheetsClient:
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
                 # 期限切れの場合はリフレッシュ
+                from google.auth.transport.requests import Request
                 creds.refresh(Request())
             else:
                 # 新規認証
@@ -86,6 +318,7 @@ class GoogleSheetsClient:
                         'またはGOOGLE_CREDENTIALS_JSON環境変数を設定してください。'
                     )
 
+                from google_auth_oauthlib.flow import InstalledAppFlow
                 flow = InstalledAppFlow.from_client_secrets_file(
                     'credentials.json', SCOPES)
                 creds = flow.run_local_server(port=0)
@@ -94,7 +327,7 @@ class GoogleSheetsClient:
             with open('token.json', 'w') as token:
                 token.write(creds.to_json())
 
-        return build('sheets', 'v4', credentials=creds)
+        return creds
 
     def read_rows(self):
         """
@@ -105,10 +338,10 @@ class GoogleSheetsClient:
         """
         try:
             sheet = self.service.spreadsheets()
-            result = sheet.values().get(
+            result = self._execute('read', sheet.values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range=f'{self.sheet_name}!A:L'
-            ).execute()
+            ))
 
             values = result.get('values', [])
             return values
@@ -119,91 +352,239 @@ class GoogleSheetsClient:
 
     def write_report(self, row_number, japanese_report, english_report=None):
         """
-        レポートをスプレッドシートに書き込み
+        レポートの書き込みをバッファに追加（BatchWriterがまとめて書き込む）
 
         Args:
             row_number (int): 行番号（1始まり）
             japanese_report (str): 日本語レポート
             english_report (str, optional): 英語レポート
         """
-        try:
-            # K列に日本語レポート
-            self._update_cell(row_number, 11, japanese_report)
-            print(f'✓ Japanese report written to K{row_number}')
-
-            # L列に英語レポート（オプション）
-            if english_report:
-                self._update_cell(row_number, 12, english_report)
-                print(f'✓ English report written to L{row_number}')
+        # K列に日本語レポート
+        self.writer.add(row_number, 11, japanese_report)
 
-            print(f'✓ Report written to row {row_number}')
+        # L列に英語レポート（オプション）
+        if english_report:
+            self.writer.add(row_number, 12, english_report)
 
-        except HttpError as err:
-            print(f'Error writing to spreadsheet: {err}')
+        print(f'✓ Report queued for row {row_number} ({self.writer.pending} cells pending)')
 
-    def _update_cell(self, row, col, value):
+    def read_cell(self, row_number, column):
         """
-        特定のセルを更新
+        1セルを読み取り（リース等の即時に確認が必要な値用）
 
         Args:
-            row (int): 行番号（1始まり）
-            col (int): 列番号（1始まり、A=1, B=2, ...）
-            value (str): 値
+            row_number (int): 行番号（1始まり）
+            column (str): 列名（例: 'M'）
+
+        Returns:
+            str: セルの値（空の場合は''）
         """
-        # 列番号を列名に変換（A, B, C, ...）
-        col_letter = chr(64 + col)  # A=65
-        range_name = f'{self.sheet_name}!{col_letter}{row}'
+        result = self._execute('read', self.service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f'{self.sheet_name}!{column}{row_number}'
+        ))
+        values = result.get('values', [])
+        return values[0][0] if values and values[0] else ''
+
+    def read_k_length(self, row_number):
+        """1行のK列の文字数を読み取り（SHEETS_K_LENGTH_COLUMN があれば補助列の値）"""
+        length_column = os.getenv('SHEETS_K_LENGTH_COLUMN', '').strip().upper()
+        return _parse_k_length(self.read_cell(row_number, length_column or 'K'), bool(length_column))
 
-        body = {
-            'values': [[value]]
-        }
+    def write_cell_now(self, row_number, column, value):
+        """
+        1セルをバッファを介さずに書き込み（リース等の即時に反映が必要な値用）
 
-        self.service.spreadsheets().values().update(
+        Args:
+            row_number (int): 行番号（1始まり）
+            column (str): 列名（例: 'M'）
+            value (str): 値
+        """
+        self._execute('write', self.service.spreadsheets().values().update(
             spreadsheetId=self.spreadsheet_id,
-            range=range_name,
+            range=f'{self.sheet_name}!{column}{row_number}',
             valueInputOption='RAW',
-            body=body
-        ).execute()
+            body={'values': [[value]]}
+        ))
 
-    def get_unprocessed_rows(self):
+    def flush(self):
         """
-        未処理の行を取得（K列が空、または短い文字列のみの行）
+        バッファ中のレポートを書き込む
 
         Returns:
-            list: (row_number, url, product_name, maker_name, creator_name) のリスト
+            dict: 書き込みに失敗した行 {行番号: エラーメッセージ}
         """
-        rows = self.read_rows()
-        unprocessed = []
+        return self.writer.flush()
 
-        for i, row in enumerate(rows):
-            # ヘッダー行をスキップ
-            if i == 0:
-                continue
+    def flush_if_due(self):
+        """SHEETS_WRITE_MAX_DELAY 秒以上バッファしているレポートがあれば書き込む"""
+        return self.writer.flush_if_due()
 
-            row_number = i + 1
+    def get_row_count(self):
+        """シートの行数（グリッドサイズ）をプロパティのみ取得"""
+        result = self._execute('read', self.service.spreadsheets().get(
+            spreadsheetId=self.spreadsheet_id,
+            fields='sheets(properties(title,gridProperties(rowCount)))'
+        ))
+        for sheet in result.get('sheets', []):
+            properties = sheet.get('properties', {})
+            if properties.get('title') == self.sheet_name:
+                return properties.get('gridProperties', {}).get('rowCount', 0)
+        return 0
+
+    def iter_schedule_rows(self, window=None):
+        """
+        処理判定に必要な列だけを行ウィンドウ単位で読み取る
+
+        B:E（URL・商品名・メーカー名・クリエーター名）と、K列の長さを示すシグナルのみを取得する。
+        SHEETS_K_LENGTH_COLUMN に補助列（例: N列に =ARRAYFORMULA(IF(ROW(K:K)=1,"K_LEN",LEN(TRIM(K:K))))）
+        を指定するとレポート本文をダウンロードせずに判定できる。未指定の場合はK列（日本語レポート本文）を
+        すべてダウンロードする（read_stats['report_chars'] に文字数を記録）。
+        空行が続く範囲があっても、シートの行数（グリッドサイズ）まですべて読み取る。
+        SHEETS_PRIORITY_COLUMN を指定した場合はその列（クライアント指定の優先度）も読み取る
+
+        Args:
+            window (int): 1リクエストで読み取る行数（SHEETS_READ_WINDOW、デフォルト1000）
+
+        Yields:
+            tuple: (行番号, [B, C, D, E], K列の文字数, 優先度列の値)
+        """
+        window = window or int(os.getenv('SHEETS_READ_WINDOW', '1000'))
+        length_column = os.getenv('SHEETS_K_LENGTH_COLUMN', '').strip().upper()
+        signal_column = length_column or 'K'
+        priority_column = os.getenv('SHEETS_PRIORITY_COLUMN', '').strip().upper()
+        row_count = self.get_row_count()
+
+        self.read_stats = {'requests': 1, 'cells': 0, 'report_chars': 0}
+        for start in range(2, row_count + 1, window):
+            end = min(start + window - 1, row_count)
+            ranges = [
+                f'{self.sheet_name}!B{start}:E{end}',
+                f'{self.sheet_name}!{signal_column}{start}:{signal_column}{end}',
+            ]
+            if priority_column:
+                ranges.append(f'{self.sheet_name}!{priority_column}{start}:{priority_column}{end}')
+            result = self._execute('read', self.service.spreadsheets().values().batchGet(
+                spreadsheetId=self.spreadsheet_id,
+                ranges=ranges,
+                majorDimension='ROWS'
+            ))
+            self.read_stats['requests'] += 1
+
+            inputs, signals, *extra = (r.get('values', []) for r in result['valueRanges'])
+            priorities = extra[0] if extra else []
+            self.read_stats['cells'] += sum(len(v) for v in inputs) + len(signals) + len(priorities)
+            if not length_column:
+                self.read_stats['report_chars'] += sum(len(v[0]) for v in signals if v)
+
+            for offset, cells in enumerate(inputs):
+                signal = signals[offset][0] if offset < len(signals) and signals[offset] else ''
+                k_length = _parse_k_length(signal, bool(length_column))
+                priority = priorities[offset][0] if offset < len(priorities) and priorities[offset] else ''
+                yield start + offset, cells + [''] * (4 - len(cells)), k_length, priority
+
+    def inputs_fingerprint(self, window=None):
+        """
+        B〜E列（と SHEETS_K_LENGTH_COLUMN の補助列）のハッシュ（watchモードの変更検出用）
 
-            # 最低限の列数チェック
-            if len(row) < 2:
-                continue
+        レポート本文（K・L列）は読み取らないため、行の追加・編集のみを低コストで検出できる
 
-            url = row[1] if len(row) > 1 else ''
-            product_name = row[2] if len(row) > 2 else ''
-            maker_name = row[3] if len(row) > 3 else ''
-            creator_name = row[4] if len(row) > 4 else ''
-            japanese_report = row[10] if len(row) > 10 else ''
+        Returns:
+            str: SHA-1
+        """
+        window = window or int(os.getenv('SHEETS_READ_WINDOW', '1000'))
+        length_column = os.getenv('SHEETS_K_LENGTH_COLUMN', '').strip().upper()
+        row_count = self.get_row_count()
+
+        digest = hashlib.sha1(str(row_count).encode())
+        for start in range(2, row_count + 1, window):
+            end = min(start + window - 1, row_count)
+            ranges = [f'{self.sheet_name}!B{start}:E{end}']
+            if length_column:
+                ranges.append(f'{self.sheet_name}!{length_column}{start}:{length_column}{end}')
+            result = self._execute('read', self.service.spreadsheets().values().batchGet(
+                spreadsheetId=self.spreadsheet_id,
+                ranges=ranges,
+                majorDimension='ROWS'
+            ))
+            values = [r.get('values', []) for r in result['valueRanges']]
+            # 空のウィンドウも含めてシートの行数まで読み取る（空行の後の行も変更を検出する）
+            digest.update(str(start).encode())
+            digest.update(json.dumps(values, ensure_ascii=False).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get_unprocessed_rows(self, ledger=None):
+        """
+        未処理の行を取得
 
-            # URLがあり、K列（日本語レポート）が空、または100文字未満の場合
-            # 既存データ（"done"など）を上書きして処理する
-            if url and (not japanese_report or len(japanese_report.strip()) < 100):
-                print(f"  Found unprocessed row {row_number}: {url[:50]}... (K-col: '{japanese_report[:20] if japanese_report else 'empty'}')")
+        ledgerを指定した場合は処理台帳との差分で判定する：
+        - 入力（B〜E列）が同じで書き込み済みの行は、K列の内容（"done"等）に関わらずスキップ
+          （K列が空にされた場合のみ再処理）
+        - 入力が変わった行（台帳のこの行番号に別の入力が記録されている、または同じURLが別の入力で
+          記録されている）・前回エラーだった行は再処理
+        - 台帳に記録のない行は従来どおりK列が空、または100文字未満の場合に処理
+
+        Args:
+            ledger (ProcessingLedger, optional): 処理台帳
+
+        Returns:
+            list: row_number, url, product_name, maker_name, creator_name, priority, k_length, input_hash,
+                requeued を含む辞書のリスト
+        """
+        unprocessed = []
+        entries, known_urls, by_row = (ledger.load_sheet(self.spreadsheet_id, self.sheet_name) if ledger
+                                       else ({}, set(), {}))
+        skipped_by_ledger = 0
+
+        try:
+            for row_number, inputs, k_length, priority in self.iter_schedule_rows():
+                url, product_name, maker_name, creator_name = inputs
+                if not url:
+                    continue
+
+                row_hash = input_hash(url, product_name, maker_name, creator_name)
+                entry = entries.get(row_hash)
+                if entry is not None:
+                    if entry['status'] == 'written' and k_length > 0:
+                        skipped_by_ledger += 1
+                        continue
+                    reason = 'K-col cleared' if entry['status'] == 'written' else f"ledger: {entry['status']}"
+                elif row_number in by_row:
+                    # この行に記録された入力と異なる（URLを別のプロジェクトに変えた等）。K列には前の入力の
+                    # レポートが残っているため、K列の長さに関わらず再処理する
+                    reason = 'inputs changed'
+                elif normalize_url(url) in known_urls:
+                    reason = 'inputs changed'
+                elif k_length < 100:
+                    # URLがあり、K列（日本語レポート）が空、または100文字未満の場合
+                    # 既存データ（"done"など）を上書きして処理する
+                    reason = f'K-col: {k_length} chars'
+                else:
+                    continue
+
+                print(f"  Found unprocessed row {row_number}: {url[:50]}... ({reason})")
                 unprocessed.append({
                     'row_number': row_number,
                     'url': url,
                     'product_name': product_name,
                     'maker_name': maker_name,
-                    'creator_name': creator_name
+                    'creator_name': creator_name,
+                    'priority': priority,
+                    'k_length': k_length,
+                    'input_hash': row_hash,
+                    # 処理済みの行をK列のクリア・入力の変更・前回のエラーで再処理する（レポートを再利用しない）
+                    'requeued': entry is not None or reason == 'inputs changed',
                 })
+        except HttpError as err:
+            print(f'Error reading spreadsheet: {err}')
+            return []
 
+        print(f"  Scanned sheet in {self.read_stats['requests']} requests ({self.read_stats['cells']:,} cells)")
+        if self.read_stats['report_chars'] >= REPORT_DOWNLOAD_WARNING_CHARS:
+            print(f"  ⚠️  Downloaded {self.read_stats['report_chars']:,} characters of K-column reports to detect "
+                  f"processed rows - set SHEETS_K_LENGTH_COLUMN to a LEN(K) helper column to avoid this")
+        if ledger:
+            print(f"  Skipped {skipped_by_ledger} unchanged rows recorded in the ledger")
         return unprocessed
 
 
@@ -244,4 +625,6 @@ def test_sheets():
 
 
 if __name__ == '__main__':
-    test_sheets()
+    # PROFILE_MODE=cprofile / sample でプロファイル（logs/profile-*）
+    with profiled_run('sheets'):
+        test_sheets()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Sheets APIのクォータ管理モジュール
+読み取り・書き込みのリクエストを1分あたりのクォータに合わせてトークンバケットで間引き、
+429・5xxをバックオフ付きでリトライする。プロセス内のすべてのクライアント・ワーカーで共有する
+"""
+
+import os
+import random
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+from tracing import span
+
+# リトライ対象のHTTPステータス
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """1分あたりの上限に合わせたトークンバケット（スレッドセーフ）"""
+
+    def __init__(self, per_minute, burst=None):
+        """
+        Args:
+            per_minute (float): 1分あたりのリクエスト数
+            burst (int, optional): 連続して送信できる最大数（Noneの場合は1分の上限の1/6、最低1）
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = burst or max(1, int(per_minute // 6))
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        トークンを1つ取得（不足している場合は補充されるまで待機）
+
+        Returns:
+            float: 待機した秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 先にトークンを予約しておき、待機はロックの外で行う（他のワーカーは後ろに並ぶ）
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class SheetsQuotaScheduler:
+    """読み取り・書き込みのクォータを共有するスケジューラー"""
+
+    def __init__(self, read_per_minute=60, write_per_minute=60, max_retries=5,
+                 backoff_base=1.0, backoff_max=64.0):
+        """
+        Args:
+            read_per_minute (float): 読み取りリクエストの上限（1分あたり）
+            write_per_minute (float): 書き込みリクエストの上限（1分あたり）
+            max_retries (int): 429・5xx時の最大リトライ回数
+            backoff_base (float): バックオフの初期秒数（リトライごとに2倍）
+            backoff_max (float): バックオフの上限秒数
+        """
+        self.buckets = {
+            'read': TokenBucket(read_per_minute),
+            'write': TokenBucket(write_per_minute),
+        }
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self.stats = {
+            'read_requests': 0,
+            'write_requests': 0,
+            'throttled': 0,
+            'throttled_seconds': 0.0,
+            'retries': 0,
+            'backoff_seconds': 0.0,
+            'failures': 0,
+        }
+
+    def _count(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _retry_delay(self, err, attempt):
+        """Retry-Afterヘッダーがあればそれに従い、なければジッター付き指数バックオフ"""
+        retry_after = getattr(err, 'resp', None) and err.resp.get('retry-after')
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def execute(self, kind, request):
+        """
+        クォータに合わせてリクエストを実行
+
+        Args:
+            kind (str): 'read' または 'write'
+            request: googleapiclientのHttpRequest（execute()を持つオブジェクト）
+
+        Returns:
+            dict: レスポンス
+
+        Raises:
+            HttpError: リトライ対象外のエラー、またはリトライ回数を超えた場合
+        """
+        with span(f'sheets_{kind}') as attrs:
+            return self._execute(kind, request, attrs)
+
+    def _execute(self, kind, request, attrs):
+        bucket = self.buckets[kind]
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                attrs['attempts'] = attempt + 1
+            waited = bucket.acquire()
+            self._count(**{f'{kind}_requests': 1})
+            if waited > 0:
+                self._count(throttled=1, throttled_seconds=waited)
+                attrs['throttled_ms'] = round(attrs.get('throttled_ms', 0) + waited * 1000, 1)
+            try:
+                return request.execute()
+            except HttpError as err:
+                if err.resp.status not in RETRYABLE_STATUSES or attempt == self.max_retries:
+                    self._count(failures=1)
+                    raise
+                delay = self._retry_delay(err, attempt)
+                print(f'  Sheets API {err.resp.status} on {kind}; retrying in {delay:.1f}s '
+                      f'({attempt + 1}/{self.max_retries})')
+            except (ConnectionError, TimeoutError) as err:
+                if attempt == self.max_retries:
+                    self._count(failures=1)
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                print(f'  Sheets API connection error on {kind} ({err}); retrying in {delay:.1f}s')
+            self._count(retries=1, backoff_seconds=delay)
+            time.sleep(delay)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['throttled_seconds'] = round(stats['throttled_seconds'], 2)
+        stats['backoff_seconds'] = round(stats['backoff_seconds'], 2)
+        return stats
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_quota_scheduler():
+    """プロセス内で共有するスケジューラーを取得（初回のみ環境変数から作成）"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = SheetsQuotaScheduler(
+                read_per_minute=float(os.getenv('SHEETS_READ_QUOTA_PER_MINUTE', '60')),
+                write_per_minute=float(os.getenv('SHEETS_WRITE_QUOTA_PER_MINUTE', '60')),
+                max_retries=int(os.getenv('SHEETS_MAX_RETRIES', '5')),
+            )
+        return _scheduler
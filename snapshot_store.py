@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+支援額スナップショットストアモジュール
+スクレイピングのたびに上書きされていた総支援額・支援者数を時系列としてSQLiteに蓄積する（追記のみ）。
+値が変化した場合のみスナップショットを追記し、プロジェクトごとの推移とカテゴリ単位の集計を
+インデックスを使って取得する（スナップショットが数百万件になっても1プロジェクトあたりの件数に比例）
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+from dedup import normalize_url
+from profiling import profiled_run
+
+DEFAULT_SNAPSHOT_PATH = os.path.join('data', 'snapshots.sqlite3')
+
+# 推移の集計期間（秒）
+MOMENTUM_WINDOWS = {'24h': 24 * 3600, '7d': 7 * 24 * 3600}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    project_id    INTEGER PRIMARY KEY,
+    url_key       TEXT NOT NULL UNIQUE,
+    url           TEXT NOT NULL,
+    category      TEXT NOT NULL,
+    currency      TEXT NOT NULL,
+    usd_rate      REAL NOT NULL,
+    goal_amount   REAL NOT NULL,
+    end_timestamp INTEGER,
+    first_at      REAL NOT NULL,
+    last_seen_at  REAL NOT NULL,
+    funding_total REAL NOT NULL,
+    backers       INTEGER NOT NULL,
+    snapshots     INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS projects_category ON projects (category);
+CREATE TABLE IF NOT EXISTS snapshots (
+    project_id    INTEGER NOT NULL,
+    at            REAL NOT NULL,
+    funding_total REAL NOT NULL,
+    backers       INTEGER NOT NULL,
+    PRIMARY KEY (project_id, at)
+) WITHOUT ROWID;
+"""
+
+
+class SnapshotStore:
+    """プロジェクトごとの総支援額・支援者数の時系列（SQLite、値が変化した場合のみ追記）"""
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH):
+        """
+        Args:
+            path (str): SQLiteファイルのパス
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        # 追記が中心のため、WALで書き込みと読み込みを並行させ、fsyncはチェックポイント時のみ
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.execute('PRAGMA synchronous = NORMAL')
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM projects').fetchone()[0]
+
+    def record(self, record):
+        """
+        スクレイピング結果を記録（総支援額・支援者数が前回から変化した場合のみスナップショットを追記）
+
+        Args:
+            record (ProjectRecord): fetch_project_data の戻り値（エラーは記録しない）
+
+        Returns:
+            bool: スナップショットを追記した場合はTrue
+        """
+        added = self._record(record)
+        self.conn.commit()
+        return added
+
+    def record_many(self, records):
+        """複数のスクレイピング結果を1トランザクションで記録（取得日時の順に渡す）"""
+        added = sum(self._record(record) for record in records)
+        self.conn.commit()
+        return added
+
+    def _record(self, record):
+        if not record.ok:
+            return False
+        key = normalize_url(record.url)
+        at = record.fetched_at or time.time()
+        row = self.conn.execute(
+            'SELECT project_id, funding_total, backers, last_seen_at FROM projects WHERE url_key = ?', (key,)
+        ).fetchone()
+
+        if row is None:
+            cursor = self.conn.execute(
+                'INSERT INTO projects (url_key, url, category, currency, usd_rate, goal_amount, end_timestamp, '
+                'first_at, last_seen_at, funding_total, backers, snapshots) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)',
+                (key, record.url, record.category, record.currency, record.usd_rate, record.goal_amount,
+                 record.end_timestamp, at, at, record.funding_total, record.backers)
+            )
+            project_id = cursor.lastrowid
+        elif at <= row['last_seen_at']:
+            # 記録済みの時刻より古い結果（キャッシュからの取り込み等）は無視
+            return False
+        elif (row['funding_total'], row['backers']) == (record.funding_total, record.backers):
+            self.conn.execute('UPDATE projects SET last_seen_at = ? WHERE project_id = ?', (at, row['project_id']))
+            return False
+        else:
+            project_id = row['project_id']
+            self.conn.execute(
+                'UPDATE projects SET category = ?, currency = ?, usd_rate = ?, goal_amount = ?, end_timestamp = ?, '
+                'last_seen_at = ?, funding_total = ?, backers = ?, snapshots = snapshots + 1 WHERE project_id = ?',
+                (record.category, record.currency, record.usd_rate, record.goal_amount, record.end_timestamp,
+                 at, record.funding_total, record.backers, project_id)
+            )
+
+        self.conn.execute(
+            'INSERT OR REPLACE INTO snapshots (project_id, at, funding_total, backers) VALUES (?, ?, ?, ?)',
+            (project_id, at, record.funding_total, record.backers)
+        )
+        return True
+
+    def backfill(self, project_cache):
+        """
+        スナップショットが空の場合に、プロジェクトキャッシュの記録（1つ前と最新）から取り込み
+
+        Returns:
+            int: 追記したスナップショット数
+        """
+        if len(self):
+            return 0
+        records = sorted(project_cache.snapshots(), key=lambda r: r.fetched_at)
+        return self.record_many(records)
+
+    def funding_curve(self, url, since=None):
+        """
+        プロジェクトの総支援額・支援者数の推移
+
+        Args:
+            url (str): プロジェクトURL
+            since (float, optional): この時刻（UNIX時刻）以降のみ
+
+        Returns:
+            list: (時刻, 総支援額, 支援者数) のリスト（古い順、金額はプロジェクトの通貨建て）
+        """
+        return [tuple(row) for row in self.conn.execute(
+            'SELECT s.at, s.funding_total, s.backers FROM projects p JOIN snapshots s USING (project_id) '
+            'WHERE p.url_key = ? AND s.at >= ? ORDER BY s.at',
+            (normalize_url(url), since or 0)
+        )]
+
+    def momentum(self, url, now=None):
+        """
+        プロジェクトの支援額の推移の要約（プロンプトに渡す値）
+
+        Args:
+            url (str): プロジェクトURL
+            now (float, optional): 現在時刻（UNIX時刻）
+
+        Returns:
+            dict or None: first_at / last_at / first_funding / last_funding / first_backers / last_backers /
+                snapshots / goal_amount / usd_rate と、期間ごとの増加分（'gained_24h', 'backers_24h' 等）。
+                スナップショットが2件未満の場合はNone
+        """
+        project = self.conn.execute(
+            'SELECT * FROM projects WHERE url_key = ?', (normalize_url(url),)
+        ).fetchone()
+        if project is None or project['snapshots'] < 2:
+            return None
+
+        first = self.conn.execute(
+            'SELECT at, funding_total, backers FROM snapshots WHERE project_id = ? ORDER BY at LIMIT 1',
+            (project['project_id'],)
+        ).fetchone()
+        result = {
+            'first_at': first['at'],
+            'last_at': project['last_seen_at'],
+            'first_funding': first['funding_total'],
+            'last_funding': project['funding_total'],
+            'first_backers': first['backers'],
+            'last_backers': project['backers'],
+            'snapshots': project['snapshots'],
+            'goal_amount': project['goal_amount'],
+            'usd_rate': project['usd_rate'],
+        }
+        now = now or time.time()
+        for label, seconds in MOMENTUM_WINDOWS.items():
+            base = self._value_at(project['project_id'], now - seconds)
+            if base is None:
+                # 期間の開始時点より後に初めて取得したプロジェクトは増加分を計算しない
+                continue
+            result[f'gained_{label}'] = project['funding_total'] - base['funding_total']
+            result[f'backers_{label}'] = project['backers'] - base['backers']
+        return result
+
+    def _value_at(self, project_id, at):
+        """指定時刻の時点の値（その時刻以前の最後のスナップショット）"""
+        return self.conn.execute(
+            'SELECT at, funding_total, backers FROM snapshots WHERE project_id = ? AND at <= ? '
+            'ORDER BY at DESC LIMIT 1',
+            (project_id, at)
+        ).fetchone()
+
+    def category_summary(self, since=None, category=None):
+        """
+        カテゴリ単位の集計
+
+        Args:
+            since (float, optional): 増加分の起点（UNIX時刻、Noneの場合は増加分を計算しない）
+            category (str, optional): 指定した場合はそのカテゴリのみ
+
+        Returns:
+            dict: カテゴリ → {'projects', 'funding_usd', 'backers', 'snapshots'
+                （sinceを指定した場合は 'gained_usd', 'backers_gained'）}
+        """
+        gained = ''
+        params = []
+        if since is not None:
+            # 各プロジェクトの起点の値（起点より前のスナップショットが無い場合は最初のスナップショット）
+            base = ('COALESCE((SELECT s.{0} FROM snapshots s WHERE s.project_id = p.project_id AND s.at <= ? '
+                    'ORDER BY s.at DESC LIMIT 1), (SELECT s.{0} FROM snapshots s WHERE s.project_id = p.project_id '
+                    'ORDER BY s.at LIMIT 1))')
+            gained = (f', SUM((p.funding_total - {base.format("funding_total")}) * p.usd_rate) AS gained_usd'
+                      f', SUM(p.backers - {base.format("backers")}) AS backers_gained')
+            params += [since, since]
+        where = ''
+        if category is not None:
+            where = 'WHERE p.category = ?'
+            params.append(category)
+
+        summary = {}
+        for row in self.conn.execute(
+            f'SELECT p.category, COUNT(*) AS projects, SUM(p.funding_total * p.usd_rate) AS funding_usd, '
+            f'SUM(p.backers) AS backers, SUM(p.snapshots) AS snapshots{gained} '
+            f'FROM projects p {where} GROUP BY p.category',
+            params
+        ):
+            summary[row['category']] = {k: row[k] for k in row.keys() if k != 'category'}
+        return summary
+
+    def close(self):
+        self.conn.close()
+
+
+def benchmark(projects=10000, snapshots_per_project=100, path=None):
+    """
+    合成データでの書き込み・クエリ速度の計測
+
+    Args:
+        projects (int): プロジェクト数
+        snapshots_per_project (int): プロジェクトあたりの取得回数（約半数は値が変化しない）
+        path (str, optional): SQLiteファイル（Noneの場合は一時ファイル）
+    """
+    import random
+    import tempfile
+
+    from project_record import ProjectRecord
+
+    random.seed(0)
+    directory = None
+    if path is None:
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'snapshots.sqlite3')
+    store = SnapshotStore(path)
+    categories = ['Product Design', 'Gadgets', 'Tabletop Games', 'Publishing', 'Technology']
+    now = time.time()
+    start = now - snapshots_per_project * 3600
+
+    print("=" * 60)
+    print(f"Snapshot Store Benchmark ({projects:,} projects x {snapshots_per_project} scrapes)")
+    print("=" * 60)
+
+    written = 0
+    started = time.perf_counter()
+    funding = [0.0] * projects
+    backers = [0] * projects
+    for step in range(snapshots_per_project):
+        batch = []
+        for i in range(projects):
+            if random.random() < 0.5:
+                funding[i] += random.randint(10, 500)
+                backers[i] += random.randint(1, 5)
+            batch.append(ProjectRecord(
+                url=f'https://www.kickstarter.com/projects/creator{i}/project{i}',
+                category=categories[i % len(categories)],
+                funding_total=funding[i], goal_amount=10000.0, backers=backers[i],
+                fetched_at=start + step * 3600,
+            ))
+        written += store.record_many(batch)
+    elapsed = time.perf_counter() - started
+    print(f"Recorded {projects * snapshots_per_project:,} scrapes ({written:,} snapshots) in {elapsed:.1f}s "
+          f"({projects * snapshots_per_project / elapsed:,.0f} scrapes/s)")
+
+    url = f'https://www.kickstarter.com/projects/creator{projects // 2}/project{projects // 2}'
+    for label, query in [
+        ('funding_curve (1 project)', lambda: store.funding_curve(url)),
+        ('momentum (1 project)', lambda: store.momentum(url, now)),
+        ('category_summary', lambda: store.category_summary()),
+        ('category_summary since 24h', lambda: store.category_summary(since=now - 86400)),
+        ('category_summary 1 category', lambda: store.category_summary(since=now - 86400, category='Gadgets')),
+    ]:
+        started = time.perf_counter()
+        query()
+        print(f"  {label:<32}{(time.perf_counter() - started) * 1000:>9.1f}ms")
+
+    store.close()
+    print(f"\nDatabase size: {os.path.getsize(path) / 1e6:.1f}MB")
+    if directory:
+        import shutil
+        shutil.rmtree(directory)
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the snapshot store with synthetic scrapes')
+    parser.add_argument('--projects', type=int, default=10000)
+    parser.add_argument('--scrapes', type=int, default=100, help='Scrapes per project')
+    args = parser.parse_args()
+    benchmark(args.projects, args.scrapes)
+
+
+if __name__ == '__main__':
+    # PROFILE_MODE=cprofile / sample でプロファイル（logs/profile-*）
+    with profiled_run('snapshot_store'):
+        main()
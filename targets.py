@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+処理対象（スプレッドシート・シート）定義モジュール
+1回の実行で複数のスプレッドシート・シートを処理するための対象リストを読み込む。
+対象ごとにビジネスコンテキスト（クライアントごとの分析観点）を指定できる
+"""
+
+import hashlib
+import json
+import os
+
+from dedup import DEFAULT_INDEX_PATH
+
+
+class AnalysisTarget:
+    """処理対象のシート1つ分の定義"""
+
+    def __init__(self, spreadsheet_id, sheet_name='kickstarter', business_context='', name=None):
+        """
+        Args:
+            spreadsheet_id (str): スプレッドシートID
+            sheet_name (str): シート名
+            business_context (str): このシートのレポート生成に使うビジネスコンテキスト
+            name (str, optional): サマリー等に表示する名前（Noneの場合はシート名）
+        """
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_name = sheet_name
+        self.business_context = business_context
+        self.name = name or sheet_name
+
+    @property
+    def key(self):
+        return (self.spreadsheet_id, self.sheet_name)
+
+
+def _read_context(entry, base_dir):
+    """business_context、または business_context_file（対象リストからの相対パス）を読み込み"""
+    if entry.get('business_context_file'):
+        path = os.path.join(base_dir, entry['business_context_file'])
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    return entry.get('business_context')
+
+
+def load_targets(source=None, default_spreadsheet_id=None, default_sheet_name='kickstarter',
+                 default_context=''):
+    """
+    処理対象のリストを読み込み
+
+    Args:
+        source (str, optional): JSONファイルのパス、またはJSON文字列（Noneの場合はSHEETS_TARGETS）。
+            [{"spreadsheet_id": ..., "sheet_name": ..., "business_context": ..., "name": ...}, ...]
+            の形式で、省略した項目は SPREADSHEET_ID / SHEET_NAME / BUSINESS_CONTEXT の値を使う
+        default_spreadsheet_id (str, optional): スプレッドシートIDの既定値
+        default_sheet_name (str): シート名の既定値
+        default_context (str): ビジネスコンテキストの既定値
+
+    Returns:
+        list: AnalysisTarget のリスト（対象リストが無い場合は既定値の1件、IDも無い場合は空）
+
+    Raises:
+        ValueError: 形式が不正、または同じシートが重複している場合
+    """
+    source = (source or os.getenv('SHEETS_TARGETS', '')).strip()
+    if not source:
+        if not default_spreadsheet_id:
+            return []
+        return [AnalysisTarget(default_spreadsheet_id, default_sheet_name, default_context)]
+
+    base_dir = '.'
+    if not source.startswith('['):
+        base_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, 'r', encoding='utf-8') as f:
+            source = f.read()
+    try:
+        entries = json.loads(source)
+    except json.JSONDecodeError as e:
+        raise ValueError(f'Invalid SHEETS_TARGETS: {e}')
+    if not isinstance(entries, list) or not entries:
+        raise ValueError('SHEETS_TARGETS must be a non-empty JSON list')
+
+    targets = []
+    for entry in entries:
+        spreadsheet_id = entry.get('spreadsheet_id') or default_spreadsheet_id
+        if not spreadsheet_id:
+            raise ValueError(f'Target without spreadsheet_id: {entry}')
+        context = _read_context(entry, base_dir)
+        targets.append(AnalysisTarget(
+            spreadsheet_id,
+            entry.get('sheet_name') or default_sheet_name,
+            default_context if context is None else context,
+            entry.get('name'),
+        ))
+
+    seen = set()
+    for target in targets:
+        if target.key in seen:
+            raise ValueError(f'Duplicate target: {target.spreadsheet_id} / {target.sheet_name}')
+        seen.add(target.key)
+
+    # 同じシート名が別のスプレッドシートにある場合は表示名にIDを付けて区別
+    names = [t.name for t in targets]
+    for target in targets:
+        if names.count(target.name) > 1:
+            target.name = f'{target.spreadsheet_id[:8]}/{target.name}'
+    return targets
+
+
+def dedup_index_path(business_context, default_context=''):
+    """
+    ビジネスコンテキストごとの重複検出インデックスのパス
+
+    レポートはビジネスコンテキストに依存するため、別のクライアントのレポートを再利用しないよう
+    コンテキストごとにインデックスを分ける（既定のコンテキストは従来のパスを使う）
+    """
+    if business_context == default_context:
+        return DEFAULT_INDEX_PATH
+    digest = hashlib.sha1(business_context.encode('utf-8')).hexdigest()[:8]
+    root, ext = os.path.splitext(DEFAULT_INDEX_PATH)
+    return f'{root}-{digest}{ext}'
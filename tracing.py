@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+トレーシングモジュール
+ドライバー起動・ページ読み込み・抽出・OpenAI呼び出し・Sheets API呼び出し等の段階ごとの所要時間を
+スパンとして計測し、行ごとの構造化ログ（JSON）と実行全体のパーセンタイル集計をログファイルに書き込む
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+DEFAULT_LOG_DIR = 'logs'
+
+# サマリーに出力するパーセンタイル
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, q):
+    """
+    パーセンタイル（線形補間）
+
+    Args:
+        values (list): 値のリスト（ソート済み）
+        q (float): 0〜100
+
+    Returns:
+        float: パーセンタイル値（空の場合は0.0）
+    """
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class Tracer:
+    """段階ごとの所要時間を集計するトレーサー（スレッドセーフ）"""
+
+    def __init__(self, log_dir=DEFAULT_LOG_DIR, enabled=True):
+        """
+        Args:
+            log_dir (str): ログファイルを書き込むディレクトリ
+            enabled (bool): Falseの場合はログファイルを書き込まない（集計は行う）
+        """
+        self.log_dir = log_dir
+        self.enabled = enabled
+        self.path = None
+        self.run_id = None
+        self.durations = {}
+        self.profiler = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def start_run(self, run_id=None, profiler=None):
+        """
+        実行ごとのログファイルを開く
+
+        Args:
+            run_id (str, optional): 実行ID（Noneの場合は日時とPID）
+            profiler (StageProfiler, optional): 段階ごとのプロファイラー（profiling.create_profiler）
+        """
+        self.run_id = run_id or datetime.now().strftime('%Y%m%d-%H%M%S-') + f'{os.getpid()}'
+        with self._lock:
+            self.durations = {}
+        self.profiler = profiler
+        if profiler is not None and not profiler.stages:
+            # 段階の指定が無い場合は実行全体をプロファイル
+            profiler.enter('run')
+        if self.enabled:
+            os.makedirs(self.log_dir, exist_ok=True)
+            self.path = os.path.join(self.log_dir, f'analyzer-{self.run_id}.log')
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._write({'event': 'run_start', 'run_id': self.run_id, 'at': datetime.now().isoformat()})
+
+    def _write(self, record):
+        if self._file is None:
+            return
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        段階の所要時間を計測（行の処理中であれば行のログにも記録）
+
+        Args:
+            name (str): 段階名（'page_load' / 'openai_ja' / 'sheets_read' 等）
+            **attrs: ログに付加する属性（withブロック内で追加する場合は戻り値のdictに設定）
+        """
+        profiler = self.profiler
+        profiling = profiler is not None and profiler.stages and profiler.wants(name)
+        if profiling:
+            profiler.enter(name)
+        started = time.perf_counter()
+        error = None
+        try:
+            yield attrs
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if profiling:
+                profiler.exit()
+            with self._lock:
+                self.durations.setdefault(name, []).append(elapsed_ms)
+            row = getattr(self._local, 'row', None)
+            if row is not None:
+                span = {'stage': name, 'ms': round(elapsed_ms, 1)}
+                span.update(attrs)
+                if error:
+                    span['error'] = error
+                row['spans'].append(span)
+
+    @contextmanager
+    def row(self, **fields):
+        """
+        1行分の処理を計測し、終了時に構造化ログを1件書き込む
+
+        Args:
+            **fields: ログに含める項目（target, row, url 等）。withブロック内で 'status' 等を設定できる
+        """
+        record = dict({'event': 'row', 'run_id': self.run_id}, **fields)
+        record['spans'] = []
+        self._local.row = record
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self._local.row = None
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.durations.setdefault('row', []).append(elapsed_ms)
+            stages = {}
+            for span in record['spans']:
+                stages[span['stage']] = round(stages.get(span['stage'], 0.0) + span['ms'], 1)
+            record.update(at=datetime.now().isoformat(), duration_ms=round(elapsed_ms, 1), stages=stages)
+            self._write(record)
+
+    def summary(self):
+        """
+        段階ごとの集計
+
+        Returns:
+            dict: 段階名 → {'count', 'total_ms', 'p50', 'p90', 'p95', 'p99', 'max'}（ミリ秒）
+        """
+        with self._lock:
+            durations = {name: sorted(values) for name, values in self.durations.items()}
+        result = {}
+        for name, values in durations.items():
+            stats = {'count': len(values), 'total_ms': round(sum(values), 1)}
+            for q in PERCENTILES:
+                stats[f'p{q}'] = round(percentile(values, q), 1)
+            stats['max'] = round(values[-1], 1)
+            result[name] = stats
+        return result
+
+    def format_summary(self):
+        """サマリーを表形式の文字列に整形"""
+        summary = self.summary()
+        if not summary:
+            return ''
+        width = max(len(name) for name in summary)
+        lines = [f"{'Stage':<{width}}  {'Count':>5} " + ' '.join(f"{f'p{q}':>8}" for q in PERCENTILES)
+                 + f" {'Max':>8} {'Total':>9}"]
+        for name, stats in sorted(summary.items(), key=lambda item: -item[1]['total_ms']):
+            lines.append(f"{name:<{width}}  {stats['count']:>5} "
+                         + ' '.join(f"{stats[f'p{q}']:>8.1f}" for q in PERCENTILES)
+                         + f" {stats['max']:>8.1f} {stats['total_ms'] / 1000:>8.1f}s")
+        return '\n'.join(lines)
+
+    def finish(self):
+        """
+        実行全体の集計をログファイルに書き込んで閉じる（プロファイル中の場合はプロファイルも書き込む）
+
+        Returns:
+            list: 書き込んだプロファイルのパス
+        """
+        profiler, self.profiler = self.profiler, None
+        profile_paths = []
+        if profiler is not None:
+            if not profiler.stages:
+                profiler.exit()
+            profile_paths = profiler.write(self.log_dir, self.run_id)
+
+        if self._file is None:
+            return profile_paths
+        self._write({'event': 'run_summary', 'run_id': self.run_id, 'at': datetime.now().isoformat(),
+                     'stages': self.summary()})
+        with self._lock:
+            self._file.close()
+            self._file = None
+        return profile_paths
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """プロセス内で共有するトレーサーを取得（TRACE_MODE=off の場合はログファイルを書き込まない）"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(
+                log_dir=os.getenv('TRACE_LOG_DIR', DEFAULT_LOG_DIR),
+                enabled=os.getenv('TRACE_MODE', 'on').lower() != 'off',
+            )
+        return _tracer
+
+
+def span(name, **attrs):
+    """共有トレーサーでスパンを計測（with span('page_load'): ...）"""
+    return get_tracer().span(name, **attrs)